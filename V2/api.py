@@ -0,0 +1,297 @@
+"""HTTP JSON API over the headless playlist core.
+
+Quick reads (search, resolve, playlists, single-playlist export) are answered
+directly; anything that writes to Spotify or walks whole playlists is queued
+on the job queue and answered with ``202`` and a job id to poll. Run from the
+V2 directory with ``python api.py``, or serve ``api:create_app()`` with any
+WSGI server. Set ``API_TOKEN`` to require ``Authorization: Bearer <token>``.
+
+Endpoints that write tracks take exactly one of ``track_ids`` or ``tracks``
+(song lines to resolve). A job fails without writing anything if a lookup
+fails or, unless the body sets ``allow_unmatched``, if a line has no match.
+"""
+import os
+import secrets
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+
+from dotenv import load_dotenv
+from flask import Flask, Response, abort, jsonify, request, send_file
+from spotipy.exceptions import SpotifyException
+
+from catalog_index import CatalogIndex
+from clients import local_client
+from core import (
+    SCOPE, create_playlist, export_playlist, export_playlists, get_user_playlists,
+    playlist_analytics, resolve_tracks, save_playlists_to_library, save_tracks_to_library, search_artists,
+    sync_playlist
+)
+from exporter import EXPORT_FORMATS, safe_export_name
+from jobs import JobQueue
+from metrics import ApiMetrics
+from prefetch import FetchCache
+from query_builder import staged_track_search
+
+# Separate from the Streamlit app's job directory, since each queue takes over the files in its own
+JOB_DIR = os.path.join(".jobs", "api")
+EXPORT_DIR = os.path.join(JOB_DIR, "exports")
+# API clients share one account, so allow more requests in flight than a browser session
+API_REQUEST_LIMIT = 8
+MAX_RESOLVE_LINES = 1000
+FETCH_CACHE_BYTES = 64 * 1024 * 1024
+CATALOG_INDEX_BYTES = 64 * 1024 * 1024
+
+def _json_body():
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        abort(400, description="Expected a JSON object body")
+    return body
+
+def _string_list(body, key):
+    values = body.get(key)
+    if not isinstance(values, list) or not values or not all(isinstance(v, str) and v.strip() for v in values):
+        abort(400, description=f"{key} must be a non-empty list of strings")
+    return values
+
+def _track_input(body):
+    """Validate the songs of a request body before queuing: exactly one of ``track_ids`` or ``tracks``."""
+    keys = [key for key in ('track_ids', 'tracks') if key in body]
+    if len(keys) != 1:
+        abort(400, description="Pass exactly one of track_ids or tracks")
+    values = _string_list(body, keys[0])
+    if keys[0] == 'tracks' and len(values) > MAX_RESOLVE_LINES:
+        abort(400, description=f"At most {MAX_RESOLVE_LINES} tracks per request")
+    return keys[0], values
+
+def _track_ids(sp, key, values, allow_unmatched=False):
+    """Track ids from ``track_ids`` or, resolved concurrently, from ``tracks`` (one song per entry).
+
+    Raises before anything is written if a lookup failed, or if a line didn't
+    match and the caller didn't pass ``allow_unmatched``.
+    """
+    if key == 'track_ids':
+        return values, []
+    resolved = resolve_tracks(sp, values)
+    errors = [f"{line}: {error}" for line, _, error in resolved if error]
+    if errors:
+        raise RuntimeError(f"{len(errors)} lookups failed, nothing was written (first: {errors[0]})")
+    missing = [line for line, track, _ in resolved if not track]
+    if missing and not allow_unmatched:
+        raise ValueError(f"{len(missing)} tracks didn't match, nothing was written; "
+                         f"pass allow_unmatched to skip them (first: {missing[0]})")
+    track_ids = [track.id for _, track, _ in resolved if track]
+    if not track_ids:
+        raise ValueError("No tracks matched, nothing was written")
+    return track_ids, missing
+
+def _job_json(job):
+    data = asdict(job)
+    # Export archives are fetched through /jobs/<id>/download, never by path
+    if job.kind == 'export' and job.result:
+        data['result'] = {'download': f"/jobs/{job.id}/download", 'errors': job.result['errors']}
+    return data
+
+def create_app(sp=None, job_queue=None, metrics=None):
+    """Build the API app. ``sp`` and ``job_queue`` can be injected, e.g. a stand-in client for load tests."""
+    load_dotenv()
+    app = Flask(__name__)
+    metrics = metrics or ApiMetrics()
+    sp = sp or local_client(SCOPE, per_user_limit=API_REQUEST_LIMIT, metrics=metrics)
+    jobs = job_queue or JobQueue(JOB_DIR)
+    cache = FetchCache(ThreadPoolExecutor(max_workers=8, thread_name_prefix="spm_api"), ttl=300,
+                       metrics=metrics, max_bytes=FETCH_CACHE_BYTES)
+    index = CatalogIndex(max_bytes=CATALOG_INDEX_BYTES)
+    api_token = os.getenv('API_TOKEN')
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+
+    def accepted(job_id):
+        return jsonify({'job_id': job_id, 'status_url': f"/jobs/{job_id}"}), 202
+
+    @app.before_request
+    def check_token():
+        if api_token and request.endpoint != 'health':
+            supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+            if not secrets.compare_digest(supplied.encode(), api_token.encode()):
+                abort(401)
+
+    @app.errorhandler(SpotifyException)
+    def spotify_error(e):
+        return jsonify({'error': e.msg}), e.http_status if 400 <= e.http_status < 600 else 502
+
+    @app.errorhandler(400)
+    @app.errorhandler(401)
+    @app.errorhandler(404)
+    def client_error(e):
+        return jsonify({'error': e.description}), e.code
+
+    @app.get('/health')
+    def health():
+        return jsonify({'status': 'ok'})
+
+    @app.get('/metrics')
+    def prometheus_metrics():
+        return Response(metrics.to_prometheus(), mimetype="text/plain; version=0.0.4")
+
+    @app.get('/metrics.json')
+    def json_metrics():
+        return jsonify(metrics.summary())
+
+    @app.get('/search/tracks')
+    def search_tracks_route():
+        query = request.args.get('q', '').strip()
+        if not query:
+            abort(400, description="Missing q")
+        limit = min(request.args.get('limit', 10, type=int), 50)
+        tracks = cache.get(('search', 'track', query, limit), lambda: staged_track_search(sp, query, limit=limit)[0])
+        index.add_many('track', tracks)
+        return jsonify([track.to_dict() for track in tracks[:limit]])
+
+    @app.get('/search/artists')
+    def search_artists_route():
+        query = request.args.get('q', '').strip()
+        if not query:
+            abort(400, description="Missing q")
+        artists = cache.get(('search', 'artist', query), lambda: search_artists(sp, query))
+        index.add_many('artist', artists)
+        return jsonify([asdict(artist) for artist in artists])
+
+    @app.get('/suggest')
+    def suggest():
+        """Instant matches from everything this server has already seen, without calling Spotify."""
+        kind = request.args.get('kind')
+        return jsonify(index.search(request.args.get('q', ''), kind=kind, limit=request.args.get('limit', 10, type=int)))
+
+    @app.post('/resolve')
+    def resolve():
+        lines = _string_list(_json_body(), 'tracks')
+        if len(lines) > MAX_RESOLVE_LINES:
+            abort(400, description=f"At most {MAX_RESOLVE_LINES} tracks per request")
+        return jsonify([{'input': line, 'track': track.to_dict() if track else None, 'error': error}
+                        for line, track, error in resolve_tracks(sp, lines)])
+
+    @app.get('/playlists')
+    def playlists():
+        return jsonify([asdict(p) for p in cache.get(('playlists',), lambda: get_user_playlists(sp))])
+
+    @app.post('/playlists')
+    def create():
+        body = _json_body()
+        name = body.get('name')
+        if not name:
+            abort(400, description="Missing name")
+        key, values = _track_input(body)
+
+        def run(progress):
+            track_ids, missing = _track_ids(sp, key, values, bool(body.get('allow_unmatched')))
+            playlist_id = create_playlist(sp, name, track_ids, public=bool(body.get('public')), on_progress=progress)
+            cache.invalidate(('playlists',))
+            return (f"Created playlist '{name}' with {len(track_ids)} tracks",
+                    {'playlist_id': playlist_id, 'unmatched': missing})
+
+        return accepted(jobs.submit('create', f"Create '{name}'", run))
+
+    @app.put('/playlists/<playlist_id>/tracks')
+    def sync(playlist_id):
+        body = _json_body()
+        key, values = _track_input(body)
+
+        def run(progress):
+            # Resolved before the sync, so a failed or partial resolution never touches the playlist
+            track_ids, missing = _track_ids(sp, key, values, bool(body.get('allow_unmatched')))
+            sync_playlist(sp, playlist_id, track_ids, on_progress=progress)
+            return f"Synced playlist to {len(track_ids)} tracks", {'playlist_id': playlist_id, 'unmatched': missing}
+
+        return accepted(jobs.submit('sync', f"Sync {playlist_id}", run))
+
+    @app.get('/playlists/<playlist_id>/export')
+    def export_one(playlist_id):
+        export_format = request.args.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            abort(400, description=f"Unsupported export format: {export_format}")
+        # Spooled so small playlists stay in memory and large ones go to disk
+        buffer = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        export_playlist(sp, playlist_id, buffer, export_format)
+        buffer.seek(0)
+        return send_file(buffer, mimetype=EXPORT_FORMATS[export_format]['mime'], as_attachment=True,
+                         download_name=safe_export_name(request.args.get('name', playlist_id), export_format))
+
+    @app.post('/exports')
+    def export_many():
+        body = _json_body()
+        export_format = body.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            abort(400, description=f"Unsupported export format: {export_format}")
+        wanted = None if body.get('all') else set(body.get('playlist_ids') or [])
+        if wanted is not None and not wanted:
+            abort(400, description="Pass playlist_ids or all")
+
+        def run(progress):
+            selected = [p for p in get_user_playlists(sp) if wanted is None or p.id in wanted]
+            fd, path = tempfile.mkstemp(prefix="spm_", suffix=".zip", dir=EXPORT_DIR)
+            with os.fdopen(fd, 'wb') as f:
+                results = export_playlists(sp, selected, f, export_format, on_progress=progress)
+            errors = [message for status, message in results if status == "error"]
+            return f"Exported {len(results) - len(errors)} playlists", {'path': path, 'errors': errors}
+
+        return accepted(jobs.submit('export', "Export playlists", run))
+
+    @app.post('/playlists/<playlist_id>/analytics')
+    def analytics(playlist_id):
+        return accepted(jobs.submit(
+            'analytics', f"Analyze {playlist_id}",
+            lambda progress: ("Analysis complete!", playlist_analytics(sp, playlist_id, on_progress=progress))
+        ))
+
+    @app.post('/library/tracks')
+    def save_to_library():
+        body = _json_body()
+        if 'playlist_ids' in body:
+            playlist_ids = _string_list(body, 'playlist_ids')
+        else:
+            playlist_ids = None
+            key, values = _track_input(body)
+
+        def run(progress):
+            if playlist_ids:
+                saved, already_saved = save_playlists_to_library(sp, playlist_ids, on_progress=progress)
+                missing = []
+            else:
+                track_ids, missing = _track_ids(sp, key, values, bool(body.get('allow_unmatched')))
+                saved, already_saved = save_tracks_to_library(sp, track_ids, on_progress=progress)
+            return (f"Saved {saved} tracks to Liked Songs",
+                    {'saved': saved, 'already_saved': already_saved, 'unmatched': missing})
+
+        return accepted(jobs.submit('save', "Save to Liked Songs", run))
+
+    @app.get('/jobs')
+    def list_jobs():
+        return jsonify([_job_json(job) for job in jobs.list()])
+
+    @app.get('/jobs/<job_id>')
+    def get_job(job_id):
+        job = jobs.get(job_id)
+        if job is None:
+            abort(404, description="No such job")
+        return jsonify(_job_json(job))
+
+    @app.delete('/jobs/<job_id>')
+    def cancel_job(job_id):
+        if jobs.get(job_id) is None:
+            abort(404, description="No such job")
+        jobs.cancel(job_id)
+        return jsonify(_job_json(jobs.get(job_id)))
+
+    @app.get('/jobs/<job_id>/download')
+    def download(job_id):
+        job = jobs.get(job_id)
+        if job is None or job.kind != 'export' or job.status != 'succeeded':
+            abort(404, description="No finished export with this id")
+        return send_file(os.path.abspath(job.result['path']), mimetype="application/zip",
+                         as_attachment=True, download_name=f"playlists-{job.id}.zip")
+
+    return app
+
+if __name__ == "__main__":
+    # Threaded so slow Spotify calls of one client don't block the others
+    create_app().run(host=os.getenv('API_HOST', "127.0.0.1"), port=int(os.getenv('API_PORT', "8000")), threaded=True)
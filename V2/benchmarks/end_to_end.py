@@ -0,0 +1,183 @@
+"""End-to-end timings of the core playlist operations against the local API stand-in.
+
+Every case runs a real spotipy client over ``stand_in.StandInAdapter``, so
+the numbers cover our code, spotipy and JSON decoding but no network. Cases
+are named after the core functions they time. Fixtures
+are generated from a fixed seed, so runs on the same machine are comparable.
+Results are written as JSON; pass an earlier file as ``--baseline`` to fail
+when any case's median got slower by more than ``--threshold``. Run from the
+V2 directory:
+
+    python benchmarks/end_to_end.py --output before.json
+    python benchmarks/end_to_end.py --baseline before.json --threshold 0.15
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import (
+    create_playlist, export_playlist, fetch_album_tracks, get_user_playlists,
+    import_playlist, interleave_tracks, playlist_analytics, read_track_records, resolve_tracks
+)
+from models import Track
+from stand_in import SyntheticCatalog, stand_in_client
+
+SEED = 7
+
+def _client(catalog, latency):
+    sp = stand_in_client(catalog, latency)
+    return sp, sp._session.get_adapter("https://api.spotify.com/v1/")
+
+def build_cases(quick=False, latency=0.0):
+    """Return ``[(name, setup)]`` where ``setup()`` returns ``(run, adapter)``."""
+    catalog = SyntheticCatalog(seed=SEED, discography_albums=500)
+    playlist_sizes = [100, 1000] if quick else [100, 1000, 10000]
+    big_playlists = {size: catalog.add_playlist(f"Bench {size}", count=size, seed=size)['id']
+                     for size in playlist_sizes}
+    cases = []
+
+    for size in [10, 1000] if quick else [10, 1000, 10000]:
+        def setup(size=size):
+            sp, adapter = _client(SyntheticCatalog(artists=20, seed=SEED).add_library(size, (0, 200)), latency)
+            return lambda: get_user_playlists(sp), adapter
+        cases.append((f"get_user_playlists[{size} playlists]", setup))
+
+    for size, playlist_id in big_playlists.items():
+        def setup(playlist_id=playlist_id):
+            sp, adapter = _client(catalog, latency)
+            return lambda: playlist_analytics(sp, playlist_id), adapter
+        cases.append((f"playlist_analytics[{size} tracks]", setup))
+
+        for export_format in ('csv', 'json', 'ndjson'):
+            def setup(playlist_id=playlist_id, export_format=export_format):
+                sp, adapter = _client(catalog, latency)
+                return lambda: export_playlist(sp, playlist_id, io.BytesIO(), export_format), adapter
+            cases.append((f"export_playlist[{export_format}, {size} tracks]", setup))
+
+    tracks = [Track.from_api(t) for t in list(catalog.tracks.values())[:2000]]
+
+    def setup():
+        sp, adapter = _client(catalog, latency)
+        selection = [{'id': track.id, 'count': 1 + i % 3} for i, track in enumerate(tracks[:500])]
+        return lambda: create_playlist(sp, "Bench mix", interleave_tracks(selection)), adapter
+    cases.append(("interleave_tracks+create_playlist[500 tracks, ~1000 items]", setup))
+
+    def setup():
+        sp, adapter = _client(catalog, latency)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=['name', 'artists', 'id'])
+        writer.writeheader()
+        writer.writerows({'name': t.name, 'artists': t.artist_names, 'id': t.id} for t in tracks)
+        data = buffer.getvalue().encode('utf-8')
+        return lambda: import_playlist(sp, read_track_records(io.BytesIO(data), "import.csv"), "Bench import"), adapter
+    cases.append(("read_track_records+import_playlist[2000 rows csv]", setup))
+
+    def setup():
+        sp, adapter = _client(catalog, latency)
+
+        def run():
+            albums = []
+            results = sp.artist_albums(catalog.prolific_artist_id, album_type='album,single', limit=50)
+            while results:
+                albums.extend(results['items'])
+                results = sp.next(results) if results['next'] else None
+            return [fetch_album_tracks(sp, album['id']) for album in albums]
+        return run, adapter
+    cases.append(("artist_albums+fetch_album_tracks[500 albums]", setup))
+
+    lines = [f"{track.name} by {track.artist_names}" for track in tracks[:50]]
+
+    def setup():
+        sp, adapter = _client(catalog, latency)
+        return lambda: resolve_tracks(sp, lines), adapter
+    cases.append(("resolve_tracks[50 lines]", setup))
+
+    for track_count, repeat in [(100, 20), (2000, 5)]:
+        def setup(track_count=track_count, repeat=repeat):
+            selection = [{'id': track.id, 'count': repeat} for track in tracks[:track_count]]
+            return lambda: interleave_tracks(selection), None
+        cases.append((f"interleave_tracks[{track_count} tracks x {repeat}]", setup))
+    return cases
+
+def run_case(setup, repeats):
+    run, adapter = setup()
+    run()  # warm-up, also fills lazily built fixture state
+    timings = []
+    requests_before = adapter.requests if adapter else 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+    result = {
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'repeats': repeats,
+    }
+    if adapter:
+        result['requests'] = (adapter.requests - requests_before) // repeats
+    return result
+
+def compare(results, baseline, threshold):
+    """Return ``[(case, old_ms, new_ms, change)]`` for cases slower than the baseline by ``threshold``."""
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get('results', {}).get(name)
+        if not old:
+            continue
+        change = result['median_ms'] / old['median_ms'] - 1 if old['median_ms'] else 0
+        if change > threshold:
+            regressions.append((name, old['median_ms'], result['median_ms'], change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every API call")
+    parser.add_argument('--quick', action='store_true', help="skip the 10k playlist and 10k track cases")
+    parser.add_argument('--filter', default='', help="only run cases containing this text")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.15, help="allowed median slowdown (default 0.15)")
+    args = parser.parse_args()
+
+    results = {}
+    for name, setup in build_cases(args.quick, args.latency):
+        if args.filter not in name:
+            continue
+        results[name] = run_case(setup, args.repeats)
+        requests = f"{results[name]['requests']:>6} calls" if 'requests' in results[name] else ""
+        print(f"{results[name]['median_ms']:>10.1f}ms  {requests:>12}  {name}")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': SEED,
+            'latency': args.latency,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for name, old_ms, new_ms, change in regressions:
+            print(f"REGRESSION {name}: {old_ms:.1f}ms -> {new_ms:.1f}ms (+{change:.0%})")
+        sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
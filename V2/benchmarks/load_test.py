@@ -0,0 +1,221 @@
+"""Concurrent-session load test of the playlist flows against the local API stand-in.
+
+Every simulated session is a thread with its own ``LimitedSpotify`` client and
+per-user request limit over one shared HTTP session, as ``SpotifyClientPool``
+hands them out in MULTI_USER mode, and its own dict of the state the Streamlit
+app keeps per session. Sessions share one ``FetchCache``, like the app's
+``st.cache_resource`` cache, and repeat a user journey until the duration is
+up: search an artist, select tracks from two albums, create a playlist, open
+the playlist manager, analyze the new playlist, delete it again.
+
+Reports journeys and API requests per second, p50/p95/p99 latency per step and
+the memory each session holds. The stand-in answers one request at a time, so
+use ``--latency`` to model network round trips; without it the stand-in itself
+becomes the bottleneck at high session counts. Run from the V2 directory:
+
+    python benchmarks/load_test.py --sessions 1 10 50 --duration 20 --latency 0.05
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clients import LimitedSpotify
+from core import (
+    create_playlist, delete_playlists, fetch_album_tracks, fetch_artist_albums, get_user_playlists,
+    interleave_tracks, playlist_analytics, search_artists
+)
+from memory import deep_size
+from metrics import ApiMetrics, capture_response
+from prefetch import FetchCache
+from selection import TrackSelection
+from stand_in import API_PREFIX, SyntheticCatalog, stand_in_session
+
+SEED = 7
+# Same per-user limit as SpotifyClientPool's default
+PER_USER_LIMIT = 4
+STEPS = ['search', 'select', 'create', 'manager', 'analytics', 'delete']
+
+class SimulatedSession:
+    """One browser session running the journey in a loop."""
+
+    def __init__(self, index, catalog, http, metrics, cache, think=0.0):
+        self.random = random.Random(SEED + index)
+        self.catalog = catalog
+        self.cache = cache
+        self.think = think
+        self.sp = LimitedSpotify(auth="stand-in-token", requests_session=http,
+                                 limiter=threading.BoundedSemaphore(PER_USER_LIMIT), metrics=metrics)
+        self.state = {'selected_tracks': TrackSelection(), 'artist_albums': [], 'album_tracks': [],
+                      'analytics_cache': {}}
+        self.timings = {step: [] for step in STEPS}
+        self.journeys = 0
+        self.errors = []
+
+    def search(self):
+        artist = self.catalog.artists[self.random.choice(list(self.catalog.artists))]
+        query = artist['name']
+        self.state['artists'] = self.cache.get(('search', 'artist', query), lambda: search_artists(self.sp, query))
+
+    def select(self):
+        artist_id = self.state['artists'][0].id
+        albums = self.cache.get(('artist_albums', artist_id), lambda: fetch_artist_albums(self.sp, artist_id))
+        self.state['artist_albums'] = albums
+        for album in albums[:2]:
+            tracks = self.cache.get(('album_tracks', album.id), lambda: fetch_album_tracks(self.sp, album.id))
+            self.state['album_tracks'] = tracks
+            self.state['selected_tracks'].add_many(tracks)
+
+    def create(self):
+        selection = self.state['selected_tracks']
+        for track in list(selection)[::3]:
+            selection.set_count(track.id, 2)
+        self.state['created_id'] = create_playlist(
+            self.sp, f"Load test mix {self.journeys}", interleave_tracks(selection.tracks_with_counts())
+        )
+        selection.clear()
+
+    def manager(self):
+        library = get_user_playlists(self.sp)
+        self.state['library'] = sorted(library, key=lambda p: p.name.lower())
+
+    def analytics(self):
+        playlist_id = self.state['created_id']
+        self.state['analytics_cache'][playlist_id] = playlist_analytics(self.sp, playlist_id)
+
+    def delete(self):
+        playlist_id = self.state.pop('created_id')
+        delete_playlists(self.sp, [playlist_id])
+        self.state['analytics_cache'].pop(playlist_id, None)
+
+    def run(self, deadline):
+        while time.monotonic() < deadline:
+            for step in STEPS:
+                start = time.perf_counter()
+                try:
+                    getattr(self, step)()
+                except Exception as e:
+                    self.errors.append(f"{step}: {e}")
+                    self.state.pop('created_id', None)
+                    break
+                self.timings[step].append((time.perf_counter() - start) * 1000)
+                if self.think:
+                    time.sleep(self.think)
+            else:
+                self.journeys += 1
+
+def _percentiles(samples):
+    if len(samples) < 2:
+        value = round(samples[0], 2) if samples else 0.0
+        return {'count': len(samples), 'p50_ms': value, 'p95_ms': value, 'p99_ms': value, 'max_ms': value}
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {'count': len(samples), 'p50_ms': round(cuts[49], 2), 'p95_ms': round(cuts[94], 2),
+            'p99_ms': round(cuts[98], 2), 'max_ms': round(max(samples), 2)}
+
+def run_level(catalog, sessions, duration, latency, think, trace_memory):
+    """Run ``sessions`` concurrent sessions for ``duration`` seconds and summarize them."""
+    http = stand_in_session(catalog, latency)
+    http.hooks['response'].append(capture_response)
+    adapter = http.get_adapter(API_PREFIX)
+    metrics = ApiMetrics()
+    cache = FetchCache(ThreadPoolExecutor(max_workers=8, thread_name_prefix="spm_load"), ttl=300, metrics=metrics)
+    if trace_memory:
+        gc.collect()
+        tracemalloc.start()
+    simulated = [SimulatedSession(i, catalog, http, metrics, cache, think) for i in range(sessions)]
+    deadline = time.monotonic() + duration
+    threads = [threading.Thread(target=session.run, args=(deadline,), name=f"session-{i}")
+               for i, session in enumerate(simulated)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    result = {'sessions': sessions, 'seconds': round(elapsed, 2)}
+    if trace_memory:
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['traced_kb_per_session'] = round(current / sessions / 1024, 1)
+        result['traced_peak_kb'] = round(peak / 1024, 1)
+    journeys = sum(session.journeys for session in simulated)
+    errors = [error for session in simulated for error in session.errors]
+    session_bytes = [deep_size((session.sp, session.state), exclude=(http, metrics, cache)) for session in simulated]
+    caches = metrics.summary()['caches']
+    result.update({
+        'journeys': journeys,
+        'journeys_per_s': round(journeys / elapsed, 2),
+        'requests': adapter.requests,
+        'requests_per_s': round(adapter.requests / elapsed, 1),
+        'errors': len(errors),
+        'error_samples': errors[:5],
+        'steps': {step: _percentiles([ms for session in simulated for ms in session.timings[step]]) for step in STEPS},
+        'session_kb_mean': round(statistics.fmean(session_bytes) / 1024, 1),
+        'session_kb_max': round(max(session_bytes) / 1024, 1),
+        'cache_hit_rate': caches.get('fetch', {}).get('hit_rate', 0.0),
+    })
+    cache.executor.shutdown(wait=False)
+    return result
+
+def print_level(result):
+    print(f"== {result['sessions']} sessions, {result['seconds']:.0f}s: {result['journeys']} journeys "
+          f"({result['journeys_per_s']:.1f}/s), {result['requests']} requests ({result['requests_per_s']:.0f}/s), "
+          f"{result['errors']} errors")
+    for step, stats in result['steps'].items():
+        print(f"   {step:<10} p50 {stats['p50_ms']:>8.1f}ms  p95 {stats['p95_ms']:>8.1f}ms  "
+              f"p99 {stats['p99_ms']:>8.1f}ms  max {stats['max_ms']:>8.1f}ms  (n={stats['count']})")
+    memory = f"   session memory {result['session_kb_mean']:.0f} KB mean, {result['session_kb_max']:.0f} KB max"
+    if 'traced_kb_per_session' in result:
+        memory += f"; traced {result['traced_kb_per_session']:.0f} KB per session"
+    print(f"{memory}; cache hit rate {result['cache_hit_rate']:.0%}")
+    for error in result['error_samples']:
+        print(f"   ! {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 10, 50], help="concurrent sessions per level")
+    parser.add_argument('--duration', type=float, default=20.0, help="seconds per level")
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds added to every API call")
+    parser.add_argument('--think', type=float, default=0.0, help="seconds a session pauses between steps")
+    parser.add_argument('--library', type=int, default=200, help="playlists in the shared user library")
+    parser.add_argument('--tracemalloc', action='store_true', help="also trace allocations (slows every level)")
+    parser.add_argument('--output', help="write results to this JSON file")
+    args = parser.parse_args()
+
+    catalog = SyntheticCatalog(seed=SEED).add_library(args.library, (0, 200))
+    levels = []
+    for sessions in args.sessions:
+        levels.append(run_level(catalog, sessions, args.duration, args.latency, args.think, args.tracemalloc))
+        print_level(levels[-1])
+
+    if args.output:
+        report = {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'seed': SEED,
+                'latency': args.latency,
+                'think': args.think,
+                'library': args.library,
+            },
+            'levels': levels,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Compare the per-session memory of raw Spotify JSON against the slotted models.
+
+Builds synthetic API payloads shaped like real responses (three image variants,
+~180 available_markets, nested artist objects) for a typical session: one
+artist's albums, a few album track lists, search results and the playlist
+library. Run from the V2 directory:
+
+    python benchmarks/session_memory.py --playlists 1500 --albums 50
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Album, Artist, Playlist, Track
+
+MARKETS = [f"{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(180)]
+
+def _images(seed):
+    return [{'url': f"https://i.scdn.co/image/{seed}-{size}", 'height': size, 'width': size}
+            for size in (640, 300, 64)]
+
+def _artist(i):
+    return {
+        'id': f"artist{i}", 'name': f"Artist {i}", 'type': 'artist', 'uri': f"spotify:artist:artist{i}",
+        'href': f"https://api.spotify.com/v1/artists/artist{i}",
+        'external_urls': {'spotify': f"https://open.spotify.com/artist/artist{i}"},
+        'images': _images(f"artist{i}"), 'genres': ['pop', 'dance pop'], 'popularity': i % 100,
+        'followers': {'href': None, 'total': i * 1000},
+    }
+
+def _simple_artist(i):
+    artist = _artist(i)
+    return {k: artist[k] for k in ('id', 'name', 'type', 'uri', 'href', 'external_urls')}
+
+def _album(i):
+    return {
+        'id': f"album{i}", 'name': f"Album {i}", 'album_type': 'album', 'total_tracks': 12,
+        'release_date': '2015-06-01', 'release_date_precision': 'day', 'type': 'album',
+        'uri': f"spotify:album:album{i}", 'href': f"https://api.spotify.com/v1/albums/album{i}",
+        'external_urls': {'spotify': f"https://open.spotify.com/album/album{i}"},
+        'available_markets': list(MARKETS), 'images': _images(f"album{i}"),
+        'artists': [_simple_artist(i % 10)],
+    }
+
+def _track(i, album):
+    return {
+        'id': f"track{i}", 'name': f"Track {i}", 'duration_ms': 200000 + i, 'explicit': i % 5 == 0,
+        'popularity': i % 100, 'track_number': i % 12 + 1, 'disc_number': 1, 'type': 'track',
+        'uri': f"spotify:track:track{i}", 'href': f"https://api.spotify.com/v1/tracks/track{i}",
+        'external_urls': {'spotify': f"https://open.spotify.com/track/track{i}"},
+        'external_ids': {'isrc': f"USXXX{i:07d}"}, 'preview_url': None, 'is_local': False,
+        'available_markets': list(MARKETS), 'artists': [_simple_artist(i % 10)], 'album': album,
+    }
+
+def _playlist(i):
+    return {
+        'id': f"playlist{i}", 'name': f"Playlist {i}", 'description': 'Synthetic playlist',
+        'collaborative': False, 'public': False, 'snapshot_id': f"snap{i}", 'type': 'playlist',
+        'uri': f"spotify:playlist:playlist{i}", 'href': f"https://api.spotify.com/v1/playlists/playlist{i}",
+        'external_urls': {'spotify': f"https://open.spotify.com/playlist/playlist{i}"},
+        'images': _images(f"playlist{i}"), 'primary_color': None,
+        'owner': {'id': f"user{i % 3}", 'display_name': f"User {i % 3}", 'type': 'user',
+                  'uri': f"spotify:user:user{i % 3}", 'href': '', 'external_urls': {}},
+        'tracks': {'href': '', 'total': i % 300},
+    }
+
+def build_raw_session(playlists, albums, tracks_per_album):
+    return {
+        'search_artists': [_artist(i) for i in range(5)],
+        'artist_albums': [_album(i) for i in range(albums)],
+        'album_tracks': [_track(a * tracks_per_album + t, _album(a))
+                         for a in range(5) for t in range(tracks_per_album)],
+        'playlists': [_playlist(i) for i in range(playlists)],
+    }
+
+def project_session(raw):
+    return {
+        'search_artists': [Artist.from_api(a) for a in raw['search_artists']],
+        'artist_albums': [Album.from_api(a) for a in raw['artist_albums']],
+        'album_tracks': [Track.from_api(t) for t in raw['album_tracks']],
+        'playlists': [Playlist.from_api(p) for p in raw['playlists']],
+    }
+
+def measure(build):
+    """Return the object built by ``build`` and the bytes it keeps allocated."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--playlists', type=int, default=1500)
+    parser.add_argument('--albums', type=int, default=50)
+    parser.add_argument('--tracks-per-album', type=int, default=12)
+    args = parser.parse_args()
+
+    def build():
+        return build_raw_session(args.playlists, args.albums, args.tracks_per_album)
+
+    print(f"{'Session key':<20}{'Raw JSON':>12}{'Models':>12}{'Saved':>8}")
+    raw_total = model_total = 0
+    for key in ('search_artists', 'artist_albums', 'album_tracks', 'playlists'):
+        _, raw_bytes = measure(lambda: build()[key])
+        # The raw payload is dropped after projection, so only what the models keep is counted
+        _, model_bytes = measure(lambda: project_session(build())[key])
+        raw_total += raw_bytes
+        model_total += model_bytes
+        print(f"{key:<20}{raw_bytes / 1024:>10.0f}KB{model_bytes / 1024:>10.0f}KB"
+              f"{100 * (1 - model_bytes / raw_bytes):>7.1f}%")
+    print(f"{'total':<20}{raw_total / 1024:>10.0f}KB{model_total / 1024:>10.0f}KB"
+          f"{100 * (1 - model_total / raw_total):>7.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+"""Local stand-in for the Spotify Web API, mounted as a requests transport adapter.
+
+``SyntheticCatalog`` generates a reproducible catalog (artists, albums, tracks)
+and a user library of playlists. ``StandInAdapter`` answers the Web API
+endpoints this app uses from that catalog, so a real ``spotipy.Spotify`` client
+(URL building, paging via ``next``, JSON decoding) runs unchanged with no
+network. ``latency`` adds a fixed delay per request to imitate round trips.
+
+    sp = stand_in_client(SyntheticCatalog(seed=7).add_library(1000, 50))
+"""
+import json
+import random
+import re
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+import spotipy
+from requests.adapters import BaseAdapter
+
+API_PREFIX = "https://api.spotify.com/v1/"
+MARKETS = [f"{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(180)]
+_WORDS = (
+    "midnight summer golden electric velvet broken silver neon paper wild "
+    "ocean fire river city heart dream shadow light stone echo "
+    "dancing falling running burning waiting fading rising calling drifting shining"
+).split()
+_GENRES = ["pop", "rock", "indie", "hip hop", "jazz", "electronic", "folk", "soul", "metal", "country"]
+_BASE62 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+class SyntheticCatalog:
+    """A seeded catalog plus one user's playlist library.
+
+    Playlist contents are derived from the playlist index instead of stored,
+    so libraries of thousands of playlists with thousands of tracks each cost
+    almost no memory. Playlists created or edited through the API are stored.
+    """
+
+    def __init__(self, artists=200, albums_per_artist=8, tracks_per_album=12,
+                 discography_albums=None, markets=len(MARKETS), seed=7):
+        self.random = random.Random(seed)
+        self.markets = MARKETS[:markets]
+        self.user = {'id': "bench_user", 'display_name': "Bench User", 'type': 'user', 'country': self.markets[0]}
+        self.artists, self.albums, self.tracks = {}, {}, {}
+        self.artist_albums = {}
+        self.album_tracks = {}
+        for a in range(artists):
+            artist = self._make_artist()
+            album_count = discography_albums if (a == 0 and discography_albums) else albums_per_artist
+            self.artist_albums[artist['id']] = []
+            for _ in range(album_count):
+                album = self._make_album(artist, tracks_per_album)
+                self.artist_albums[artist['id']].append(album['id'])
+                self.album_tracks[album['id']] = [self._make_track(album)['id'] for _ in range(tracks_per_album)]
+        self.track_ids = list(self.tracks)
+        self.prolific_artist_id = next(iter(self.artists))
+        self._search_text = {
+            'track': [(t['id'], f"{t['name']} {t['artists'][0]['name']} {t['album']['name']}".lower())
+                      for t in self.tracks.values()],
+            'artist': [(a['id'], a['name'].lower()) for a in self.artists.values()],
+            'album': [(a['id'], f"{a['name']} {a['artists'][0]['name']}".lower()) for a in self.albums.values()],
+        }
+        self.playlists = {}
+        self.saved_tracks = set()
+        # market -> {unavailable track id: id of the equivalent release Spotify relinks to}
+        self.relinks = {}
+        self._lock = threading.Lock()
+
+    def _id(self):
+        return ''.join(self.random.choice(_BASE62) for _ in range(22))
+
+    def _name(self, words):
+        return ' '.join(self.random.choice(_WORDS).title() for _ in range(words))
+
+    def _images(self, key):
+        return [{'url': f"https://i.scdn.co/image/{key}-{size}", 'height': size, 'width': size}
+                for size in (640, 300, 64)]
+
+    def _make_artist(self):
+        artist_id = self._id()
+        artist = {
+            'id': artist_id, 'name': self._name(2), 'type': 'artist', 'uri': f"spotify:artist:{artist_id}",
+            'genres': self.random.sample(_GENRES, 2), 'popularity': self.random.randrange(100),
+            'images': self._images(artist_id), 'followers': {'href': None, 'total': self.random.randrange(10 ** 6)},
+        }
+        self.artists[artist_id] = artist
+        return artist
+
+    def _simple_artist(self, artist):
+        return {k: artist[k] for k in ('id', 'name', 'type', 'uri')}
+
+    def _make_album(self, artist, total_tracks):
+        album_id = self._id()
+        album = {
+            'id': album_id, 'name': self._name(2), 'album_type': 'album', 'type': 'album',
+            'uri': f"spotify:album:{album_id}", 'total_tracks': total_tracks,
+            'release_date': f"{self.random.randrange(1960, 2025)}-01-01", 'release_date_precision': 'day',
+            'images': self._images(album_id), 'artists': [self._simple_artist(artist)],
+            'available_markets': self.markets,
+        }
+        self.albums[album_id] = album
+        return album
+
+    def _make_track(self, album):
+        track_id = self._id()
+        track = {
+            'id': track_id, 'name': self._name(self.random.randrange(1, 4)), 'type': 'track',
+            'uri': f"spotify:track:{track_id}", 'duration_ms': self.random.randrange(120000, 360000),
+            'explicit': self.random.random() < 0.2, 'popularity': self.random.randrange(100),
+            'track_number': len(self.album_tracks.get(album['id'], [])) + 1, 'disc_number': 1,
+            'is_local': False, 'artists': album['artists'], 'available_markets': self.markets,
+            'album': {k: v for k, v in album.items() if k != 'available_markets'},
+        }
+        self.tracks[track_id] = track
+        return track
+
+    def restrict_tracks(self, market, fraction=0.05, relinked_fraction=0.5):
+        """Make a sample of tracks unavailable in ``market``; some of them get a relinkable equivalent."""
+        for track_id in self.random.sample(self.track_ids, int(len(self.track_ids) * fraction)):
+            track = self.tracks[track_id]
+            track['available_markets'] = [m for m in track['available_markets'] if m != market]
+            if self.random.random() < relinked_fraction:
+                equivalent = self._make_track(self.albums[track['album']['id']])
+                equivalent['name'] = track['name']
+                self.relinks.setdefault(market, {})[track_id] = equivalent['id']
+        return self
+
+    def track_in_market(self, track_id, market):
+        """A track as the API returns it with ``market`` set: relinked, or flagged if unavailable there."""
+        if market == 'from_token':
+            market = self.user['country']
+        track = self.tracks[track_id]
+        if market in track['available_markets']:
+            return dict(track, is_playable=True)
+        relinked = self.relinks.get(market, {}).get(track_id)
+        if relinked:
+            return dict(self.tracks[relinked], is_playable=True,
+                        linked_from={'id': track_id, 'type': 'track', 'uri': f"spotify:track:{track_id}"})
+        return dict(track, is_playable=False, restrictions={'reason': 'market'})
+
+    def add_library(self, playlists, tracks_per_playlist=50, owned_fraction=0.7):
+        """Add ``playlists`` playlists; ``tracks_per_playlist`` is a count or a ``(min, max)`` range."""
+        for i in range(len(self.playlists), len(self.playlists) + playlists):
+            if isinstance(tracks_per_playlist, tuple):
+                count = self.random.randint(*tracks_per_playlist)
+            else:
+                count = tracks_per_playlist
+            owned = self.random.random() < owned_fraction
+            owner = self.user if owned else {'id': f"curator{i % 50}", 'display_name': f"Curator {i % 50}"}
+            self.add_playlist(f"{self._name(2)} {i}", owner, count=count, seed=i)
+        return self
+
+    def add_playlist(self, name, owner=None, count=0, seed=0, track_ids=None, public=False):
+        """Add a playlist of ``count`` derived tracks, or of ``track_ids`` if given."""
+        playlist_id = self._id()
+        self.playlists[playlist_id] = {
+            'id': playlist_id, 'name': name, 'owner': owner or self.user, 'public': public, 'collaborative': False,
+            'images': self._images(playlist_id), 'snapshot': 1,
+            # Derived playlists pick tracks by a per-playlist stride through the catalog
+            'stride': (seed * 7919 + 1) % len(self.track_ids) or 1, 'start': seed * 104729,
+            'count': count, 'track_ids': track_ids,
+        }
+        return self.playlists[playlist_id]
+
+    def playlist_track_ids(self, playlist, offset=0, limit=None):
+        end = self.playlist_length(playlist)
+        if limit is not None:
+            end = min(offset + limit, end)
+        if playlist['track_ids'] is not None:
+            return playlist['track_ids'][offset:end]
+        n = len(self.track_ids)
+        return [self.track_ids[(playlist['start'] + j * playlist['stride']) % n] for j in range(offset, end)]
+
+    def playlist_length(self, playlist):
+        return len(playlist['track_ids']) if playlist['track_ids'] is not None else playlist['count']
+
+    def playlist_json(self, playlist):
+        length = self.playlist_length(playlist)
+        return {
+            'id': playlist['id'], 'name': playlist['name'], 'owner': playlist['owner'],
+            'public': playlist['public'], 'collaborative': playlist['collaborative'],
+            'images': playlist['images'], 'snapshot_id': f"{playlist['id']}-{playlist['snapshot']}",
+            'tracks': {'href': f"{API_PREFIX}playlists/{playlist['id']}/tracks", 'total': length},
+            'type': 'playlist', 'uri': f"spotify:playlist:{playlist['id']}",
+        }
+
+    def materialize(self, playlist):
+        """Store a derived playlist's tracks so it can be edited."""
+        if playlist['track_ids'] is None:
+            playlist['track_ids'] = self.playlist_track_ids(playlist)
+        playlist['snapshot'] += 1
+
+    def search(self, kind, query):
+        words = re.sub(r'\w+:|"', ' ', query.lower()).split()
+        return [item_id for item_id, text in self._search_text[kind] if all(word in text for word in words)]
+
+class StandInAdapter(BaseAdapter):
+    """requests transport adapter that serves Web API calls from a SyntheticCatalog."""
+
+    def __init__(self, catalog, latency=0.0):
+        super().__init__()
+        self.catalog = catalog
+        self.latency = latency
+        self.requests = 0
+        self._counter_lock = threading.Lock()
+        self.routes = [
+            ('GET', r'me', self.me),
+            ('GET', r'me/playlists', self.my_playlists),
+            ('GET', r'me/(?:tracks|library)/contains', self.saved_contains),
+            ('PUT', r'me/(?:tracks|library)', self.save_tracks),
+            ('GET', r'playlists/(\w+)', self.get_playlist),
+            ('GET', r'playlists/(\w+)/(?:tracks|items)', self.playlist_tracks),
+            ('POST', r'playlists/(\w+)/(?:tracks|items)', self.add_tracks),
+            ('PUT', r'playlists/(\w+)/(?:tracks|items)', self.replace_tracks),
+            ('DELETE', r'playlists/(\w+)/(?:tracks|items)', self.remove_tracks),
+            ('DELETE', r'playlists/(\w+)/followers', self.unfollow),
+            ('POST', r'users/(\w+)/playlists', self.create_playlist),
+            ('GET', r'search', self.search),
+            ('GET', r'tracks/(\w+)', self.track),
+            ('GET', r'tracks', self.several_tracks),
+            ('GET', r'artists', self.several_artists),
+            ('GET', r'artists/(\w+)', self.artist),
+            ('GET', r'artists/(\w+)/albums', self.artist_albums),
+            ('GET', r'albums/(\w+)/tracks', self.album_tracks),
+        ]
+
+    def send(self, request, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._counter_lock:
+            self.requests += 1
+        url = urlsplit(request.url)
+        path = url.path.split('/v1/', 1)[-1].strip('/')
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        body = json.loads(request.body) if request.body else {}
+        for method, pattern, handler in self.routes:
+            match = re.fullmatch(pattern, path)
+            if method == request.method and match:
+                try:
+                    with self.catalog._lock:
+                        status, payload = handler(params, body, *match.groups())
+                except KeyError:
+                    status, payload = 404, {'error': {'status': 404, 'message': "Non existing id"}}
+                except ValueError as e:
+                    status, payload = 400, {'error': {'status': 400, 'message': str(e)}}
+                break
+        else:
+            status, payload = 404, {'error': {'status': 404, 'message': f"Unknown endpoint {request.method} {path}"}}
+        return self._response(request, status, payload)
+
+    def _response(self, request, status, payload):
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(payload).encode('utf-8')
+        response.headers['Content-Type'] = 'application/json'
+        response.headers['Content-Length'] = str(len(response._content))
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.reason = "OK" if status < 400 else "Error"
+        return response
+
+    def close(self):
+        pass
+
+    def _page(self, path, items, params, default_limit=20, extra=None):
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', default_limit))
+        page_items = items(offset, limit) if callable(items) else items[offset:offset + limit]
+        total = items.total if callable(items) else len(items)
+        query = ''.join(f"&{k}={v}" for k, v in (extra or {}).items())
+        return {
+            'href': f"{API_PREFIX}{path}?offset={offset}&limit={limit}{query}",
+            'items': page_items, 'limit': limit, 'offset': offset, 'total': total,
+            'next': f"{API_PREFIX}{path}?offset={offset + limit}&limit={limit}{query}" if offset + limit < total else None,
+            'previous': None,
+        }
+
+    def me(self, params, body):
+        return 200, self.catalog.user
+
+    def my_playlists(self, params, body):
+        playlists = list(self.catalog.playlists.values())
+
+        def items(offset, limit):
+            return [self.catalog.playlist_json(p) for p in playlists[offset:offset + limit]]
+        items.total = len(playlists)
+        return 200, self._page("me/playlists", items, params)
+
+    def get_playlist(self, params, body, playlist_id):
+        return 200, self.catalog.playlist_json(self.catalog.playlists[playlist_id])
+
+    def playlist_track_items(self, playlist, offset, limit, params):
+        market = params.get('market')
+        return [{'added_at': "2024-01-01T00:00:00Z", 'is_local': False,
+                 'track': self.catalog.track_in_market(track_id, market) if market else self.catalog.tracks[track_id]}
+                for track_id in self.catalog.playlist_track_ids(playlist, offset, limit)]
+
+    def playlist_tracks(self, params, body, playlist_id):
+        playlist = self.catalog.playlists[playlist_id]
+
+        def items(offset, limit):
+            return self.playlist_track_items(playlist, offset, limit, params)
+        items.total = self.catalog.playlist_length(playlist)
+        extra = {'market': params['market']} if 'market' in params else None
+        return 200, self._page(f"playlists/{playlist_id}/tracks", items, params, default_limit=100, extra=extra)
+
+    def _uris_to_ids(self, body):
+        # spotipy posts a bare list of URIs when adding and {"uris": [...]} when replacing
+        uris = body if isinstance(body, list) else body.get('uris', [])
+        if len(uris) > 100:
+            raise ValueError("Too many ids")
+        return [uri.rsplit(':', 1)[-1] for uri in uris]
+
+    def add_tracks(self, params, body, playlist_id):
+        playlist = self.catalog.playlists[playlist_id]
+        self.catalog.materialize(playlist)
+        ids = self._uris_to_ids(body)
+        if 'position' in params:
+            position = int(params['position'])
+            playlist['track_ids'][position:position] = ids
+        else:
+            playlist['track_ids'].extend(ids)
+        return 201, {'snapshot_id': self.catalog.playlist_json(playlist)['snapshot_id']}
+
+    def replace_tracks(self, params, body, playlist_id):
+        playlist = self.catalog.playlists[playlist_id]
+        self.catalog.materialize(playlist)
+        playlist['track_ids'] = self._uris_to_ids(body)
+        return 200, {'snapshot_id': self.catalog.playlist_json(playlist)['snapshot_id']}
+
+    def remove_tracks(self, params, body, playlist_id):
+        playlist = self.catalog.playlists[playlist_id]
+        self.catalog.materialize(playlist)
+        for item in body.get('tracks', []):
+            track_id = item['uri'].rsplit(':', 1)[-1]
+            positions = set(item.get('positions') or [])
+            playlist['track_ids'] = [
+                t for i, t in enumerate(playlist['track_ids'])
+                if not (t == track_id and (not positions or i in positions))
+            ]
+        return 200, {'snapshot_id': self.catalog.playlist_json(playlist)['snapshot_id']}
+
+    def unfollow(self, params, body, playlist_id):
+        del self.catalog.playlists[playlist_id]
+        return 200, {}
+
+    def create_playlist(self, params, body, user_id):
+        playlist = self.catalog.add_playlist(body['name'], self.catalog.user, track_ids=[],
+                                              public=body.get('public', False))
+        return 201, self.catalog.playlist_json(playlist)
+
+    def search(self, params, body):
+        kind = params.get('type', 'track').split(',')[0]
+        ids = self.catalog.search(kind, params.get('q', ''))
+        source = {'track': self.catalog.tracks, 'artist': self.catalog.artists, 'album': self.catalog.albums}[kind]
+        return 200, {f"{kind}s": self._page("search", [source[i] for i in ids], params, default_limit=10,
+                                            extra={'q': params.get('q', ''), 'type': kind})}
+
+    def track(self, params, body, track_id):
+        return 200, self.catalog.tracks[track_id]
+
+    def several_tracks(self, params, body):
+        return 200, {'tracks': [self.catalog.tracks.get(i) for i in params.get('ids', '').split(',')]}
+
+    def artist(self, params, body, artist_id):
+        return 200, self.catalog.artists[artist_id]
+
+    def several_artists(self, params, body):
+        return 200, {'artists': [self.catalog.artists.get(i) for i in params.get('ids', '').split(',')]}
+
+    def artist_albums(self, params, body, artist_id):
+        albums = [self.catalog.albums[a] for a in self.catalog.artist_albums[artist_id]]
+        return 200, self._page(f"artists/{artist_id}/albums", albums, params)
+
+    def album_tracks(self, params, body, album_id):
+        tracks = []
+        for track_id in self.catalog.album_tracks[album_id]:
+            track = dict(self.catalog.tracks[track_id])
+            del track['album']
+            tracks.append(track)
+        return 200, self._page(f"albums/{album_id}/tracks", tracks, params)
+
+    def _library_ids(self, params, body):
+        """Track ids from ``ids`` (me/tracks) or ``uris`` (me/library), at most 50 per request."""
+        raw = params.get('ids') or params.get('uris') or ','.join(body.get('ids', []) if isinstance(body, dict) else [])
+        ids = [value.rsplit(':', 1)[-1] for value in raw.split(',') if value]
+        if len(ids) > 50:
+            raise ValueError("Too many ids")
+        return ids
+
+    def saved_contains(self, params, body):
+        return 200, [i in self.catalog.saved_tracks for i in self._library_ids(params, body)]
+
+    def save_tracks(self, params, body):
+        self.catalog.saved_tracks.update(self._library_ids(params, body))
+        return 200, {}
+
+def stand_in_session(catalog, latency=0.0):
+    """A requests session whose Spotify API traffic is served by ``catalog``."""
+    session = requests.Session()
+    adapter = StandInAdapter(catalog, latency)
+    session.mount(API_PREFIX, adapter)
+    return session
+
+def stand_in_client(catalog, latency=0.0, client_class=spotipy.Spotify, **kwargs):
+    """A real Spotify client talking to the stand-in; ``client_class`` may be e.g. LimitedSpotify."""
+    return client_class(auth="stand-in-token", requests_session=stand_in_session(catalog, latency), **kwargs)
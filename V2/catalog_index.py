@@ -0,0 +1,167 @@
+import re
+import sys
+import threading
+import unicodedata
+from collections import Counter, OrderedDict, defaultdict
+
+NGRAM_SIZE = 3
+# Measured average cost of one key in an n-gram or prefix set, including the set's growth
+POSTING_BYTES = 60
+
+def normalize_text(text):
+    """Lowercase, strip accents and punctuation so lookups ignore formatting."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(re.sub(r'[^\w\s]', ' ', text.lower()).split())
+
+def text_ngrams(text, n=NGRAM_SIZE):
+    """Character n-grams of a normalized string, padded so short words still index."""
+    grams = set()
+    for word in text.split():
+        padded = f" {word} "
+        if len(padded) <= n:
+            grams.add(padded)
+            continue
+        for i in range(len(padded) - n + 1):
+            grams.add(padded[i:i + n])
+    return grams
+
+class CatalogIndex:
+    """Incremental n-gram and prefix index over catalog entities the app has already seen.
+
+    Entities are kept as small summary dicts keyed by (kind, id), where kind is
+    one of 'artist', 'album' or 'track'. Adding an entity that is already indexed
+    is a no-op, so callers can feed every API response through it. Beyond
+    ``max_entities`` or the estimated ``max_bytes``, the least recently added
+    entities are evicted.
+    """
+
+    def __init__(self, max_entities=200000, max_bytes=None):
+        self.max_entities = max_entities
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._evicted_since_compact = 0
+        self._entities = OrderedDict()
+        self._sizes = {}
+        self._ngrams = defaultdict(set)
+        self._prefixes = defaultdict(set)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entities)
+
+    @staticmethod
+    def _postings(entity):
+        """The n-grams and prefixes an entity is listed under."""
+        normalized = normalize_text(f"{entity['name']} {entity['subtitle']}")
+        # Prefixes up to the n-gram size cover queries too short for n-grams
+        prefixes = {word[:i] for word in normalized.split() for i in range(1, min(len(word), NGRAM_SIZE) + 1)}
+        return text_ngrams(normalized), prefixes
+
+    def _evict(self):
+        while self._entities and (len(self._entities) > self.max_entities
+                                  or (self.max_bytes and self.bytes > self.max_bytes)):
+            key, entity = self._entities.popitem(last=False)
+            self.bytes -= self._sizes.pop(key)
+            self.evictions += 1
+            self._evicted_since_compact += 1
+            grams, prefixes = self._postings(entity)
+            for postings, tokens in ((self._ngrams, grams), (self._prefixes, prefixes)):
+                for token in tokens:
+                    keys = postings.get(token)
+                    if keys is not None:
+                        keys.discard(key)
+                        if not keys:
+                            del postings[token]
+        if self._evicted_since_compact > len(self._entities):
+            self._compact()
+
+    def _compact(self):
+        """Copy the containers, since dicts and sets keep their capacity after removals."""
+        self._entities = OrderedDict(self._entities)
+        self._sizes = dict(self._sizes)
+        self._ngrams = defaultdict(set, {gram: set(keys) for gram, keys in self._ngrams.items()})
+        self._prefixes = defaultdict(set, {prefix: set(keys) for prefix, keys in self._prefixes.items()})
+        self._evicted_since_compact = 0
+
+    def add(self, kind, entity_id, name, subtitle='', image=None, popularity=0):
+        """Index a single entity. Returns True if it was new."""
+        if not entity_id or not name:
+            return False
+        key = (kind, entity_id)
+        with self._lock:
+            if key in self._entities:
+                return False
+            entity = {
+                'kind': kind,
+                'id': entity_id,
+                'name': name,
+                'subtitle': subtitle,
+                'image': image,
+                'popularity': popularity or 0,
+                'normalized_name': normalize_text(name),
+            }
+            grams, prefixes = self._postings(entity)
+            for gram in grams:
+                self._ngrams[gram].add(key)
+            for prefix in prefixes:
+                self._prefixes[prefix].add(key)
+            self._entities[key] = entity
+            # Flat estimate; deep_size would cost more than the indexing itself
+            self._sizes[key] = (sys.getsizeof(key) + sys.getsizeof(entity) + sum(map(sys.getsizeof, entity.values()))
+                                + POSTING_BYTES * (len(grams) + len(prefixes)))
+            self.bytes += self._sizes[key]
+            self._evict()
+            return True
+
+    def add_artist(self, artist):
+        return self.add('artist', artist.id, artist.name, image=artist.image_url,
+                        popularity=artist.popularity)
+
+    def add_album(self, album):
+        return self.add('album', album.id, album.name, album.artist_names, image=album.image_url)
+
+    def add_track(self, track):
+        for artist_id, artist_name in zip(track.artist_ids, track.artists):
+            self.add('artist', artist_id, artist_name)
+        return self.add('track', track.id, track.name, track.artist_names,
+                        popularity=track.popularity)
+
+    def add_many(self, kind, items):
+        adder = {'artist': self.add_artist, 'album': self.add_album, 'track': self.add_track}[kind]
+        added = 0
+        for item in items:
+            if item and adder(item):
+                added += 1
+        return added
+
+    def search(self, query, kind=None, limit=10, min_score=0.35):
+        """Return the best local matches for a query, most relevant first."""
+        normalized = normalize_text(query)
+        if not normalized:
+            return []
+        with self._lock:
+            grams = text_ngrams(normalized)
+            scores = Counter()
+            for gram in grams:
+                for key in self._ngrams.get(gram, ()):
+                    scores[key] += 1
+            if not scores:
+                for key in self._prefixes.get(normalized.split()[-1][:NGRAM_SIZE], ()):
+                    scores[key] += 1
+            results = []
+            for key, hits in scores.items():
+                if kind and key[0] != kind:
+                    continue
+                entity = self._entities[key]
+                score = hits / len(grams) if grams else 0
+                if score < min_score:
+                    continue
+                if entity['normalized_name'].startswith(normalized):
+                    score += 1
+                elif normalized in entity['normalized_name']:
+                    score += 0.5
+                results.append((score, entity['popularity'], entity))
+        results.sort(key=lambda r: (r[0], r[1]), reverse=True)
+        return [entity for _, _, entity in results[:limit]]
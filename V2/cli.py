@@ -0,0 +1,252 @@
+"""Command line front end for bulk playlist jobs, built on the headless core.
+
+Uses the same ``.env`` settings and ``.spotifycache`` token as the local app.
+Run from the V2 directory:
+
+    python cli.py create --from list.txt --name "Road Trip"
+    python cli.py export --all --format parquet --output library.zip
+    python cli.py save --playlist 37i9dQZF1DXcBWIGoYBM5M
+    python cli.py scan --market DE --fix
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from clients import local_client
+from core import (
+    SCOPE, create_playlist, export_playlist, export_playlists, get_user_playlists, import_playlist,
+    playlist_analytics, read_track_records, resolve_tracks, save_playlists_to_library,
+    save_tracks_to_library, sync_playlist
+)
+from exporter import EXPORT_FORMATS, safe_export_name
+from playability import DEFAULT_MARKET, fix_playlists, load_scan_cache, save_scan_cache, scan_cache_path, scan_playlists
+from query_builder import staged_track_search
+
+TOKEN_CACHE_PATH = ".spotifycache"
+PLAYABILITY_DIR = ".playability"
+
+def get_client(args):
+    load_dotenv()
+    return local_client(SCOPE, cache_path=TOKEN_CACHE_PATH, per_user_limit=args.workers)
+
+def progress(label):
+    """Progress callback that redraws a single status line on stderr."""
+    def report(done, total):
+        sys.stderr.write(f"\r{label}: {done}/{total}")
+        if done >= total:
+            sys.stderr.write("\n")
+        sys.stderr.flush()
+    return report
+
+def read_lines(path):
+    if path == '-':
+        return sys.stdin.read().splitlines()
+    with open(path, encoding='utf-8') as f:
+        return f.read().splitlines()
+
+def resolve_from_file(sp, args):
+    """Resolve the --from list, report misses and failed lookups on stderr.
+
+    Returns the found track ids, the number of misses and the number of failed lookups.
+    """
+    resolved = resolve_tracks(sp, read_lines(args.source), max_workers=args.workers,
+                              on_progress=progress("Resolving"))
+    missing = failed = 0
+    for line, track, error in resolved:
+        if error:
+            failed += 1
+            sys.stderr.write(f"Lookup failed: {line}: {error}\n")
+        elif track is None:
+            missing += 1
+            sys.stderr.write(f"No match: {line}\n")
+    return [track.id for _, track, _ in resolved if track is not None], missing, failed
+
+def cmd_search(sp, args):
+    tracks, _, _ = staged_track_search(sp, args.query, limit=args.limit)
+    for track in tracks[:args.limit]:
+        print(f"{track.id}\t{track.name}\t{track.artist_names}")
+
+def cmd_resolve(sp, args):
+    failed = 0
+    for line, track, error in resolve_tracks(sp, read_lines(args.source), max_workers=args.workers,
+                                             on_progress=progress("Resolving")):
+        if error:
+            failed += 1
+            sys.stderr.write(f"Lookup failed: {line}: {error}\n")
+        print(f"{track.id if track else ''}\t{line}")
+    return 1 if failed else 0
+
+def cmd_create(sp, args):
+    track_ids, missing, failed = resolve_from_file(sp, args)
+    if not track_ids:
+        sys.stderr.write("No tracks could be added to the playlist.\n")
+        return 1
+    name = args.name or f"My Mix - {datetime.now().strftime('%B %d, %Y')}"
+    playlist_id = create_playlist(sp, name, track_ids, public=args.public, on_progress=progress("Adding"))
+    print(f"Created playlist '{name}' ({playlist_id}) with {len(track_ids)} tracks, {missing} unmatched, "
+          f"{failed} failed")
+    return 1 if failed else 0
+
+def cmd_sync(sp, args):
+    track_ids, missing, failed = resolve_from_file(sp, args)
+    # Syncing replaces the playlist, so a partial resolution would silently drop tracks
+    if failed:
+        sys.stderr.write(f"{failed} lookups failed; the playlist was not changed.\n")
+        return 1
+    if not track_ids and not args.allow_empty:
+        sys.stderr.write("No tracks matched; pass --allow-empty to clear the playlist.\n")
+        return 1
+    sync_playlist(sp, args.playlist_id, track_ids, on_progress=progress("Syncing"))
+    print(f"Synced {args.playlist_id} to {len(track_ids)} tracks, {missing} unmatched")
+
+def cmd_export(sp, args):
+    if args.all:
+        playlists = get_user_playlists(sp)
+    else:
+        wanted = set(args.playlist_ids)
+        playlists = [p for p in get_user_playlists(sp) if p.id in wanted]
+    if not playlists:
+        sys.stderr.write("No playlists to export.\n")
+        return 1
+    if len(playlists) == 1 and not args.all:
+        output = args.output or safe_export_name(playlists[0].name, args.format)
+        with open(output, 'wb') as f:
+            count = export_playlist(sp, playlists[0].id, f, args.format)
+        print(f"Exported '{playlists[0].name}' ({count} tracks) to {output}")
+        return 0
+    output = args.output or f"playlists-{datetime.now().strftime('%Y%m%d')}.zip"
+    with open(output, 'wb') as f:
+        results = export_playlists(sp, playlists, f, args.format, max_workers=args.workers,
+                                   on_progress=progress("Exporting"))
+    errors = [message for status, message in results if status == "error"]
+    for message in errors:
+        sys.stderr.write(f"{message}\n")
+    print(f"Exported {len(results) - len(errors)} playlists to {output}")
+    return 1 if errors else 0
+
+def cmd_import(sp, args):
+    with open(args.file, 'rb') as f:
+        records = read_track_records(f, args.file)
+    name = args.name or f"Imported Playlist - {datetime.now().strftime('%B %d, %Y')}"
+    playlist_id, count = import_playlist(sp, records, name, on_progress=progress("Adding"))
+    print(f"Successfully imported {count} tracks to playlist '{name}' ({playlist_id})")
+
+def cmd_save(sp, args):
+    if args.source:
+        track_ids, missing = resolve_from_file(sp, args)
+        saved, already_saved = save_tracks_to_library(sp, track_ids, max_workers=args.workers,
+                                                      on_progress=progress("Saving"))
+        print(f"Saved {saved} tracks to Liked Songs, {already_saved} already saved, {missing} unmatched")
+    else:
+        saved, already_saved = save_playlists_to_library(sp, args.playlist_ids, max_workers=args.workers,
+                                                         on_progress=progress("Saving"))
+        print(f"Saved {saved} tracks to Liked Songs, {already_saved} already saved")
+
+def cmd_scan(sp, args):
+    user_id = sp.current_user()["id"]
+    owned = [p for p in get_user_playlists(sp) if p.owner_id == user_id]
+    path = scan_cache_path(PLAYABILITY_DIR, user_id)
+    cache = load_scan_cache(path)
+    try:
+        scanned = scan_playlists(sp, owned, cache, args.market, max_workers=args.workers,
+                                 on_progress=progress("Scanning"))
+    finally:
+        save_scan_cache(cache, path)
+    failed = [entry for entry in cache.values() if entry.get('error')]
+    for entry in failed:
+        sys.stderr.write(f"Couldn't scan '{entry['name']}': {entry['error']}\n")
+    flagged = [playlist_id for playlist_id, entry in cache.items() if entry['issues']]
+    for playlist_id in flagged:
+        statuses = [issue['status'] for issue in cache[playlist_id]['issues']]
+        blocked = cache[playlist_id].get('blocked')
+        print(f"{playlist_id}\t{statuses.count('relinked')} relinked\t"
+              f"{statuses.count('unplayable')} unplayable\t{cache[playlist_id]['name']}"
+              + (f"\t(can't fix: {blocked})" if blocked else ""))
+    print(f"Scanned {scanned} new or changed playlists; {len(flagged)} of {len(owned)} have unavailable tracks")
+    if not (args.fix and flagged):
+        return 1 if failed else 0
+    results = fix_playlists(sp, flagged, cache, not args.keep_relinked, not args.keep_unplayable,
+                            on_progress=progress("Fixing"))
+    save_scan_cache(cache, path)
+    errors = [message for status, message in results if status == "error"]
+    for message in errors:
+        sys.stderr.write(f"{message}\n")
+    print(f"Fixed {len(results) - len(errors)} playlists")
+    return 1 if errors or failed else 0
+
+def cmd_analytics(sp, args):
+    print(json.dumps(playlist_analytics(sp, args.playlist_id), indent=2, ensure_ascii=False))
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="spm", description="Spotify playlist manager batch jobs")
+    parser.add_argument('--workers', type=int, default=4, help="concurrent requests (default 4)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    search = commands.add_parser('search', help="search for a track")
+    search.add_argument('query')
+    search.add_argument('--limit', type=int, default=10)
+    search.set_defaults(handler=cmd_search)
+
+    resolve = commands.add_parser('resolve', help="resolve a list of songs to track ids")
+    resolve.add_argument('--from', dest='source', required=True, help="file with one song per line, or -")
+    resolve.set_defaults(handler=cmd_resolve)
+
+    create = commands.add_parser('create', help="create a playlist from a list of songs")
+    create.add_argument('--from', dest='source', required=True, help="file with one song per line, or -")
+    create.add_argument('--name')
+    create.add_argument('--public', action='store_true')
+    create.set_defaults(handler=cmd_create)
+
+    sync = commands.add_parser('sync', help="replace a playlist's tracks with a list of songs")
+    sync.add_argument('playlist_id')
+    sync.add_argument('--from', dest='source', required=True, help="file with one song per line, or -")
+    sync.add_argument('--allow-empty', action='store_true', help="clear the playlist if nothing matches")
+    sync.set_defaults(handler=cmd_sync)
+
+    export = commands.add_parser('export', help="export playlists to a file or zip archive")
+    target = export.add_mutually_exclusive_group(required=True)
+    target.add_argument('--all', action='store_true', help="every playlist in the library")
+    target.add_argument('--playlist', dest='playlist_ids', action='append', metavar='ID')
+    export.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv')
+    export.add_argument('--output')
+    export.set_defaults(handler=cmd_export)
+
+    import_ = commands.add_parser('import', help="create a playlist from an exported file")
+    import_.add_argument('file')
+    import_.add_argument('--name')
+    import_.set_defaults(handler=cmd_import)
+
+    save = commands.add_parser('save', help="save tracks to Liked Songs, skipping those already saved")
+    source = save.add_mutually_exclusive_group(required=True)
+    source.add_argument('--playlist', dest='playlist_ids', action='append', metavar='ID',
+                        help="every track of this playlist")
+    source.add_argument('--from', dest='source', help="file with one song per line, or -")
+    save.set_defaults(handler=cmd_save)
+
+    scan = commands.add_parser('scan', help="find relinked or unplayable tracks in your own playlists")
+    scan.add_argument('--market', default=DEFAULT_MARKET, help="country code (default: your account's country)")
+    scan.add_argument('--fix', action='store_true', help="rewrite the flagged playlists")
+    scan.add_argument('--keep-relinked', action='store_true', help="with --fix, keep the original track ids")
+    scan.add_argument('--keep-unplayable', action='store_true', help="with --fix, keep unplayable tracks")
+    scan.set_defaults(handler=cmd_scan)
+
+    analytics = commands.add_parser('analytics', help="print playlist analytics as JSON")
+    analytics.add_argument('playlist_id')
+    analytics.set_defaults(handler=cmd_analytics)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(get_client(args), args) or 0
+    except KeyboardInterrupt:
+        return 130
+    except Exception as e:
+        sys.stderr.write(f"Error: {str(e)}\n")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+
+import requests
+import spotipy
+from requests.adapters import HTTPAdapter
+from spotipy.exceptions import SpotifyException
+from urllib3.util.retry import Retry
+
+from metrics import capture_response, endpoint_name, take_response_info
+from tokens import ManagedSpotifyOAuth, TokenCache
+
+def build_http_session(pool_size=32, retries=3):
+    """One keep-alive connection pool shared by every client in the process.
+
+    spotipy only configures retries on sessions it builds itself, so the same
+    policy is applied here: back off on 429 and 5xx, honouring Retry-After.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=retries, connect=None, read=False, status=retries, backoff_factor=0.3,
+        allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE']),
+        status_forcelist=(429, 500, 502, 503, 504), respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.hooks['response'].append(capture_response)
+    return session
+
+class LimitedSpotify(spotipy.Spotify):
+    """Spotify client that caps how many requests one user can have in flight.
+
+    With ``metrics`` set, every call is also recorded there and in
+    ``recent_calls``, a short per-client log the developer panel reads.
+    """
+
+    def __init__(self, *args, limiter=None, metrics=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._limiter = limiter
+        self._metrics = metrics
+        self.call_count = 0
+        self.recent_calls = deque(maxlen=200)
+
+    def _internal_call(self, method, url, payload, params):
+        if self._limiter is None:
+            return self._measured_call(method, url, payload, params)
+        with self._limiter:
+            return self._measured_call(method, url, payload, params)
+
+    def _measured_call(self, method, url, payload, params):
+        if self._metrics is None:
+            return super()._internal_call(method, url, payload, params)
+        start = time.perf_counter()
+        status = 200
+        try:
+            return super()._internal_call(method, url, payload, params)
+        except SpotifyException as e:
+            status = e.http_status
+            raise
+        except Exception:
+            # No HTTP response at all, e.g. a connection error
+            status = 0
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            size, retries = take_response_info()
+            endpoint = endpoint_name(method, url)
+            self._metrics.record(endpoint, status, seconds, size, retries)
+            self.call_count += 1
+            self.recent_calls.append({
+                'seq': self.call_count, 'endpoint': endpoint, 'status': status,
+                'ms': round(seconds * 1000, 1), 'bytes': size, 'retries': retries,
+            })
+
+class SpotifyClientPool:
+    """Hands out one Spotify client per browser session over a shared HTTP pool.
+
+    Each session key gets its own auth manager and in-memory token, so sessions never
+    see each other's account, and its own semaphore limiting concurrent requests.
+    All clients share one ``requests.Session`` so TLS connections are reused
+    across users instead of every session opening its own. Streamlit doesn't
+    say when a browser session ends, so sessions that haven't asked for their
+    client in ``idle_timeout`` seconds are closed and dropped.
+
+    Every login link carries a fresh OAuth ``state``. The redirect back lands
+    in a new browser session, so issued states are kept here rather than in
+    session state; a callback is only accepted with a state issued in the last
+    ``login_timeout`` seconds, and each state works once.
+    """
+
+    def __init__(self, client_id, client_secret, redirect_uri, scope,
+                 pool_size=32, per_user_limit=4, max_sessions=1000, idle_timeout=3600, login_timeout=600,
+                 metrics=None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.redirect_uri = redirect_uri
+        self.scope = scope
+        self.per_user_limit = per_user_limit
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.login_timeout = login_timeout
+        self.metrics = metrics
+        self.http = build_http_session(pool_size)
+        self._sessions = OrderedDict()
+        self._logins = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire_idle(self, now):
+        """Close sessions idle for longer than ``idle_timeout``; the oldest come first."""
+        while self._sessions:
+            session_key, entry = next(iter(self._sessions.items()))
+            if now - entry['last_used'] <= self.idle_timeout:
+                break
+            del self._sessions[session_key]
+            entry['auth_manager'].close()
+
+    def _entry(self, session_key, cache_path=None):
+        now = time.monotonic()
+        with self._lock:
+            self._expire_idle(now)
+            entry = self._sessions.get(session_key)
+            if entry is None:
+                auth_manager = ManagedSpotifyOAuth(
+                    client_id=self.client_id,
+                    client_secret=self.client_secret,
+                    redirect_uri=self.redirect_uri,
+                    scope=self.scope,
+                    cache_handler=TokenCache(cache_path),
+                    open_browser=cache_path is not None,
+                    requests_session=self.http
+                )
+                entry = {
+                    'auth_manager': auth_manager,
+                    'limiter': threading.BoundedSemaphore(self.per_user_limit),
+                    'client': None,
+                    'last_used': now,
+                }
+                self._sessions[session_key] = entry
+                # Drop the least recently used sessions; their tokens live only in memory
+                while len(self._sessions) > self.max_sessions:
+                    _, evicted = self._sessions.popitem(last=False)
+                    evicted['auth_manager'].close()
+            else:
+                entry['last_used'] = now
+                self._sessions.move_to_end(session_key)
+            return entry
+
+    def auth_manager(self, session_key, cache_path=None):
+        return self._entry(session_key, cache_path)['auth_manager']
+
+    def is_authorized(self, session_key):
+        auth_manager = self.auth_manager(session_key)
+        return auth_manager.validate_token(auth_manager.cache_handler.get_cached_token()) is not None
+
+    def authorize(self, session_key, code):
+        """Exchange an OAuth redirect code for a token stored under ``session_key``."""
+        self.auth_manager(session_key).get_access_token(code, as_dict=False, check_cache=False)
+
+    def _expire_logins(self, now):
+        while self._logins:
+            state, (_, started) = next(iter(self._logins.items()))
+            if now - started <= self.login_timeout and len(self._logins) <= self.max_sessions:
+                break
+            del self._logins[state]
+
+    def login_url(self, session_key):
+        """Authorize URL for ``session_key`` with a new single-use ``state``."""
+        state = secrets.token_urlsafe(16)
+        now = time.monotonic()
+        with self._lock:
+            self._logins[state] = (session_key, now)
+            self._expire_logins(now)
+        return self.auth_manager(session_key).get_authorize_url(state=state)
+
+    def complete_login(self, code, state):
+        """Exchange the redirect ``code`` if ``state`` came from ``login_url``.
+
+        Returns the session key the login was started for, or None when the
+        state is missing, unknown, already used or expired.
+        """
+        with self._lock:
+            self._expire_logins(time.monotonic())
+            login = self._logins.pop(state, None) if state else None
+        if login is None:
+            return None
+        session_key, _ = login
+        self.authorize(session_key, code)
+        return session_key
+
+    def client(self, session_key, cache_path=None):
+        """Return the session's client, creating it on first use.
+
+        ``cache_path`` keeps the token in a file instead of memory, which is what
+        the single-user local setup uses.
+        """
+        entry = self._entry(session_key, cache_path)
+        with self._lock:
+            if entry['client'] is None:
+                entry['client'] = LimitedSpotify(
+                    auth_manager=entry['auth_manager'],
+                    requests_session=self.http,
+                    limiter=entry['limiter'],
+                    metrics=self.metrics
+                )
+            return entry['client']
+
+    def forget(self, session_key):
+        """Drop a session's client and token and stop its background refresh."""
+        with self._lock:
+            entry = self._sessions.pop(session_key, None)
+        if entry is not None:
+            entry['auth_manager'].close()
+
+def local_client(scope, cache_path=".spotifycache", per_user_limit=4, metrics=None):
+    """Single-account client configured from the environment, as the CLI and API use it.
+
+    Shares the local app's token cache, so signing in once through the app or
+    the browser prompt is enough for every front end.
+    """
+    pool = SpotifyClientPool(
+        os.getenv('CLIENT_ID'), os.getenv('CLIENT_SECRET'),
+        os.getenv('REDIRECT_URI', "http://127.0.0.1:8888/callback"), scope,
+        per_user_limit=per_user_limit, metrics=metrics
+    )
+    return pool.client("local", cache_path=cache_path)
@@ -0,0 +1,365 @@
+"""Playlist operations with no Streamlit dependency.
+
+Everything here takes a Spotify client and reports progress through an
+optional ``on_progress(done, total)`` callback, so the same code drives the
+Streamlit app, the ``spm`` command line tool and scheduled jobs.
+"""
+import csv
+import difflib
+import io
+import json
+import os
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from exporter import export_playlists_to_zip, stream_playlist_export
+from models import Album, Artist, Playlist, Track
+from query_builder import parse_search_input, score_track_match, staged_track_search
+
+SCOPE = (
+    "playlist-modify-private "
+    "playlist-modify-public "
+    "playlist-read-private "
+    "user-library-modify "
+    "user-read-private "
+    "user-read-email "
+    "user-read-playback-state "
+    "user-modify-playback-state "
+    "user-read-currently-playing "
+    "streaming"
+)
+# Spotify accepts at most 100 items per add/replace request
+PLAYLIST_BATCH_SIZE = 100
+# ...and at most 50 ids per saved-tracks check or save
+LIBRARY_BATCH_SIZE = 50
+RESOLVE_MIN_SCORE = 0.6
+# CSV cells are strings; these export columns are converted back to int on import
+NUMERIC_FIELDS = ('duration_ms', 'popularity')
+
+_TRACK_REFERENCE = re.compile(r'(?:spotify:track:|open\.spotify\.com/track/)([A-Za-z0-9]{22})')
+
+def _report(on_progress, done, total):
+    if on_progress:
+        on_progress(done, total)
+
+def _phase_progress(on_progress, start, span, total):
+    """Report a phase's own progress as the ``start .. start + span`` share of an overall ``total``."""
+    if not on_progress:
+        return None
+    return lambda done, phase_total: on_progress(start + (span * done // phase_total if phase_total else 0), total)
+
+def clean_song_name(song_name):
+    """Clean song name with a single regex operation."""
+    # Combined regex to remove both "By/by <artist>" and "Album-<name>" in one pass
+    cleaned = re.sub(r'\s*(?:(?:By|by)\s*.*|Album-.*)', '', song_name)
+    return ' '.join(cleaned.split()).lower()
+
+def find_best_match(original_song_name, search_results, similarity_threshold=0.6):
+    cleaned_song_name = clean_song_name(original_song_name)
+    best_match = None
+    best_similarity = 0
+    for track in search_results:
+        track_name = track.name.lower()
+        similarity = difflib.SequenceMatcher(None, cleaned_song_name, track_name).ratio()
+        if similarity > best_similarity:
+            best_similarity = similarity
+            best_match = track
+    if best_match and best_similarity >= similarity_threshold:
+        return best_match
+    return None
+
+def get_user_playlists(sp):
+    """Every playlist in the user's library as Playlist models."""
+    playlists = []
+    results = sp.current_user_playlists()
+    while results:
+        playlists.extend(Playlist.from_api(item) for item in results['items'] if item)
+        if results['next']:
+            results = sp.next(results)
+        else:
+            break
+    return playlists
+
+def search_artists(sp, artist_name, limit=5):
+    results = sp.search(q=artist_name, type='artist', limit=limit)
+    return [Artist.from_api(artist) for artist in results['artists']['items']]
+
+def search_albums(sp, album_name, limit=8):
+    results = sp.search(q=album_name, type='album', limit=limit)
+    return [Album.from_api(album) for album in results['albums']['items']]
+
+def fetch_artist_albums(sp, artist_id):
+    """Fetch artist albums with deduplication."""
+    albums = []
+    results = sp.artist_albums(artist_id, album_type='album,single')
+    seen_names = set()
+    for album in results['items']:
+        name_lower = album['name'].lower()
+        if name_lower not in seen_names:
+            seen_names.add(name_lower)
+            albums.append(Album.from_api(album))
+    return albums
+
+def fetch_album_tracks(sp, album_id):
+    """Fetch album tracks as Track models."""
+    results = sp.album_tracks(album_id)
+    return [Track.from_api(track) for track in results['items']]
+
+def fetch_playlist_tracks(sp, playlist_id):
+    """Every track of a playlist as Track models, skipping removed and local entries."""
+    tracks = []
+    results = sp.playlist_tracks(playlist_id)
+    while results:
+        tracks.extend(Track.from_api(item['track']) for item in results['items']
+                      if item['track'] and item['track'].get('id'))
+        if results['next']:
+            results = sp.next(results)
+        else:
+            break
+    return tracks
+
+def fetch_playlist_items(sp, playlist_id, market=None, fields=None, page_size=50, max_workers=4,
+                         additional_types=('track',)):
+    """Every raw item of a playlist in order, fetching the pages after the first concurrently.
+
+    ``fields`` must keep ``total``, which gives the remaining page offsets up front.
+    """
+    def fetch_page(offset):
+        return sp.playlist_items(playlist_id, fields=fields, limit=page_size, offset=offset,
+                                 market=market, additional_types=additional_types)
+
+    first = fetch_page(0)
+    offsets = list(range(page_size, first['total'], page_size))
+    pages = run_batches(fetch_page, offsets, max_workers, None) if offsets else []
+    return first['items'] + [item for page in pages for item in page['items']]
+
+def resolve_track(sp, text, min_score=RESOLVE_MIN_SCORE):
+    """Resolve one line of input to a Track, or None when nothing matches well enough.
+
+    Accepts the same syntax as the track search box ("Song by Artist",
+    ``artist:`` fields) as well as Spotify track URIs and links.
+    """
+    reference = _TRACK_REFERENCE.search(text)
+    if reference:
+        return Track.from_api(sp.track(reference.group(1)))
+    _, best_match, _ = staged_track_search(sp, text)
+    if best_match and score_track_match(parse_search_input(text), best_match) >= min_score:
+        return best_match
+    return None
+
+def resolve_tracks(sp, lines, max_workers=4, on_progress=None):
+    """Resolve many lines concurrently. Returns ``[(line, Track or None, error or None), ...]`` in input order.
+
+    A line whose lookup raised (rate limit, network, expired token) carries the
+    error message, so callers can tell it apart from a line that didn't match.
+    """
+    lines = [line.strip() for line in lines if line.strip()]
+    results = [None] * len(lines)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(resolve_track, sp, line): i for i, line in enumerate(lines)}
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                try:
+                    results[i] = (lines[i], future.result(), None)
+                except Exception as e:
+                    results[i] = (lines[i], None, str(e))
+                _report(on_progress, done, len(lines))
+        except BaseException:
+            executor.shutdown(cancel_futures=True)
+            raise
+    return results
+
+def interleave_tracks(tracks_with_counts):
+    """Repeat each track ``count`` times, spreading the repeats evenly through the list."""
+    track_pool = [(track['id'], track['count']) for track in tracks_with_counts]
+    interleaved_tracks = []
+    while any(count > 0 for _, count in track_pool):
+        for i, (track_id, count) in enumerate(track_pool):
+            if count > 0:
+                interleaved_tracks.append(track_id)
+                track_pool[i] = (track_id, count - 1)
+    return interleaved_tracks
+
+def add_tracks_in_batches(sp, playlist_id, track_ids, on_progress=None):
+    for i in range(0, len(track_ids), PLAYLIST_BATCH_SIZE):
+        sp.playlist_add_items(playlist_id, track_ids[i:i + PLAYLIST_BATCH_SIZE])
+        _report(on_progress, min(i + PLAYLIST_BATCH_SIZE, len(track_ids)), len(track_ids))
+
+def create_playlist(sp, playlist_name, track_ids, public=False, on_progress=None):
+    """Create a playlist holding ``track_ids`` in order. Returns the new playlist's id."""
+    user_id = sp.current_user()["id"]
+    playlist = sp.user_playlist_create(user_id, playlist_name, public=public)
+    add_tracks_in_batches(sp, playlist["id"], track_ids, on_progress)
+    return playlist["id"]
+
+def sync_playlist(sp, playlist_id, track_ids, on_progress=None):
+    """Make an existing playlist hold exactly ``track_ids``, in order."""
+    first, rest = track_ids[:PLAYLIST_BATCH_SIZE], track_ids[PLAYLIST_BATCH_SIZE:]
+    sp.playlist_replace_items(playlist_id, first)
+    _report(on_progress, len(first), len(track_ids))
+    for i in range(0, len(rest), PLAYLIST_BATCH_SIZE):
+        sp.playlist_add_items(playlist_id, rest[i:i + PLAYLIST_BATCH_SIZE])
+        _report(on_progress, len(first) + min(i + PLAYLIST_BATCH_SIZE, len(rest)), len(track_ids))
+
+def delete_playlists(sp, playlist_ids):
+    results = []
+    for playlist_id in playlist_ids:
+        try:
+            sp.current_user_unfollow_playlist(playlist_id)
+            results.append(("success", f"Successfully deleted/unfollowed playlist"))
+        except Exception as e:
+            results.append(("error", f"Error: {str(e)}"))
+    return results
+
+def run_batches(fn, batches, max_workers, on_progress, done=0, total=None):
+    """Call ``fn`` on every batch concurrently; returns the results in batch order."""
+    total = len(batches) if total is None else total
+    results = [None] * len(batches)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fn, batch): i for i, batch in enumerate(batches)}
+        try:
+            for done, future in enumerate(as_completed(futures), start=done + 1):
+                results[futures[future]] = future.result()
+                _report(on_progress, done, total)
+        except BaseException:
+            # Otherwise leaving the block would still run every queued batch, e.g. after a cancel
+            executor.shutdown(cancel_futures=True)
+            raise
+    return results
+
+def save_tracks_to_library(sp, track_ids, max_workers=4, on_progress=None):
+    """Save tracks to the user's Liked Songs, skipping those already saved.
+
+    Checks and saves go out in batches of 50 ids, several at a time, so
+    thousands of tracks take a few dozen calls. Returns ``(saved, already_saved)``.
+    """
+    track_ids = list(dict.fromkeys(track_id for track_id in track_ids if track_id))
+    batches = [track_ids[i:i + LIBRARY_BATCH_SIZE] for i in range(0, len(track_ids), LIBRARY_BATCH_SIZE)]
+    # Progress counts check batches plus one save batch per check batch, at most
+    total = 2 * len(batches)
+    saved_flags = run_batches(sp.current_user_saved_tracks_contains, batches, max_workers,
+                              on_progress, total=total)
+    missing = [track_id for batch, flags in zip(batches, saved_flags)
+               for track_id, saved in zip(batch, flags) if not saved]
+    save_batches = [missing[i:i + LIBRARY_BATCH_SIZE] for i in range(0, len(missing), LIBRARY_BATCH_SIZE)]
+    # Save batches that aren't needed count as done at once, so the total never changes mid-job
+    done = total - len(save_batches)
+    _report(on_progress, done, total)
+    run_batches(sp.current_user_saved_tracks_add, save_batches, max_workers, on_progress,
+                done=done, total=total)
+    return len(missing), len(track_ids) - len(missing)
+
+def save_playlists_to_library(sp, playlist_ids, max_workers=4, on_progress=None):
+    """Save every track of the given playlists to Liked Songs. Returns ``(saved, already_saved)``."""
+    playlist_ids = list(playlist_ids)
+    # Fetching the playlists fills the first half of the progress bar and saving their tracks the second
+    total = 2 * len(playlist_ids)
+    track_lists = run_batches(lambda playlist_id: fetch_playlist_tracks(sp, playlist_id), playlist_ids,
+                              max_workers, on_progress, total=total)
+    track_ids = [track.id for tracks in track_lists for track in tracks]
+    return save_tracks_to_library(sp, track_ids, max_workers,
+                                  _phase_progress(on_progress, len(playlist_ids), len(playlist_ids), total))
+
+def as_int(value, default=0):
+    """``value`` as an int, or ``default`` if it is empty or not a number."""
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return default
+
+def read_track_records(fileobj, filename):
+    """Read exported track rows from a CSV, JSON, NDJSON or Parquet file object."""
+    extension = os.path.splitext(filename)[1].lower().lstrip('.')
+    if extension == 'csv':
+        text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+        records = list(csv.DictReader(text))
+        text.detach()
+        for record in records:
+            for field in NUMERIC_FIELDS:
+                if field in record:
+                    record[field] = as_int(record[field])
+        return records
+    if extension == 'ndjson':
+        return [json.loads(line) for line in fileobj if line.strip()]
+    if extension == 'parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet import requires the 'pyarrow' package")
+        return pq.read_table(fileobj).to_pylist()
+    records = json.load(fileobj)
+    if isinstance(records, dict):
+        # DataFrame.to_json's default column layout: {column: {row: value}}
+        columns = list(records)
+        rows = records[columns[0]].keys() if columns else []
+        records = [{column: records[column].get(row) for column in columns} for row in rows]
+    return records
+
+def import_playlist(sp, records, playlist_name, on_progress=None):
+    """Create a playlist from exported track rows. Returns ``(playlist_id, track_count)``."""
+    track_ids = [record['id'] for record in records if record.get('id')]
+    playlist_id = create_playlist(sp, playlist_name, track_ids, on_progress=on_progress)
+    return playlist_id, len(track_ids)
+
+def export_playlist(sp, playlist_id, fileobj, format="csv"):
+    """Stream one playlist to a binary file object. Returns the row count."""
+    return stream_playlist_export(sp, playlist_id, fileobj, format)
+
+def export_playlists(sp, playlists, fileobj, format="csv", max_workers=4, on_progress=None):
+    """Export several playlists into one zip archive. Returns ``(status, message)`` per playlist."""
+    return export_playlists_to_zip(sp, playlists, fileobj, format, max_workers=max_workers,
+                                   on_progress=on_progress)
+
+def get_decade_distribution(release_years):
+    """Calculate distribution of tracks by decade."""
+    decades = Counter()
+    for year, count in release_years.items():
+        decade = (year // 10) * 10
+        decades[f"{decade}s"] += count
+    return dict(sorted(decades.items()))
+
+def _format_duration(duration_ms):
+    minutes = duration_ms / (1000 * 60)
+    return f"{int(minutes // 60)}h {int(minutes % 60)}m"
+
+def summarize_tracks(tracks, on_progress=None):
+    """Playlist analytics over a list of Track models."""
+    artists = Counter()
+    artist_durations = Counter()
+    albums = Counter()
+    release_years = Counter()
+    duration_ms = 0
+    explicit_count = 0
+    popularity_total = 0
+    for i, track in enumerate(tracks, start=1):
+        duration_ms += track.duration_ms
+        if track.explicit:
+            explicit_count += 1
+        for artist_name in track.artists:
+            artists[artist_name] += 1
+            artist_durations[artist_name] += track.duration_ms
+        albums[track.album] += 1
+        if track.release_year:
+            release_years[track.release_year] += 1
+        popularity_total += track.popularity
+        # Reporting every track would cost more than the work itself on big playlists
+        if i % 100 == 0 or i == len(tracks):
+            _report(on_progress, i, len(tracks))
+    total_tracks = len(tracks)
+    return {
+        'total_tracks': total_tracks,
+        'total_duration': _format_duration(duration_ms),
+        'total_artists': len(artists),
+        'explicit_percentage': (explicit_count / total_tracks) * 100 if total_tracks > 0 else 0,
+        'avg_popularity': popularity_total / total_tracks if total_tracks else 0,
+        'top_artists': dict(artists.most_common(10)),
+        'artist_durations': {artist: _format_duration(duration) for artist, duration in artist_durations.items()},
+        'top_albums': dict(albums.most_common(10)),
+        'release_years': dict(sorted(release_years.items())),
+        'decade_distribution': get_decade_distribution(release_years)
+    }
+
+def playlist_analytics(sp, playlist_id, on_progress=None):
+    return summarize_tracks(fetch_playlist_tracks(sp, playlist_id), on_progress)
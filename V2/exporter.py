@@ -0,0 +1,170 @@
+import csv
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from models import Track
+
+EXPORT_FIELDS = ['name', 'artists', 'album', 'id', 'duration_ms', 'popularity']
+
+EXPORT_FORMATS = {
+    'csv': {'extension': 'csv', 'mime': 'text/csv'},
+    'json': {'extension': 'json', 'mime': 'application/json'},
+    'ndjson': {'extension': 'ndjson', 'mime': 'application/x-ndjson'},
+    'parquet': {'extension': 'parquet', 'mime': 'application/vnd.apache.parquet'},
+}
+
+def iter_playlist_track_pages(sp, playlist_id):
+    """Yield pages of export rows for a playlist, one API page at a time."""
+    results = sp.playlist_tracks(playlist_id)
+    while results:
+        rows = []
+        for item in results['items']:
+            if item['track']:
+                rows.append(track_to_export_row(item['track']))
+        yield rows
+        if results['next']:
+            results = sp.next(results)
+        else:
+            break
+
+def track_to_export_row(track):
+    """Project a Spotify track object onto the exported columns."""
+    track = Track.from_api(track)
+    return {
+        'name': track.name,
+        'artists': track.artist_names,
+        'album': track.album,
+        'id': track.id,
+        'duration_ms': track.duration_ms,
+        'popularity': track.popularity
+    }
+
+def _write_csv(pages, fileobj):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8', newline='', write_through=True)
+    writer = csv.DictWriter(text, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    count = 0
+    for rows in pages:
+        writer.writerows(rows)
+        count += len(rows)
+    text.detach()
+    return count
+
+def _write_ndjson(pages, fileobj):
+    count = 0
+    for rows in pages:
+        for row in rows:
+            fileobj.write(json.dumps(row).encode('utf-8') + b'\n')
+        count += len(rows)
+    return count
+
+def _write_json(pages, fileobj):
+    # Same layout as DataFrame.to_json(orient='records'), written incrementally
+    fileobj.write(b'[')
+    count = 0
+    for rows in pages:
+        for row in rows:
+            if count:
+                fileobj.write(b',')
+            fileobj.write(json.dumps(row).encode('utf-8'))
+            count += 1
+    fileobj.write(b']')
+    return count
+
+def _write_parquet(pages, fileobj):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires the 'pyarrow' package")
+    schema = pa.schema([
+        ('name', pa.string()),
+        ('artists', pa.string()),
+        ('album', pa.string()),
+        ('id', pa.string()),
+        ('duration_ms', pa.int64()),
+        ('popularity', pa.int64()),
+    ])
+    count = 0
+    # Each API page becomes one row group so only a single page is held in memory
+    with pq.ParquetWriter(fileobj, schema) as writer:
+        for rows in pages:
+            if rows:
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                count += len(rows)
+    return count
+
+_WRITERS = {
+    'csv': _write_csv,
+    'json': _write_json,
+    'ndjson': _write_ndjson,
+    'parquet': _write_parquet,
+}
+
+def stream_playlist_export(sp, playlist_id, fileobj, format="csv"):
+    """Write a playlist to a binary file object as pages arrive. Returns the row count."""
+    if format not in _WRITERS:
+        raise ValueError(f"Unsupported export format: {format}")
+    return _WRITERS[format](iter_playlist_track_pages(sp, playlist_id), fileobj)
+
+def safe_export_name(name, format):
+    """Build a filesystem and zip safe file name for an exported playlist."""
+    cleaned = re.sub(r'[\\/:*?"<>|\x00-\x1f]+', '_', name).strip(' .') or "playlist"
+    return f"{cleaned}.{EXPORT_FORMATS[format]['extension']}"
+
+def export_playlists_to_zip(sp, playlists, fileobj, format="csv", max_workers=4, on_progress=None):
+    """Export several playlists concurrently into one zip archive.
+
+    Each worker streams its playlist into a temporary file on disk; finished
+    files are copied into the archive one at a time, so memory use stays at
+    roughly one API page per worker regardless of library size.
+    """
+    if format not in _WRITERS:
+        raise ValueError(f"Unsupported export format: {format}")
+    tmp_dir = tempfile.mkdtemp(prefix="spm_export_")
+
+    def export_one(index, playlist):
+        path = os.path.join(tmp_dir, f"{index}.part")
+        with open(path, 'wb') as f:
+            count = stream_playlist_export(sp, playlist.id, f, format)
+        return playlist, path, count
+
+    results = []
+    used_names = set()
+    try:
+        with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED) as archive, \
+                ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(export_one, i, p) for i, p in enumerate(playlists)]
+            try:
+                for done, future in enumerate(as_completed(futures), start=1):
+                    try:
+                        playlist, path, count = future.result()
+                    except Exception as e:
+                        results.append(("error", f"Error exporting playlist: {str(e)}"))
+                    else:
+                        arcname = safe_export_name(playlist.name, format)
+                        base, ext = os.path.splitext(arcname)
+                        suffix = 2
+                        while arcname in used_names:
+                            arcname = f"{base} ({suffix}){ext}"
+                            suffix += 1
+                        used_names.add(arcname)
+                        with open(path, 'rb') as src, archive.open(arcname, 'w') as dst:
+                            shutil.copyfileobj(src, dst)
+                        os.remove(path)
+                        results.append(("success", f"Exported '{playlist.name}' ({count} tracks)"))
+                    if on_progress:
+                        on_progress(done, len(futures))
+            except BaseException:
+                # A cancelled job must not keep exporting the playlists still queued
+                executor.shutdown(cancel_futures=True)
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return results
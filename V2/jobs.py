@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATES = ('queued', 'running')
+
+class JobCancelled(Exception):
+    """Raised from a job's progress callback once the job has been cancelled."""
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    label: str
+    owner: str = None
+    status: str = 'queued'
+    done: int = 0
+    total: int = 0
+    message: str = ''
+    result: object = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float = None
+
+    @property
+    def active(self):
+        return self.status in ACTIVE_STATES
+
+    @property
+    def fraction(self):
+        return min(self.done / self.total, 1.0) if self.total else 0.0
+
+class JobQueue:
+    """Runs long playlist operations on a worker pool and keeps their state on disk.
+
+    A job is a function ``fn(progress)`` returning ``(message, result)``. It calls
+    ``progress(done, total)`` as it goes, which also raises ``JobCancelled`` once
+    ``cancel`` was requested, so cancellation takes effect at the next batch.
+    Job state is written to ``state_dir`` as it changes, so finished results
+    survive a restart; jobs that were still running are marked as interrupted.
+    Each process needs a ``state_dir`` of its own, since a starting queue takes
+    over every job file it finds there. A file a job's result points to with
+    ``'path'`` is deleted along with the job.
+    """
+
+    def __init__(self, state_dir, max_workers=4, keep_finished=200, save_interval=1.0):
+        self.state_dir = state_dir
+        self.keep_finished = keep_finished
+        self.save_interval = save_interval
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="spm_job")
+        self._jobs = {}
+        self._futures = {}
+        self._cancel_events = {}
+        self._last_saved = {}
+        self._lock = threading.Lock()
+        os.makedirs(state_dir, exist_ok=True)
+        self._load()
+
+    def _path(self, job_id):
+        return os.path.join(self.state_dir, f"{job_id}.json")
+
+    def _load(self):
+        jobs = []
+        for name in os.listdir(self.state_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.state_dir, name), encoding='utf-8') as f:
+                    jobs.append(Job(**json.load(f)))
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning(f"Skipping unreadable job file {name}: {e}")
+        for job in sorted(jobs, key=lambda job: job.created_at):
+            if job.active:
+                job.status = 'failed'
+                job.message = "Interrupted by a server restart"
+                job.finished_at = time.time()
+                self._save(job)
+            self._jobs[job.id] = job
+
+    def _save(self, job):
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(asdict(job), f)
+            os.replace(tmp_path, self._path(job.id))
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Couldn't save job {job.id}: {e}")
+
+    def submit(self, kind, label, fn, owner=None):
+        """Queue ``fn`` and return the new job's id."""
+        job = Job(uuid.uuid4().hex[:12], kind, label, owner)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._cancel_events[job.id] = threading.Event()
+            self._save(job)
+            self._prune()
+            self._futures[job.id] = self.executor.submit(self._run, job, fn)
+        return job.id
+
+    def _run(self, job, fn):
+        cancelled = self._cancel_events[job.id]
+        job.status = 'running'
+        self._save(job)
+
+        def progress(done, total):
+            if cancelled.is_set():
+                raise JobCancelled()
+            job.done, job.total = done, total
+            now = time.monotonic()
+            # Progress is polled from memory; the file only needs to be roughly current
+            if now - self._last_saved.get(job.id, 0) >= self.save_interval:
+                self._last_saved[job.id] = now
+                self._save(job)
+
+        try:
+            progress(0, 0)
+            message, result = fn(progress)
+        except JobCancelled:
+            self._finish(job, 'cancelled', "Cancelled")
+        except Exception as e:
+            logger.warning(f"Job {job.id} ({job.kind}) failed: {e}")
+            self._finish(job, 'failed', f"Error: {str(e)}")
+        else:
+            job.result = result
+            self._finish(job, 'succeeded', message)
+
+    def _finish(self, job, status, message):
+        job.status = status
+        job.message = message
+        job.finished_at = time.time()
+        with self._lock:
+            self._futures.pop(job.id, None)
+            self._cancel_events.pop(job.id, None)
+            self._last_saved.pop(job.id, None)
+        self._save(job)
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if not job.active]
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            self._delete(job.id)
+
+    def _delete(self, job_id):
+        job = self._jobs.pop(job_id, None)
+        paths = [self._path(job_id)]
+        if job is not None and isinstance(job.result, dict) and job.result.get('path'):
+            paths.append(job.result['path'])
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def list(self, owner=None):
+        """Jobs newest first, optionally only those of one owner."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job for job in reversed(jobs) if owner is None or job.owner == owner]
+
+    def cancel(self, job_id):
+        """Cancel a queued job at once, or a running one at its next progress report."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            event = self._cancel_events.get(job_id)
+            future = self._futures.get(job_id)
+        if job is None or event is None:
+            return False
+        event.set()
+        if future is not None and future.cancel():
+            self._finish(job, 'cancelled', "Cancelled")
+        else:
+            job.message = "Cancelling..."
+        return True
+
+    def remove(self, job_id):
+        """Forget a finished job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and not job.active:
+                self._delete(job_id)
+
+    def shutdown(self):
+        for job_id in list(self._cancel_events):
+            self.cancel(job_id)
+        self.executor.shutdown(wait=False, cancel_futures=True)
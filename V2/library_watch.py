@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+def library_fingerprint(page):
+    """Summarize the first page of current_user_playlists for change detection."""
+    return {
+        'total': page['total'],
+        'snapshots': {p['id']: p['snapshot_id'] for p in page['items'] if p},
+    }
+
+def diff_fingerprints(old, new):
+    """Return ``(changed_ids, structure_changed)`` between two fingerprints.
+
+    ``structure_changed`` is True when playlists were added or removed, which
+    needs a full library reload; otherwise only ``changed_ids`` need refetching.
+    """
+    if old is None:
+        return set(), False
+    changed = {pid for pid, snapshot in new['snapshots'].items()
+               if old['snapshots'].get(pid) not in (None, snapshot)}
+    structure_changed = (old['total'] != new['total']
+                         or set(old['snapshots']) != set(new['snapshots']))
+    return changed, structure_changed
+
+class LibraryPoller:
+    """Watches the user's playlists in the background with one small request per interval.
+
+    Only the first page of playlist metadata is fetched. That is where Spotify
+    lists newly created and followed playlists, so its snapshot ids plus the total
+    count detect additions, removals and edits to recent playlists. The poller stops
+    itself when nobody has called ``touch`` for a few intervals, so abandoned
+    sessions don't keep polling.
+    """
+
+    def __init__(self, sp, interval=300, page_size=50, idle_intervals=3):
+        self.sp = sp
+        self.interval = interval
+        self.page_size = page_size
+        self.idle_timeout = interval * idle_intervals
+        self.version = 0
+        self._fingerprint = None
+        self._changed_ids = set()
+        self._structure_changed = False
+        self._last_touch = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def prime(self, playlists):
+        """Seed the baseline from a freshly loaded library of Playlist models."""
+        with self._lock:
+            self._fingerprint = {
+                'total': len(playlists),
+                'snapshots': {p.id: p.snapshot_id for p in playlists[:self.page_size]},
+            }
+            self._changed_ids = set()
+            self._structure_changed = False
+
+    def poll_once(self):
+        page = self.sp.current_user_playlists(limit=self.page_size)
+        fingerprint = library_fingerprint(page)
+        with self._lock:
+            changed, structure_changed = diff_fingerprints(self._fingerprint, fingerprint)
+            self._fingerprint = fingerprint
+            if changed or structure_changed:
+                self._changed_ids |= changed
+                self._structure_changed |= structure_changed
+                self.version += 1
+        return changed, structure_changed
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if time.monotonic() - self._last_touch > self.idle_timeout:
+                break
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.warning(f"Playlist change poll failed: {e}")
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="spm_library_poller", daemon=True)
+            self._thread.start()
+
+    def touch(self):
+        """Mark the session as alive and restart polling if it had gone idle."""
+        self._last_touch = time.monotonic()
+        self.start()
+
+    def take_changes(self):
+        """Return and clear ``(changed_ids, structure_changed)`` since the last call."""
+        with self._lock:
+            changes = (self._changed_ids, self._structure_changed)
+            self._changed_ids = set()
+            self._structure_changed = False
+        return changes
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,168 @@
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from collections import OrderedDict, deque
+
+# Sized but never followed
+_ATOMIC = (str, bytes, bytearray, int, float, complex, bool, type(None), range)
+# Neither sized nor followed: code, and handles to process-wide machinery
+_OPAQUE = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+    threading.Thread, threading.Event, type(threading.Lock()), type(threading.RLock()),
+)
+
+def deep_size(obj, seen=None, exclude=()):
+    """Approximate bytes held by ``obj`` and everything it references.
+
+    Objects whose id is in ``seen`` are not counted again, so sizing several
+    values with one ``seen`` set counts shared objects once. Objects in
+    ``exclude`` (e.g. the shared Spotify client) are treated as owned by someone
+    else and not followed.
+    """
+    seen = set() if seen is None else seen
+    seen.update(id(shared) for shared in exclude)
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _OPAQUE):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj, 0)
+        if isinstance(obj, _ATOMIC):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        else:
+            attributes = getattr(obj, '__dict__', None)
+            if attributes is not None:
+                stack.append(attributes)
+            for cls in type(obj).__mro__:
+                slots = cls.__dict__.get('__slots__', ())
+                for slot in (slots,) if isinstance(slots, str) else slots:
+                    if slot not in ('__dict__', '__weakref__') and hasattr(obj, slot):
+                        stack.append(getattr(obj, slot))
+    return size
+
+def state_sizes(state, exclude=()):
+    """``[(key, bytes)]`` of a mapping such as session state, largest first.
+
+    Values are sized with a shared ``seen`` set, so an object referenced from
+    several keys is attributed to whichever key is sized first.
+    """
+    seen = set()
+    sizes = [(key, deep_size(value, seen, exclude)) for key, value in list(state.items())]
+    return sorted(sizes, key=lambda item: item[1], reverse=True)
+
+class BoundedCache:
+    """LRU mapping that evicts the least recently used entries beyond ``max_bytes``.
+
+    Entry sizes are estimated with ``deep_size`` when stored. The newest entry is
+    always kept, even if it alone exceeds the budget. Not thread-safe; meant
+    for per-session state that only the session's script thread touches.
+    """
+
+    def __init__(self, max_bytes, exclude=()):
+        self.max_bytes = max_bytes
+        self.exclude = exclude
+        self.bytes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __getitem__(self, key):
+        self._entries.move_to_end(key)
+        return self._entries[key][0]
+
+    def get(self, key, default=None):
+        return self[key] if key in self._entries else default
+
+    def __setitem__(self, key, value):
+        self.pop(key)
+        size = deep_size(value, exclude=self.exclude)
+        self._entries[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return default
+        self.bytes -= entry[1]
+        return entry[0]
+
+class MemoryLedger:
+    """Latest per-key session state sizes of every live session in the process.
+
+    Sessions report through ``update`` at most every ``interval`` seconds (see
+    ``due``); sessions that stop reporting for ``expire_after`` seconds are
+    assumed closed and dropped. Process-wide caches registered with ``share``
+    count towards the total with their own ``bytes`` and ``max_bytes``.
+    """
+
+    def __init__(self, interval=60, expire_after=1800):
+        self.interval = interval
+        self.expire_after = expire_after
+        self._sessions = {}
+        self._shared = {}
+        self._lock = threading.Lock()
+
+    def share(self, name, resource):
+        """Account a shared cache that tracks its estimated size in ``bytes``."""
+        with self._lock:
+            self._shared[name] = resource
+
+    def due(self, session_id):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+        return entry is None or time.monotonic() - entry[0] >= self.interval
+
+    def update(self, session_id, sizes):
+        """Store ``[(key, bytes)]`` as reported by ``state_sizes``."""
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_id] = (now, dict(sizes))
+            for stale in [sid for sid, (seen, _) in self._sessions.items() if now - seen > self.expire_after]:
+                del self._sessions[stale]
+
+    def report(self, top=10):
+        """Total bytes, the shared caches, the largest sessions, and the keys using the most memory across sessions."""
+        with self._lock:
+            sessions = {sid: sizes for sid, (_, sizes) in self._sessions.items()}
+            shared = {name: (resource.bytes, resource.max_bytes, len(resource), resource.evictions)
+                      for name, resource in self._shared.items()}
+        keys = {}
+        for sizes in sessions.values():
+            for key, size in sizes.items():
+                total, count = keys.get(key, (0, 0))
+                keys[key] = (total + size, count + 1)
+        totals = {sid: sum(sizes.values()) for sid, sizes in sessions.items()}
+        return {
+            'sessions': len(sessions),
+            'session_bytes': sum(totals.values()),
+            'total_bytes': sum(totals.values()) + sum(size for size, _, _, _ in shared.values()),
+            'shared': shared,
+            'largest_sessions': sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top],
+            'largest_keys': sorted(((key, total, count) for key, (total, count) in keys.items()),
+                                   key=lambda item: item[1], reverse=True)[:top],
+        }
+
+def top_allocations(limit=10):
+    """``[(location, bytes)]`` of the biggest allocation sites, if tracemalloc is tracing."""
+    if not tracemalloc.is_tracing():
+        return []
+    stats = tracemalloc.take_snapshot().statistics('lineno')
+    return [(str(stat.traceback[0]), stat.size) for stat in stats[:limit]]
@@ -0,0 +1,195 @@
+import bisect
+import json
+import re
+import statistics
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds, as Prometheus histograms expect
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT_SAMPLES = 500
+
+_API_PREFIX = re.compile(r'^https?://[^/]+/v1/')
+_ID_SEGMENT = re.compile(r'^[0-9A-Za-z]{22}$')
+_response_info = threading.local()
+_thread_calls = threading.local()
+
+def endpoint_name(method, url):
+    """Collapse a request into a low-cardinality name, e.g. ``GET playlists/{id}/items``."""
+    path = _API_PREFIX.sub('', url).split('?', 1)[0].strip('/')
+    segments = path.split('/')
+    for i, segment in enumerate(segments):
+        # Spotify ids are 22 base62 characters; user ids are free-form
+        if _ID_SEGMENT.match(segment) or (i > 0 and segments[i - 1] == 'users'):
+            segments[i] = '{id}'
+    return f"{method} {'/'.join(segments)}"
+
+def capture_response(response, *args, **kwargs):
+    """requests response hook remembering size and retry count of the thread's last response.
+
+    The size comes from the Content-Length header, so the hook never reads the
+    body itself and streamed or chunked responses are left alone; those count
+    as 0 bytes.
+    """
+    retries = getattr(getattr(response.raw, 'retries', None), 'history', ()) or ()
+    try:
+        size = int(response.headers.get('Content-Length', 0))
+    except ValueError:
+        size = 0
+    _response_info.last = (size, len(retries))
+
+def take_response_info():
+    """Return and clear ``(bytes, retries)`` of this thread's last response."""
+    info = getattr(_response_info, 'last', (0, 0))
+    _response_info.last = (0, 0)
+    return info
+
+def thread_call_totals():
+    """``(calls, seconds)`` of the API calls recorded from the current thread so far."""
+    return getattr(_thread_calls, 'totals', (0, 0.0))
+
+class Histogram:
+    """Cumulative latency histogram plus a window of recent samples for percentiles."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        self.recent.append(seconds)
+
+    def percentile(self, q):
+        if not self.recent:
+            return 0.0
+        if len(self.recent) == 1:
+            return self.recent[0]
+        return statistics.quantiles(self.recent, n=100, method='inclusive')[q - 1]
+
+class EndpointStats:
+    def __init__(self):
+        self.statuses = {}
+        self.bytes = 0
+        self.retries = 0
+        self.latency = Histogram()
+
+class ApiMetrics:
+    """Process-wide Spotify API call and cache statistics."""
+
+    def __init__(self):
+        self.started = time.time()
+        self._endpoints = {}
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, status, seconds, size=0, retries=0):
+        calls, total = thread_call_totals()
+        _thread_calls.totals = (calls + 1, total + seconds)
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats()
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.bytes += size
+            stats.retries += retries
+            stats.latency.observe(seconds)
+
+    def record_cache(self, cache, hit):
+        with self._lock:
+            counts = self._caches.setdefault(cache, {'hit': 0, 'miss': 0})
+            counts['hit' if hit else 'miss'] += 1
+
+    def summary(self):
+        """Per-endpoint and per-cache totals, busiest endpoints first."""
+        with self._lock:
+            endpoints = []
+            for name, stats in self._endpoints.items():
+                calls = stats.latency.count
+                endpoints.append({
+                    'endpoint': name,
+                    'calls': calls,
+                    'errors': sum(n for status, n in stats.statuses.items() if status >= 400 or status == 0),
+                    'statuses': dict(stats.statuses),
+                    'retries': stats.retries,
+                    'bytes': stats.bytes,
+                    'total_ms': round(stats.latency.sum * 1000, 1),
+                    'p50_ms': round(stats.latency.percentile(50) * 1000, 1),
+                    'p95_ms': round(stats.latency.percentile(95) * 1000, 1),
+                })
+            caches = {
+                name: dict(counts, hit_rate=round(counts['hit'] / (counts['hit'] + counts['miss']), 3))
+                for name, counts in self._caches.items()
+            }
+        endpoints.sort(key=lambda e: e['total_ms'], reverse=True)
+        return {'uptime_seconds': round(time.time() - self.started), 'endpoints': endpoints, 'caches': caches}
+
+    def to_json(self):
+        return json.dumps(self.summary())
+
+    def to_prometheus(self):
+        """Metrics in the Prometheus text exposition format."""
+        def label(value):
+            return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+        lines = [
+            "# HELP spm_api_requests_total Spotify API calls by endpoint and HTTP status.",
+            "# TYPE spm_api_requests_total counter",
+        ]
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            for name, stats in endpoints:
+                for status, n in sorted(stats.statuses.items()):
+                    lines.append(f'spm_api_requests_total{{endpoint="{label(name)}",status="{status}"}} {n}')
+            lines += ["# HELP spm_api_request_duration_seconds Spotify API call latency.",
+                      "# TYPE spm_api_request_duration_seconds histogram"]
+            for name, stats in endpoints:
+                cumulative = 0
+                for bound, n in zip(stats.latency.buckets + ('+Inf',), stats.latency.counts):
+                    cumulative += n
+                    lines.append(f'spm_api_request_duration_seconds_bucket{{endpoint="{label(name)}",le="{bound}"}} {cumulative}')
+                lines.append(f'spm_api_request_duration_seconds_sum{{endpoint="{label(name)}"}} {stats.latency.sum:.6f}')
+                lines.append(f'spm_api_request_duration_seconds_count{{endpoint="{label(name)}"}} {stats.latency.count}')
+            lines += ["# HELP spm_api_response_bytes_total Response body bytes received.",
+                      "# TYPE spm_api_response_bytes_total counter"]
+            lines += [f'spm_api_response_bytes_total{{endpoint="{label(name)}"}} {stats.bytes}' for name, stats in endpoints]
+            lines += ["# HELP spm_api_retries_total Transport-level retries, e.g. after 429 or 5xx.",
+                      "# TYPE spm_api_retries_total counter"]
+            lines += [f'spm_api_retries_total{{endpoint="{label(name)}"}} {stats.retries}' for name, stats in endpoints]
+            lines += ["# HELP spm_cache_requests_total Cache lookups by cache and result.",
+                      "# TYPE spm_cache_requests_total counter"]
+            for cache, counts in sorted(self._caches.items()):
+                for result, n in sorted(counts.items()):
+                    lines.append(f'spm_cache_requests_total{{cache="{label(cache)}",result="{result}"}} {n}')
+        return '\n'.join(lines) + '\n'
+
+def start_metrics_server(metrics, port, host="127.0.0.1"):
+    """Serve ``/metrics`` (Prometheus text) and ``/metrics.json`` from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body, content_type = metrics.to_prometheus().encode(), "text/plain; version=0.0.4"
+            elif self.path == '/metrics.json':
+                body, content_type = metrics.to_json().encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="spm_metrics", daemon=True).start()
+    return server
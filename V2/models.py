@@ -0,0 +1,128 @@
+from dataclasses import dataclass
+
+# Widest column the grids render at; the smallest variant at least this wide is kept
+# and the thumbnail cache scales it down to the grid's own width
+DISPLAY_IMAGE_WIDTH = 300
+
+def pick_image_url(images, min_width=DISPLAY_IMAGE_WIDTH):
+    """Pick the smallest image that is at least ``min_width`` wide, else the largest."""
+    if not images:
+        return None
+    ordered = sorted(images, key=lambda image: image.get('width') or 0)
+    for image in ordered:
+        if (image.get('width') or 0) >= min_width:
+            return image['url']
+    return ordered[-1]['url']
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+def _release_year(album):
+    date = (album or {}).get('release_date') or ''
+    return int(date[:4]) if date[:4].isdigit() else None
+
+@dataclass
+class Artist:
+    __slots__ = ('id', 'name', 'image_url', 'popularity')
+    id: str
+    name: str
+    image_url: str
+    popularity: int
+
+    @classmethod
+    def from_api(cls, artist):
+        return cls(artist['id'], artist['name'], pick_image_url(artist.get('images')),
+                   artist.get('popularity') or 0)
+
+@dataclass
+class Album:
+    __slots__ = ('id', 'name', 'artists', 'image_url', 'release_year', 'total_tracks')
+    id: str
+    name: str
+    artists: tuple
+    image_url: str
+    release_year: int
+    total_tracks: int
+
+    @property
+    def artist_names(self):
+        return ', '.join(self.artists)
+
+    @classmethod
+    def from_api(cls, album):
+        return cls(album['id'], album['name'], tuple(a['name'] for a in album.get('artists') or []),
+                   pick_image_url(album.get('images')), _release_year(album),
+                   album.get('total_tracks') or 0)
+
+@dataclass
+class Track:
+    __slots__ = ('id', 'name', 'artists', 'artist_ids', 'album', 'release_year',
+                 'duration_ms', 'popularity', 'explicit')
+    id: str
+    name: str
+    artists: tuple
+    artist_ids: tuple
+    album: str
+    release_year: int
+    duration_ms: int
+    popularity: int
+    explicit: bool
+
+    @property
+    def artist_names(self):
+        return ', '.join(self.artists)
+
+    @classmethod
+    def from_api(cls, track, album=None):
+        """Project a track object; ``album`` is used for album_tracks results, which omit it."""
+        album = track.get('album') or album or {}
+        return cls(track['id'], track['name'],
+                   tuple(a['name'] for a in track.get('artists') or []),
+                   tuple(a['id'] for a in track.get('artists') or []),
+                   album.get('name', ''), _release_year(album),
+                   track.get('duration_ms') or 0, track.get('popularity') or 0,
+                   bool(track.get('explicit')))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'artists': list(self.artists),
+            'artist_ids': list(self.artist_ids),
+            'album': self.album,
+            'release_year': self.release_year,
+            'duration_ms': self.duration_ms,
+            'popularity': self.popularity,
+            'explicit': self.explicit,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        artists = data.get('artists') or ()
+        if isinstance(artists, str):
+            artists = [name.strip() for name in artists.split(',')]
+        return cls(data['id'], data['name'], tuple(artists), tuple(data.get('artist_ids') or ()),
+                   data.get('album', ''), data.get('release_year'), _as_int(data.get('duration_ms')),
+                   _as_int(data.get('popularity')), bool(data.get('explicit')))
+
+@dataclass
+class Playlist:
+    __slots__ = ('id', 'name', 'owner_id', 'owner_name', 'track_count', 'snapshot_id', 'image_url')
+    id: str
+    name: str
+    owner_id: str
+    owner_name: str
+    track_count: int
+    snapshot_id: str
+    image_url: str
+
+    @classmethod
+    def from_api(cls, playlist):
+        owner = playlist.get('owner') or {}
+        return cls(playlist['id'], playlist['name'], owner.get('id'),
+                   owner.get('display_name') or owner.get('id') or '',
+                   (playlist.get('tracks') or {}).get('total', 0), playlist.get('snapshot_id'),
+                   pick_image_url(playlist.get('images')))
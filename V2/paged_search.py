@@ -0,0 +1,79 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+from models import Track
+
+# Spotify rejects search offsets beyond this value
+MAX_SEARCH_OFFSET = 1000
+
+def build_filtered_query(track_name, filters):
+    """Push the filters Spotify can evaluate server-side into the query string."""
+    query = track_name
+    if filters.get('year'):
+        query += f" year:{filters['year']}"
+    if filters.get('genre'):
+        # Spotify filters tracks by genre server-side; apply_track_filters additionally
+        # requires the genre among the first artist's genres
+        query += f' genre:"{filters["genre"]}"'
+    return query
+
+def _fetch_artist_genres(sp, artist_ids, genre_cache):
+    missing = [a for a in dict.fromkeys(artist_ids) if a not in genre_cache]
+    for i in range(0, len(missing), 50):
+        for artist in sp.artists(missing[i:i + 50])['artists']:
+            if artist:
+                genre_cache[artist['id']] = {g.lower() for g in artist['genres']}
+
+def apply_track_filters(sp, tracks, filters, genre_cache):
+    """Apply popularity and genre filters, batching artist lookups 50 at a time."""
+    if filters.get('min_popularity'):
+        tracks = [t for t in tracks if t.popularity >= filters['min_popularity']]
+    if filters.get('genre'):
+        genre = filters['genre'].lower()
+        _fetch_artist_genres(sp, [t.artist_ids[0] for t in tracks if t.artist_ids], genre_cache)
+        tracks = [t for t in tracks if t.artist_ids and genre in genre_cache.get(t.artist_ids[0], ())]
+    return tracks
+
+def iter_filtered_track_search(sp, track_name, filters=None, target=20, max_pages=10,
+                               page_size=50, max_workers=4, genre_cache=None):
+    """Yield lists of filtered ``Track`` models as result pages arrive.
+
+    Pages are fetched up to ``max_workers`` at a time, but never more than could
+    still be needed to reach ``target``, until ``target`` filtered tracks have
+    been yielded, ``max_pages`` pages have been requested, or Spotify runs out
+    of results. The first batch is yielded as soon as the first page has been
+    filtered, so callers can render partial results while fetching continues.
+    """
+    filters = filters or {}
+    genre_cache = {} if genre_cache is None else genre_cache
+    query = build_filtered_query(track_name, filters)
+    max_pages = min(max_pages, MAX_SEARCH_OFFSET // page_size + 1)
+    found = 0
+    seen_ids = set()
+    next_page = 0
+
+    def fetch_page(page):
+        return sp.search(q=query, limit=page_size, offset=page * page_size, type="track")["tracks"]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while next_page < max_pages and found < target:
+            needed = math.ceil((target - found) / page_size)
+            wave = range(next_page, min(next_page + max_workers, next_page + needed, max_pages))
+            futures = [executor.submit(fetch_page, page) for page in wave]
+            next_page = wave.stop
+            exhausted = False
+            for future in futures:
+                page = future.result()
+                tracks = [Track.from_api(t) for t in page['items'] if t and t['id'] not in seen_ids]
+                seen_ids.update(t.id for t in tracks)
+                matches = apply_track_filters(sp, tracks, filters, genre_cache)[:target - found]
+                if matches:
+                    found += len(matches)
+                    yield matches
+                if not page['next'] or found >= target:
+                    exhausted = True
+                    break
+            if exhausted:
+                for future in futures:
+                    future.cancel()
+                break
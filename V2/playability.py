@@ -0,0 +1,179 @@
+import json
+import os
+import re
+import tempfile
+import time
+
+from core import fetch_playlist_items, run_batches, sync_playlist
+
+# Spotify resolves this to the country of the account the token belongs to
+DEFAULT_MARKET = "from_token"
+PLAYABILITY_FIELDS = (
+    "total,items(is_local,track(id,uri,type,name,is_local,is_playable,restrictions(reason),"
+    "linked_from(id),artists(name)))"
+)
+# Episodes are fetched too, so a rewrite can keep them
+PLAYABILITY_TYPES = ('track', 'episode')
+
+def item_issue(position, item):
+    """Describe a playlist item that is relinked or unplayable in the scanned market, else None.
+
+    With ``market`` set, Spotify swaps tracks that are unavailable there for an
+    equivalent release (``linked_from`` holds the id stored in the playlist) and
+    marks tracks without one as ``is_playable: false``.
+    """
+    track = item.get('track')
+    if not track or item.get('is_local') or track.get('is_local') or track.get('type') == 'episode':
+        return None
+    issue = {
+        'position': position,
+        'name': track.get('name', ''),
+        'artists': ', '.join(a['name'] for a in track.get('artists') or []),
+    }
+    linked_from = (track.get('linked_from') or {}).get('id')
+    if linked_from and linked_from != track['id']:
+        return dict(issue, track_id=linked_from, status='relinked', replacement_id=track['id'])
+    if track.get('is_playable') is False:
+        reason = (track.get('restrictions') or {}).get('reason', '')
+        return dict(issue, track_id=track['id'], status='unplayable', reason=reason)
+    return None
+
+def unfixable_reason(items):
+    """Why a playlist can't be rewritten through the API without losing items, else None."""
+    if any(item.get('is_local') or (item.get('track') or {}).get('is_local') for item in items):
+        return "has local files, which the API can't add back"
+    if any(not item.get('track') for item in items):
+        return "has items the API no longer returns, which a rewrite would drop"
+    return None
+
+def fetch_items(sp, playlist_id, market=DEFAULT_MARKET, max_workers=4):
+    return fetch_playlist_items(sp, playlist_id, market=market, fields=PLAYABILITY_FIELDS,
+                                max_workers=max_workers, additional_types=PLAYABILITY_TYPES)
+
+def scan_playlist(sp, playlist_id, market=DEFAULT_MARKET, max_workers=4):
+    """Relinked and unplayable items of one playlist, in playlist order, and why it can't be fixed, if so."""
+    items = fetch_items(sp, playlist_id, market, max_workers)
+    issues = [issue for issue in (item_issue(i, item) for i, item in enumerate(items)) if issue]
+    return issues, unfixable_reason(items) if issues else None
+
+def _is_current(entry, playlist, market):
+    return (entry is not None and playlist.snapshot_id is not None
+            and entry['snapshot_id'] == playlist.snapshot_id and entry['market'] == market)
+
+def scan_playlists(sp, playlists, cache, market=DEFAULT_MARKET, max_workers=4, on_progress=None):
+    """Scan playlists into ``cache``, a dict keyed by playlist id, and return how many were scanned.
+
+    Entries are keyed to the playlist's ``snapshot_id`` and the market, so a
+    rescan only fetches playlists that changed since. Entries of playlists
+    that are no longer in ``playlists`` are dropped. A playlist that can't be
+    read gets an entry with its ``error`` and is scanned again next time. Each
+    entry is stored as soon as its playlist is done, so callers can save
+    ``cache`` even if the scan is cancelled.
+    """
+    current = {p.id for p in playlists}
+    for playlist_id in [pid for pid in cache if pid not in current]:
+        del cache[playlist_id]
+    stale = [p for p in playlists if not _is_current(cache.get(p.id), p, market)]
+
+    def scan_one(playlist):
+        entry = {'name': playlist.name, 'snapshot_id': playlist.snapshot_id, 'market': market}
+        try:
+            entry['issues'], blocked = scan_playlist(sp, playlist.id, market)
+        except Exception as e:
+            entry.update(snapshot_id=None, issues=[], error=str(e))
+        else:
+            if blocked:
+                entry['blocked'] = blocked
+        entry['scanned_at'] = time.time()
+        cache[playlist.id] = entry
+
+    run_batches(scan_one, stale, max_workers, on_progress)
+    return len(stale)
+
+def fixed_track_ids(items, replace_relinked=True, remove_unplayable=True):
+    """Track ids (episode URIs for episodes) of a playlist after the fix, plus ``(replaced, removed)`` counts.
+
+    Raises ``ValueError`` for playlists a rewrite would lose items of.
+    """
+    reason = unfixable_reason(items)
+    if reason:
+        raise ValueError(f"The playlist {reason}")
+    track_ids, replaced, removed = [], 0, 0
+    for position, item in enumerate(items):
+        issue = item_issue(position, item)
+        if issue and issue['status'] == 'relinked':
+            if replace_relinked:
+                track_ids.append(issue['replacement_id'])
+                replaced += 1
+            else:
+                track_ids.append(issue['track_id'])
+        elif issue and remove_unplayable:
+            removed += 1
+        elif item['track'].get('type') == 'episode':
+            track_ids.append(item['track']['uri'])
+        else:
+            track_ids.append(item['track']['id'])
+    return track_ids, replaced, removed
+
+def fix_playlist(sp, playlist_id, snapshot_id, market=DEFAULT_MARKET, replace_relinked=True,
+                 remove_unplayable=True, on_progress=None):
+    """Rewrite a playlist with relinked ids swapped in and unplayable tracks removed.
+
+    Refuses to touch a playlist that changed since it was scanned. The tracks
+    are written back in batches of 100. Returns ``(replaced, removed)``.
+    """
+    current = sp.playlist(playlist_id, fields="snapshot_id")['snapshot_id']
+    if current != snapshot_id:
+        raise ValueError("The playlist changed since it was scanned; scan it again first")
+    items = fetch_items(sp, playlist_id, market)
+    track_ids, replaced, removed = fixed_track_ids(items, replace_relinked, remove_unplayable)
+    if replaced or removed:
+        sync_playlist(sp, playlist_id, track_ids, on_progress=on_progress)
+    return replaced, removed
+
+def fix_playlists(sp, playlist_ids, cache, replace_relinked=True, remove_unplayable=True, on_progress=None):
+    """Fix scanned playlists one by one. Returns ``(status, message)`` per playlist.
+
+    Fixed playlists are dropped from ``cache``, since their snapshot changed.
+    """
+    results = []
+    for done, playlist_id in enumerate(playlist_ids, start=1):
+        entry = cache.get(playlist_id)
+        try:
+            if entry is None:
+                raise ValueError("it has not been scanned")
+            if entry.get('error'):
+                raise ValueError(f"it couldn't be scanned: {entry['error']}")
+            replaced, removed = fix_playlist(sp, playlist_id, entry['snapshot_id'], entry['market'],
+                                             replace_relinked, remove_unplayable)
+        except Exception as e:
+            name = entry['name'] if entry else playlist_id
+            results.append(("error", f"Error fixing '{name}': {str(e)}"))
+        else:
+            cache.pop(playlist_id)
+            results.append(("success", f"Fixed '{entry['name']}': {replaced} replaced, {removed} removed"))
+        if on_progress:
+            on_progress(done, len(playlist_ids))
+    return results
+
+def scan_cache_path(directory, user_id):
+    """Path of the saved scan results for a Spotify user."""
+    safe_id = re.sub(r'[^\w.-]', '_', user_id)
+    return os.path.join(directory, f"{safe_id}.json")
+
+def save_scan_cache(cache, path):
+    """Write scan results atomically."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, path)
+
+def load_scan_cache(path):
+    """Load saved scan results, or an empty cache if none exist or the file is unreadable."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
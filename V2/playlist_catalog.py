@@ -0,0 +1,73 @@
+from collections import defaultdict
+
+SORT_KEYS = {
+    'name': lambda p: p.name.lower(),
+    'tracks': lambda p: p.track_count,
+    'owner': lambda p: p.owner_name.lower(),
+}
+SUBSTRING_GRAM = 3
+# Filtered views kept per catalog, so reruns with unchanged controls are free
+MAX_CACHED_VIEWS = 32
+
+class PlaylistCatalog:
+    """One library load of playlists, indexed for the manager's filter and sort controls.
+
+    The owned/followed partitions and each sort order are computed once, on
+    first use. A filter matches playlists whose name or owner contains the text,
+    case-insensitively; for filters of three or more characters only the
+    playlists in the posting list of the query's rarest trigram are checked.
+    """
+
+    def __init__(self, playlists, user_id):
+        self.playlists = playlists
+        self.user_id = user_id
+        self._texts = [f"{p.name.lower()}\n{p.owner_name.lower()}" for p in playlists]
+        self._postings = defaultdict(list)
+        for i, text in enumerate(self._texts):
+            for gram in {text[j:j + SUBSTRING_GRAM] for j in range(len(text) - SUBSTRING_GRAM + 1)}:
+                self._postings[gram].append(i)
+        self._sections = {
+            'owned': [i for i, p in enumerate(playlists) if p.owner_id == user_id],
+            'followed': [i for i, p in enumerate(playlists) if p.owner_id != user_id],
+        }
+        self._orders = {}
+        self._views = {}
+
+    def __len__(self):
+        return len(self.playlists)
+
+    def _order(self, section, sort_by, reverse):
+        """Indices of a section in sort order, as ``sorted`` would return them."""
+        key = (section, sort_by, reverse)
+        if key not in self._orders:
+            sort_key = SORT_KEYS.get(sort_by)
+            indices = self._sections[section]
+            if sort_key is not None:
+                indices = sorted(indices, key=lambda i: sort_key(self.playlists[i]), reverse=reverse)
+            self._orders[key] = indices
+        return self._orders[key]
+
+    def _matches(self, filter_text):
+        """Set of indices whose name or owner contains ``filter_text``."""
+        query = filter_text.lower()
+        grams = {query[j:j + SUBSTRING_GRAM] for j in range(len(query) - SUBSTRING_GRAM + 1)}
+        if grams:
+            candidates = min((self._postings.get(gram, ()) for gram in grams), key=len)
+        else:
+            candidates = range(len(self._texts))
+        return {i for i in candidates if query in self._texts[i]}
+
+    def view(self, section, sort_by="name", reverse=False, filter_text=""):
+        """Playlists of ``section`` ('owned' or 'followed') matching the filter, in sort order."""
+        key = (section, sort_by, reverse, filter_text)
+        if key in self._views:
+            return self._views[key]
+        order = self._order(section, sort_by, reverse)
+        if filter_text:
+            matches = self._matches(filter_text)
+            order = [i for i in order if i in matches]
+        result = [self.playlists[i] for i in order]
+        if len(self._views) >= MAX_CACHED_VIEWS:
+            self._views.pop(next(iter(self._views)))
+        self._views[key] = result
+        return result
@@ -1,34 +1,83 @@
 import streamlit as st
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
-import pandas as pd
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import os
 from dotenv import load_dotenv
 from datetime import datetime
-import re
-import difflib
 import time
-import plotly.express as px
-import plotly.graph_objects as go
-from collections import Counter
-from streamlit_autorefresh import st_autorefresh
 import json
+import io
+import tempfile
+import tracemalloc
+import secrets
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from exporter import EXPORT_FORMATS, stream_playlist_export, export_playlists_to_zip, safe_export_name
+from catalog_index import CatalogIndex
+from query_builder import parse_search_input, score_track_match, staged_track_search
+from paged_search import iter_filtered_track_search
+from prefetch import FetchCache, LatestSearch
+from models import Playlist, Track
+from playlist_catalog import PlaylistCatalog
+from selection import TrackSelection, load_selection, save_selection, selection_path
+from playability import (
+    DEFAULT_MARKET, fix_playlists, load_scan_cache, save_scan_cache, scan_cache_path, scan_playlists
+)
+from clients import SpotifyClientPool
+from library_watch import LibraryPoller
+from thumbnails import ThumbnailCache
+from jobs import JobQueue
+from memory import BoundedCache, MemoryLedger, state_sizes, top_allocations
+from metrics import ApiMetrics, start_metrics_server
+from profiler import RerunProfiler, profiled, save_profile
+from core import (
+    SCOPE, create_playlist, delete_playlists, fetch_album_tracks, fetch_artist_albums,
+    fetch_playlist_tracks, get_user_playlists, import_playlist, interleave_tracks,
+    read_track_records, save_playlists_to_library, save_tracks_to_library, search_albums,
+    search_artists, summarize_tracks
+)
 load_dotenv()
 CLIENT_ID = os.getenv('CLIENT_ID')
 CLIENT_SECRET = os.getenv('CLIENT_SECRET')
-REDIRECT_URI = "http://127.0.0.1:8888/callback"
-SCOPE = (
-    "playlist-modify-private "
-    "playlist-modify-public "
-    "playlist-read-private "
-    "user-library-modify "
-    "user-read-private "
-    "user-read-email "
-    "user-read-playback-state "
-    "user-modify-playback-state "
-    "user-read-currently-playing "
-    "streaming"
-)
+REDIRECT_URI = os.getenv('REDIRECT_URI', "http://127.0.0.1:8888/callback")
+# In multi-user mode every browser session signs in with its own account; REDIRECT_URI must point at the app
+MULTI_USER = os.getenv('MULTI_USER', '').lower() in ('1', 'true', 'yes')
+LOCAL_SESSION_KEY = "local"
+EXPORT_FORMAT_LABELS = [fmt.upper() for fmt in EXPORT_FORMATS]
+
+# Runs remote searches off the script thread so local suggestions render first
+SEARCH_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="spm_search")
+# Prefetches and thumbnail downloads get their own pool, so a burst of them never queues ahead of a search
+BACKGROUND_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="spm_background")
+PLAYLIST_PAGE_SIZES = [25, 50, 100]
+SELECTION_DIR = ".selections"
+PLAYABILITY_DIR = ".playability"
+LIBRARY_POLL_SECONDS = 5 * 60
+# How often the page checks the poller's result; this costs no API calls
+LIBRARY_CHECK_SECONDS = 30
+THUMBNAIL_DIR = ".thumbnails"
+# Rendered column widths of the artist (5 columns) and album (4 columns) grids
+ARTIST_THUMB_WIDTH = 240
+ALBUM_THUMB_WIDTH = 300
+# Separate from the HTTP API's job directory, since each queue takes over the files in its own
+JOB_DIR = os.path.join(".jobs", "app")
+JOB_WORKERS = 4
+# How often the jobs panel refreshes progress from memory; this costs no API calls
+JOB_POLL_SECONDS = 2
+# Set to serve /metrics (Prometheus) and /metrics.json on this port for monitoring
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+# Interface the metrics server binds to; use 0.0.0.0 to let a scraper on another host reach it
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+PROFILE_DIR = ".profiles"
+PROFILE_HISTORY = 20
+# Byte budgets that keep a long-running multi-user server within a fixed memory envelope
+FETCH_CACHE_BYTES = 64 * 1024 * 1024
+CATALOG_INDEX_BYTES = 64 * 1024 * 1024
+ANALYTICS_CACHE_BYTES = 2 * 1024 * 1024
+THUMBNAIL_CACHE_BYTES = 256 * 1024 * 1024
+# Bulk export archives larger than this are spooled to a temporary file
+EXPORT_SPOOL_BYTES = 8 * 1024 * 1024
+MEMORY_SAMPLE_SECONDS = 60
+# Set to trace allocations, so the developer panel can list the biggest allocation sites
+MEMORY_TRACE = os.getenv('MEMORY_TRACE', '').lower() in ('1', 'true', 'yes')
 
 # Utility functions for common operations
 def show_notification(message, type="info"):
@@ -96,376 +145,604 @@ def display_playlist_section(playlists, section_type, sp, user_id):
     for playlist in playlists:
         col1, col2 = st.columns([3, 1])
         with col1:
-            owner_text = "(Owned)" if section_type == "owned" else f"(by {playlist['owner']['display_name']})"
-            st.write(f"**{playlist['name']}** {owner_text}")
+            owner_text = "(Owned)" if section_type == "owned" else f"(by {playlist.owner_name})"
+            st.write(f"**{playlist.name}** {owner_text}")
         with col2:
-            selected.append(st.checkbox("Select", key=f"{section_type}_{playlist['id']}"))
+            selected.append(st.checkbox("Select", key=f"{section_type}_{playlist.id}"))
     
     if any(selected):
         button_text = "Delete Selected" if section_type == "owned" else "Unfollow Selected"
         if st.button(button_text):
-            playlists_to_modify = [p['id'] for p, selected in zip(playlists, selected) if selected]
+            playlists_to_modify = [p.id for p, selected in zip(playlists, selected) if selected]
             results = delete_playlists(sp, playlists_to_modify)
             handle_spotify_operation_result(results)
 
-def clean_song_name(song_name):
-    """Clean song name with a single regex operation."""
-    # Combined regex to remove both "By/by <artist>" and "Album-<name>" in one pass
-    cleaned = re.sub(r'\s*(?:(?:By|by)\s*.*|Album-.*)', '', song_name)
-    return ' '.join(cleaned.split()).lower()
+@st.cache_resource
+def get_api_metrics():
+    """Process-wide Spotify API and cache statistics, optionally served to a metrics scraper."""
+    metrics = ApiMetrics()
+    if METRICS_PORT:
+        start_metrics_server(metrics, METRICS_PORT, METRICS_HOST)
+    return metrics
 
 @st.cache_resource
+def get_client_pool():
+    """Process-wide pool of per-session Spotify clients sharing one HTTP connection pool."""
+    return SpotifyClientPool(CLIENT_ID, CLIENT_SECRET, REDIRECT_URI, SCOPE, metrics=get_api_metrics())
+
 def get_spotify_client():
-    return spotipy.Spotify(auth_manager=SpotifyOAuth(client_id=CLIENT_ID, client_secret=CLIENT_SECRET, redirect_uri=REDIRECT_URI, scope=SCOPE, cache_path=".spotifycache"))
-
-# Cache for 1 hour
-def get_user_playlists(sp):
-    """Cached function to get user playlists."""
-    playlists = []
-    results = sp.current_user_playlists()
-    while results:
-        playlists.extend(results['items'])
-        if results['next']:
-            results = sp.next(results)
-        else:
-            break
-    return playlists
+    """Spotify client for the current browser session, or None while the user signs in."""
+    pool = get_client_pool()
+    if not MULTI_USER:
+        return pool.client(LOCAL_SESSION_KEY, cache_path=".spotifycache")
+    if 'session_key' not in st.session_state:
+        st.session_state.session_key = secrets.token_urlsafe(16)
+    session_key = st.session_state.session_key
+    if pool.is_authorized(session_key):
+        return pool.client(session_key)
+    code = st.query_params.get('code')
+    if code:
+        login_key = pool.complete_login(code, st.query_params.get('state'))
+        st.query_params.clear()
+        if login_key is not None:
+            # The redirect opens a new browser session; it continues the one that started the login
+            st.session_state.session_key = login_key
+            return pool.client(login_key)
+        st.warning("That login link has expired or wasn't started here. Please log in again.")
+    st.title("Spotify Playlist Manager")
+    st.link_button("Log in with Spotify", pool.login_url(session_key))
+    return None
+
+@st.cache_resource
+def get_catalog_index():
+    """Shared local index of every artist, album and track the app has seen."""
+    return CatalogIndex(max_bytes=CATALOG_INDEX_BYTES)
+
+@st.cache_resource
+def get_fetch_cache():
+    """Shared cache for search results and prefetched albums and tracks."""
+    return FetchCache(BACKGROUND_EXECUTOR, ttl=300, metrics=get_api_metrics(), max_bytes=FETCH_CACHE_BYTES)
+
+@st.cache_resource
+def get_memory_ledger():
+    """Per-key session state sizes of every session in this process."""
+    if MEMORY_TRACE and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    ledger = MemoryLedger(interval=MEMORY_SAMPLE_SECONDS)
+    ledger.share("Fetch cache", get_fetch_cache())
+    ledger.share("Catalog index", get_catalog_index())
+    return ledger
+
+def shared_objects():
+    """Process-wide resources that session state may reference but does not own.
+
+    The caches among them are accounted once, through ``MemoryLedger.share``.
+    """
+    return (get_client_pool().http, get_api_metrics(), get_fetch_cache(), get_catalog_index(),
+            SEARCH_EXECUTOR, BACKGROUND_EXECUTOR)
+
+def account_session_memory():
+    """Report this session's state sizes to the ledger, at most once per sample interval."""
+    ctx = get_script_run_ctx()
+    ledger = get_memory_ledger()
+    if ctx is not None and ledger.due(ctx.session_id):
+        ledger.update(ctx.session_id, state_sizes(st.session_state, exclude=shared_objects()))
+
+def get_search_runner(kind):
+    """Per-session runner so a newer query supersedes the pending one."""
+    runners = st.session_state.setdefault('search_runners', {})
+    if kind not in runners:
+        runners[kind] = LatestSearch(SEARCH_EXECUTOR)
+    return runners[kind]
+
+def search_with_local_suggestions(kind, query, remote_search, spinner_text):
+    """Show instant matches from the local index while the remote search runs."""
+    cache = get_fetch_cache()
+    cache_key = ('search', kind, query)
+    cached, results = cache.peek(cache_key)
+    if cached:
+        return results
+    future = get_search_runner(kind).submit(lambda: cache.get(cache_key, remote_search))
+    index = get_catalog_index()
+    placeholder = st.empty()
+    local_matches = index.search(query, kind=kind, limit=5)
+    if local_matches and not future.done():
+        with placeholder.container():
+            st.caption("Quick matches from previously seen results:")
+            for entity in local_matches:
+                subtitle = f" - *{entity['subtitle']}*" if entity['subtitle'] else ""
+                st.markdown(f"- **{entity['name']}**{subtitle}")
+    with st.spinner(spinner_text):
+        try:
+            results = future.result()
+        except CancelledError:
+            # A newer query replaced this one; its rerun renders the results
+            results = []
+    placeholder.empty()
+    index.add_many(kind, results)
+    return results
+
+def get_library_poller(sp):
+    if 'library_poller' not in st.session_state:
+        st.session_state.library_poller = LibraryPoller(sp, interval=LIBRARY_POLL_SECONDS)
+    return st.session_state.library_poller
 
-# Cache for 5 minutes
-def search_artists(sp, artist_name):
-    """Cached function to search artists."""
-    results = sp.search(q=artist_name, type='artist', limit=5)  # Reduced to match UI columns
-    return results['artists']['items']
+@profiled
+def get_library(sp):
+    """The user's playlists, loaded once per session and patched as the poller reports changes."""
+    poller = get_library_poller(sp)
+    poller.touch()
+    changed_ids, structure_changed = poller.take_changes()
+    if 'library' not in st.session_state or structure_changed:
+        st.session_state.library = get_user_playlists(sp)
+        poller.prime(st.session_state.library)
+    elif changed_ids:
+        st.session_state.library = [
+            refresh_playlist(sp, p) if p.id in changed_ids else p
+            for p in st.session_state.library
+        ]
+    return st.session_state.library
+
+def refresh_playlist(sp, playlist):
+    """Refetch the metadata of a single playlist."""
+    return Playlist.from_api(sp.playlist(playlist.id, fields="id,name,owner,tracks.total,snapshot_id,images"))
+
+def invalidate_library():
+    """Force a full reload after the app itself creates or removes playlists."""
+    st.session_state.pop('library', None)
+    st.session_state.pop('playlist_catalog', None)
+
+@st.fragment(run_every=LIBRARY_CHECK_SECONDS)
+@profiled
+def watch_library(sp):
+    """Rerun the page only when the background poller has seen a change."""
+    poller = get_library_poller(sp)
+    poller.touch()
+    if poller.version != st.session_state.get('library_seen_version', 0):
+        st.session_state.library_seen_version = poller.version
+        st.rerun()
+
+@st.cache_resource
+def get_thumbnail_cache():
+    """Shared on-disk cache of downscaled cover images."""
+    return ThumbnailCache(THUMBNAIL_DIR, BACKGROUND_EXECUTOR, http=get_client_pool().http,
+                          max_bytes=THUMBNAIL_CACHE_BYTES)
+
+def get_thumbnails(items, width):
+    """Local thumbnails for a grid of artists or albums, fetched concurrently."""
+    return get_thumbnail_cache().get_many([item.image_url for item in items], width)
 
-  # Cache for 5 minutes
 def get_artist_albums(sp, artist_id):
-    """Cached function to get artist albums with deduplication."""
-    albums = []
-    results = sp.artist_albums(artist_id, album_type='album,single')
-    seen_names = set()
-    for album in results['items']:
-        name_lower = album['name'].lower()
-        if name_lower not in seen_names:
-            seen_names.add(name_lower)
-            albums.append(album)
+    """Cached function to get artist albums, served from the prefetch cache when warm."""
+    albums = get_fetch_cache().get(('artist_albums', artist_id), lambda: fetch_artist_albums(sp, artist_id))
+    get_catalog_index().add_many('album', albums)
     return albums
 
-  # Cache for 5 minutes
 def get_album_tracks(sp, album_id):
-    """Cached function to get album tracks."""
-    tracks = []
-    results = sp.album_tracks(album_id)
-    for track in results['items']:
-        tracks.append({
-            'name': track['name'],
-            'id': track['id'],
-            'artists': ', '.join([artist['name'] for artist in track['artists']])
-        })
+    """Cached function to get album tracks, served from the prefetch cache when warm."""
+    tracks = get_fetch_cache().get(('album_tracks', album_id), lambda: fetch_album_tracks(sp, album_id))
+    get_catalog_index().add_many('track', tracks)
     return tracks
 
-def find_best_match(original_song_name, search_results, similarity_threshold=0.6):
-    cleaned_song_name = clean_song_name(original_song_name)
-    best_match = None
-    best_similarity = 0
-    for track in search_results:
-        track_name = track['name'].lower()
-        similarity = difflib.SequenceMatcher(None, cleaned_song_name, track_name).ratio()
-        if similarity > best_similarity:
-            best_similarity = similarity
-            best_match = track
-    if best_match and best_similarity >= similarity_threshold:
-        return best_match
-    return None
+def prefetch_album_tracks(sp, album_id):
+    """Start loading an album's tracks in the background."""
+    get_fetch_cache().prefetch(('album_tracks', album_id), lambda: fetch_album_tracks(sp, album_id))
 
-def create_playlist_from_tracks(sp, tracks_with_counts, playlist_name):
-    try:
-        with st.status("Creating playlist...", expanded=True) as status:
-            user_id = sp.current_user()["id"]
-            status.write("Creating new playlist...")
-            playlist = sp.user_playlist_create(user_id, playlist_name, public=False)
-            playlist_id = playlist["id"]
-            track_pool = [(track['id'], track['count']) for track in tracks_with_counts]
-            total_tracks = sum(count for _, count in track_pool)
-            status.write("Preparing tracks...")
-            interleaved_tracks = []
-            while any(count > 0 for _, count in track_pool):
-                for i, (track_id, count) in enumerate(track_pool):
-                    if count > 0:
-                        interleaved_tracks.append(track_id)
-                        track_pool[i] = (track_id, count - 1)
-            if interleaved_tracks:
-                progress_bar = st.progress(0)
-                for i in range(0, len(interleaved_tracks), 100):
-                    batch = interleaved_tracks[i:i + 100]
-                    status.write(f"Adding tracks {i+1} to {min(i+100, len(interleaved_tracks))}...")
-                    sp.playlist_add_items(playlist_id, batch)
-                    progress = min((i + 100) / len(interleaved_tracks), 1.0)
-                    progress_bar.progress(progress)
-                    time.sleep(0.1)
-                status.update(label="Playlist created successfully!", state="complete")
-                show_notification(f"Created playlist '{playlist_name}' with {len(interleaved_tracks)} tracks!", "success")
-                return True, f"Created playlist '{playlist_name}' with {len(interleaved_tracks)} tracks!"
-            else:
-                status.update(label="No tracks to add", state="error")
-                show_notification("No tracks could be added to the playlist.", "error")
-                return False, "No tracks could be added to the playlist."
-    except Exception as e:
-        if 'status' in locals():
-            status.update(label=f"Error: {str(e)}", state="error")
-        show_notification(f"Error creating playlist: {str(e)}", "error")
-        return False, f"Error creating playlist: {str(e)}"
-
-def delete_playlists(sp, playlist_ids):
-    user_id = sp.current_user()["id"]
-    results = []
-    for playlist_id in playlist_ids:
-        try:
-            sp.current_user_unfollow_playlist(playlist_id)
-            results.append(("success", f"Successfully deleted/unfollowed playlist"))
-        except Exception as e:
-            results.append(("error", f"Error: {str(e)}"))
-    return results
+def prefetch_artist_discography(sp, artist_id):
+    """Start loading an artist's albums, then the tracks of the first album, in the background."""
+    cache = get_fetch_cache()
+
+    def fetch_and_chain():
+        albums = fetch_artist_albums(sp, artist_id)
+        if albums:
+            cache.prefetch(('album_tracks', albums[0].id), lambda: fetch_album_tracks(sp, albums[0].id))
+        return albums
+
+    cache.prefetch(('artist_albums', artist_id), fetch_and_chain)
+
+@st.cache_resource
+def get_job_queue():
+    """Process-wide worker pool for long playlist operations, with job state kept on disk."""
+    return JobQueue(JOB_DIR, max_workers=JOB_WORKERS)
+
+def submit_job(sp, kind, label, fn, on_success=None):
+    """Queue a job for the current user; ``on_success(job)`` runs in this session once it succeeds."""
+    job_id = get_job_queue().submit(kind, label, fn, owner=get_current_user_id(sp))
+    st.session_state.setdefault('pending_jobs', {})[job_id] = on_success
+    return job_id
+
+@profiled
+def show_jobs(sp):
+    """The user's jobs, polled for progress only while some are still running."""
+    queue = get_job_queue()
+    jobs = queue.list(owner=get_current_user_id(sp))
+    st.session_state.jobs_polling = bool(st.session_state.get('pending_jobs')) or any(job.active for job in jobs)
+    if st.session_state.jobs_polling:
+        show_live_jobs(sp)
+    else:
+        render_jobs(queue, jobs)
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+@profiled
+def show_live_jobs(sp):
+    """Live progress of the user's jobs; reruns the page when one started by this session finishes."""
+    queue = get_job_queue()
+    pending = st.session_state.setdefault('pending_jobs', {})
+    finished = [job_id for job_id in pending if queue.get(job_id) is None or not queue.get(job_id).active]
+    if finished:
+        for job_id in finished:
+            on_success = pending.pop(job_id)
+            job = queue.get(job_id)
+            if job is not None and job.status == 'succeeded' and on_success:
+                on_success(job)
+        st.rerun()
+    jobs = queue.list(owner=get_current_user_id(sp))
+    if not any(job.active for job in jobs):
+        # Nothing left to poll; a full rerun swaps this fragment for the static list
+        st.rerun()
+    render_jobs(queue, jobs)
+
+def render_jobs(queue, jobs):
+    if not jobs:
+        return
+    running = sum(job.active for job in jobs)
+    icons = {'succeeded': "✅", 'failed': "❌", 'cancelled': "⏹️"}
+    with st.expander(f"Jobs ({running} running)", expanded=running > 0):
+        for job in jobs[:10]:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                if job.active:
+                    st.progress(job.fraction, text=f"{job.label} - {job.message or job.status}")
+                else:
+                    st.markdown(f"{icons.get(job.status, '')} **{job.label}** - {job.message}")
+            with col2:
+                if job.active:
+                    if st.button("Cancel", key=f"cancel_job_{job.id}"):
+                        queue.cancel(job.id)
+                elif st.button("Dismiss", key=f"dismiss_job_{job.id}"):
+                    queue.remove(job.id)
+                    st.rerun()
+
+def create_playlist_from_tracks(sp, tracks_with_counts, playlist_name, progress):
+    """Job body: create the playlist and add the interleaved tracks."""
+    interleaved_tracks = interleave_tracks(tracks_with_counts)
+    if not interleaved_tracks:
+        raise ValueError("No tracks could be added to the playlist.")
+    playlist_id = create_playlist(sp, playlist_name, interleaved_tracks, on_progress=progress)
+    return f"Created playlist '{playlist_name}' with {len(interleaved_tracks)} tracks!", playlist_id
+
+def save_tracks_to_liked_songs(sp, track_ids, progress):
+    """Job body: save tracks to Liked Songs, skipping those already saved."""
+    saved, already_saved = save_tracks_to_library(sp, track_ids, on_progress=progress)
+    return f"Saved {saved} tracks to Liked Songs ({already_saved} were already saved)", saved
+
+def save_playlists_to_liked_songs(sp, playlist_ids, progress):
+    """Job body: save every track of the playlists to Liked Songs."""
+    saved, already_saved = save_playlists_to_library(sp, playlist_ids, on_progress=progress)
+    return f"Saved {saved} tracks to Liked Songs ({already_saved} were already saved)", saved
 
 def initialize_session_state():
     if 'selected_tracks' not in st.session_state:
-        st.session_state.selected_tracks = []
+        st.session_state.selected_tracks = TrackSelection()
+    if 'selection_version' not in st.session_state:
+        st.session_state.selection_version = 0
     if 'artist_albums' not in st.session_state:
         st.session_state.artist_albums = []
     if 'album_tracks' not in st.session_state:
         st.session_state.album_tracks = []
+    if 'track_results' not in st.session_state:
+        st.session_state.track_results = []
     if 'keyboard_shortcuts' not in st.session_state:
         st.session_state.keyboard_shortcuts = True
 
+def get_current_user_id(sp):
+    """Current user's id, fetched once per session."""
+    if 'user_id' not in st.session_state:
+        st.session_state.user_id = sp.current_user()["id"]
+    return st.session_state.user_id
+
+@profiled
+def restore_selection(sp):
+    """Load the user's saved selection the first time a session connects."""
+    if st.session_state.get('selection_restored'):
+        return
+    st.session_state.selection_restored = True
+    if not st.session_state.selected_tracks:
+        st.session_state.selected_tracks = load_selection(selection_path(SELECTION_DIR, get_current_user_id(sp)))
+        st.session_state.selection_version += 1
+
+def mark_selection_changed():
+    """Note a selection change; it is written to disk once by ``flush_selection`` at the end of the rerun."""
+    st.session_state.selection_version += 1
+    st.session_state.selection_dirty = True
+
+def flush_selection(sp):
+    """Save the selection if it changed during this rerun."""
+    if st.session_state.get('selection_dirty'):
+        st.session_state.selection_dirty = False
+        save_selection(st.session_state.selected_tracks, selection_path(SELECTION_DIR, get_current_user_id(sp)))
+
+def add_to_selection(sp, tracks):
+    """Add tracks to the selection. Returns how many were new."""
+    added = st.session_state.selected_tracks.add_many(tracks)
+    if added:
+        mark_selection_changed()
+    return added
+
+def remove_from_selection(sp, track_ids):
+    removed = st.session_state.selected_tracks.remove_many(track_ids)
+    if removed:
+        mark_selection_changed()
+    return removed
+
+def get_discography_tracks(sp, albums):
+    """Fetch the tracks of every album concurrently, preserving album order."""
+    for album in albums:
+        prefetch_album_tracks(sp, album.id)
+    tracks = []
+    for album in albums:
+        tracks.extend(get_album_tracks(sp, album.id))
+    return tracks
+
+@profiled
 def show_artist_search(sp):
     st.subheader("🔍 Search Artist")
     artist_name = st.text_input("Enter artist name", key="artist_search")
     if artist_name:
-        with st.spinner("Searching for artists..."):
-            artists = search_artists(sp, artist_name)
+        artists = search_with_local_suggestions(
+            'artist', artist_name, lambda: search_artists(sp, artist_name), "Searching for artists..."
+        )
         if artists:
+            # Warm the cache for the most likely next click while results are on screen
+            prefetch_artist_discography(sp, artists[0].id)
             st.write("Select an artist:")
             cols = st.columns(5)
-            for idx, artist in enumerate(artists):
+            images = get_thumbnails(artists, ARTIST_THUMB_WIDTH)
+            for idx, (artist, image) in enumerate(zip(artists, images)):
                 with cols[idx % 5]:
                     with st.container():
-                        if artist['images']:
-                            st.image(artist['images'][0]['url'], width=150, use_container_width=True)
-                        st.markdown(f"**{artist['name']}**")
+                        if image:
+                            st.image(image, use_container_width=True)
+                        st.markdown(f"**{artist.name}**")
                         if st.button(f"Select", key=f"artist_{idx}"):
-                            with st.spinner(f"Loading albums by {artist['name']}..."):
-                                st.session_state.artist_albums = get_artist_albums(sp, artist['id'])
+                            with st.spinner(f"Loading albums by {artist.name}..."):
+                                st.session_state.artist_albums = get_artist_albums(sp, artist.id)
                                 st.rerun()
+    if st.session_state.artist_albums:
+        prefetch_album_tracks(sp, st.session_state.artist_albums[0].id)
+        st.subheader("Albums")
+        if st.button("Add Discography", key="add_discography"):
+            with st.spinner("Loading every album..."):
+                added = add_to_selection(sp, get_discography_tracks(sp, st.session_state.artist_albums))
+            show_notification(f"Added {added} tracks to selection", "success")
+        cols = st.columns(4)
+        images = get_thumbnails(st.session_state.artist_albums, ALBUM_THUMB_WIDTH)
+        for idx, (album, image) in enumerate(zip(st.session_state.artist_albums, images)):
+            with cols[idx % 4]:
+                with st.container():
+                    if image:
+                        st.image(image, use_container_width=True)
+                    st.markdown(f"**{album.name}**")
+                    if st.button(f"View Tracks", key=f"album_{idx}"):
+                        with st.spinner(f"Loading tracks from {album.name}..."):
+                            st.session_state.album_tracks = get_album_tracks(sp, album.id)
+                            st.rerun()
 
+@profiled
 def show_album_search(sp):
     st.subheader("🔍 Search Album")
     album_name = st.text_input("Enter album name", key="album_search")
     if album_name:
-        with st.spinner("Searching for albums..."):
-            results = sp.search(q=album_name, type='album', limit=8)
-            albums = results['albums']['items']
+        albums = search_with_local_suggestions(
+            'album', album_name,
+            lambda: search_albums(sp, album_name),
+            "Searching for albums..."
+        )
         if albums:
+            prefetch_album_tracks(sp, albums[0].id)
             cols = st.columns(4)
-            for idx, album in enumerate(albums):
+            images = get_thumbnails(albums, ALBUM_THUMB_WIDTH)
+            for idx, (album, image) in enumerate(zip(albums, images)):
                 with cols[idx % 4]:
                     with st.container():
-                        if album['images']:
-                            st.image(album['images'][0]['url'], width=200, use_container_width=True)
-                        st.markdown(f"**{album['name']}**")
-                        st.markdown(f"*{album['artists'][0]['name']}*")
+                        if image:
+                            st.image(image, use_container_width=True)
+                        st.markdown(f"**{album.name}**")
+                        st.markdown(f"*{album.artist_names}*")
                         if st.button(f"View Tracks", key=f"album_search_{idx}"):
-                            with st.spinner(f"Loading tracks from {album['name']}..."):
-                                st.session_state.album_tracks = get_album_tracks(sp, album['id'])
+                            with st.spinner(f"Loading tracks from {album.name}..."):
+                                st.session_state.album_tracks = get_album_tracks(sp, album.id)
                                 st.rerun()
 
+@profiled
 def show_track_search(sp):
     st.subheader("🔍 Search Track")
     track_name = st.text_input("Enter track name", key="track_search")
     if track_name:
-        with st.spinner("Searching for tracks..."):
-            artist_match = re.search(r'(?:by|By)\s*([^-]+)', track_name)
-            artist_query = artist_match.group(1).strip() if artist_match else ''
-            query = f"{clean_song_name(track_name)} {artist_query}".strip()
-            results = sp.search(q=query, limit=50, type="track")
-            tracks = results["tracks"]["items"]
-            best_match = find_best_match(track_name, tracks)
-            if best_match:
-                tracks = [best_match] + [t for t in tracks if t['id'] != best_match['id']][:9]
-                show_notification("Found best matching track!", "info")
-            elif not tracks:
-                show_notification("No tracks found matching your search.", "warning")
-        if tracks:
-            st.write("Select tracks to add to playlist:")
-            for track in tracks:
-                with st.container():
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.markdown(f"**{track['name']}** - *{', '.join([artist['name'] for artist in track['artists']])}*")
-                    with col2:
-                        if st.button("Add", key=f"track_{track['id']}"):
-                            track_info = {
-                                'name': track['name'],
-                                'id': track['id'],
-                                'artists': ', '.join([artist['name'] for artist in track['artists']])
-                            }
-                            if track_info not in st.session_state.selected_tracks:
-                                st.session_state.selected_tracks.append(track_info)
-                                show_notification(f"Added {track['name']} to selection", "success")
+        # Field-qualified stages stop as soon as one returns a confident match
+        tracks = search_with_local_suggestions(
+            'track', track_name,
+            lambda: staged_track_search(sp, track_name)[0],
+            "Searching for tracks..."
+        )
+        parsed = parse_search_input(track_name)
+        best_match = tracks[0] if tracks and score_track_match(parsed, tracks[0]) >= 0.6 else None
+        if best_match:
+            tracks = tracks[:10]
+            show_notification("Found best matching track!", "info")
+        elif not tracks:
+            show_notification("No tracks found matching your search.", "warning")
+        # Rendered by the selection panel so adding a result does not repeat the search
+        st.session_state.track_results = tracks
+    else:
+        st.session_state.track_results = []
+
+@profiled
+def show_track_results(sp):
+    if st.session_state.track_results:
+        st.write("Select tracks to add to playlist:")
+        for track in st.session_state.track_results:
+            with st.container():
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    st.markdown(f"**{track.name}** - *{track.artist_names}*")
+                with col2:
+                    if st.button("Add", key=f"result_{track.id}"):
+                        if add_to_selection(sp, [track]):
+                            show_notification(f"Added {track.name} to selection", "success")
+
+@st.fragment
+@profiled
+def show_selection_panel(sp):
+    """Search results, album tracks and the selection, rerun on their own when tracks are added or removed."""
+    submitted = len(st.session_state.get('pending_jobs', {}))
+    try:
+        show_track_results(sp)
+        show_album_tracks(sp)
+        show_playlist_creation(sp)
+    finally:
+        # A fragment rerun never reaches the end of main, so save any changes here too
+        flush_selection(sp)
+    if len(st.session_state.get('pending_jobs', {})) > submitted and not st.session_state.get('jobs_polling'):
+        # The jobs panel only polls while jobs are running; start it for the job just submitted
+        st.rerun()
 
+@profiled
 def show_album_tracks(sp):
     if st.session_state.album_tracks:
         st.subheader("Album Tracks")
+        if st.button("Add All", key="add_album"):
+            added = add_to_selection(sp, st.session_state.album_tracks)
+            show_notification(f"Added {added} tracks to selection", "success")
         for track in st.session_state.album_tracks:
             with st.container():
                 col1, col2 = st.columns([3, 1])
                 with col1:
-                    st.markdown(f"**{track['name']}** - *{track['artists']}*")
+                    st.markdown(f"**{track.name}** - *{track.artist_names}*")
                 with col2:
-                    if st.button("Add", key=f"track_{track['id']}"):
-                        if track not in st.session_state.selected_tracks:
-                            st.session_state.selected_tracks.append(track)
-                            show_notification(f"Added {track['name']} to selection", "success")
+                    if st.button("Add", key=f"track_{track.id}"):
+                        if add_to_selection(sp, [track]):
+                            show_notification(f"Added {track.name} to selection", "success")
 
+@profiled
 def show_playlist_creation(sp):
-    if st.session_state.selected_tracks:
+    selection = st.session_state.selected_tracks
+    if selection:
+        # Heavy imports are deferred to the panels that use them to keep cold start fast
+        import pandas as pd
         st.header("Create Playlist")
-        st.write("Selected Tracks:")
-        tracks_with_counts = []
-        for track in st.session_state.selected_tracks:
-            with st.container():
-                col1, col2, col3 = st.columns([3, 1, 1])
-                with col1:
-                    st.markdown(f"**{track['name']}** - *{track['artists']}*")
-                with col2:
-                    count = st.number_input("Count", min_value=1, max_value=50, value=1, key=f"count_{track['id']}")
-                with col3:
-                    if st.button("Remove", key=f"remove_{track['id']}"):
-                        st.session_state.selected_tracks.remove(track)
-                        st.rerun()
-                tracks_with_counts.append({'id': track['id'], 'count': count})
+        st.write(f"Selected Tracks ({len(selection)}):")
+        tracks = list(selection)
+        table = pd.DataFrame({
+            'Name': [track.name for track in tracks],
+            'Artists': [track.artist_names for track in tracks],
+            'Count': [selection.count(track.id) for track in tracks],
+            'Remove': [False] * len(tracks),
+        }, index=[track.id for track in tracks])
+        # One table widget instead of a count input and remove button per track
+        edited = st.data_editor(
+            table,
+            key=f"selection_table_{st.session_state.selection_version}",
+            hide_index=True,
+            use_container_width=True,
+            disabled=['Name', 'Artists'],
+            column_config={
+                'Count': st.column_config.NumberColumn("Count", min_value=1, max_value=50, step=1),
+                'Remove': st.column_config.CheckboxColumn("Remove", default=False)
+            }
+        )
+        for track_id, count in edited['Count'].items():
+            if pd.notna(count) and int(count) != selection.count(track_id):
+                selection.set_count(track_id, count)
+                st.session_state.selection_dirty = True
+        marked = edited.index[edited['Remove']].tolist()
+        col1, col2 = st.columns(2)
+        with col1:
+            if marked and st.button(f"Remove {len(marked)} Marked"):
+                remove_from_selection(sp, marked)
+                st.rerun(scope="fragment")
+        with col2:
+            if st.button("Clear Selection"):
+                remove_from_selection(sp, [track.id for track in tracks])
+                st.rerun(scope="fragment")
         playlist_name = st.text_input("Playlist Name", value=f"My Mix - {datetime.now().strftime('%B %d, %Y')}")
         if st.button("Create Playlist"):
-            success, message = create_playlist_from_tracks(sp, tracks_with_counts, playlist_name)
-            if success:
-                st.success(message)
-                st.session_state.selected_tracks = []
-            else:
-                st.error(message)
+            tracks_with_counts = selection.tracks_with_counts()
+            track_ids = [track.id for track in tracks]
 
-def get_playlist_analytics(sp, playlist_id):
-    """Get simplified analytics for a playlist with visual feedback."""
-    try:
-        with st.status("Analyzing playlist...", expanded=True) as status:
-            status.write("Fetching playlist tracks...")
-            results = sp.playlist_tracks(playlist_id)
-            tracks = results['items']
-            
-            # Initialize counters and data structures
-            track_data = {
-                'artists': Counter(),
-                'artist_durations': Counter(),  # Track duration per artist
-                'albums': Counter(),
-                'release_years': Counter(),
-                'duration_ms': 0,
-                'explicit_count': 0,
-                'popularity_data': []
-            }
-            
-            # Process tracks with progress bar
-            status.write("Processing track information...")
-            progress_bar = st.progress(0)
-            for i, item in enumerate(tracks):
-                if item['track']:
-                    track = item['track']
-                    
-                    # Update progress
-                    progress = (i + 1) / len(tracks)
-                    progress_bar.progress(progress, text=f"Analyzing tracks... {int(progress * 100)}%")
-                    
-                    # Basic track info
-                    track_duration = track['duration_ms']
-                    track_data['duration_ms'] += track_duration
-                    if track['explicit']:
-                        track_data['explicit_count'] += 1
-                    
-                    # Artist info and duration
-                    for artist in track['artists']:
-                        track_data['artists'][artist['name']] += 1
-                        track_data['artist_durations'][artist['name']] += track_duration
-                    
-                    # Album info
-                    album_name = track['album']['name']
-                    track_data['albums'][album_name] += 1
-                    
-                    # Release year
-                    release_year = track['album']['release_date'][:4]
-                    track_data['release_years'][int(release_year)] += 1
-                    
-                    # Popularity
-                    if track['popularity'] is not None:
-                        track_data['popularity_data'].append(track['popularity'])
-            
-            status.write("Generating insights...")
-            
-            # Calculate additional metrics
-            total_tracks = len(tracks)
-            total_duration_minutes = track_data['duration_ms'] / (1000 * 60)
-            hours = int(total_duration_minutes // 60)
-            minutes = int(total_duration_minutes % 60)
-            
-            avg_popularity = sum(track_data['popularity_data']) / len(track_data['popularity_data']) if track_data['popularity_data'] else 0
-            
-            # Process artist durations
-            artist_durations_formatted = {}
-            for artist, duration in track_data['artist_durations'].items():
-                artist_minutes = duration / (1000 * 60)
-                artist_hours = int(artist_minutes // 60)
-                artist_mins = int(artist_minutes % 60)
-                artist_durations_formatted[artist] = f"{artist_hours}h {artist_mins}m"
-            
-            # Create analytics dict
-            analytics = {
-                'total_tracks': total_tracks,
-                'total_duration': f"{hours}h {minutes}m",
-                'total_artists': len(track_data['artists']),
-                'explicit_percentage': (track_data['explicit_count'] / total_tracks) * 100 if total_tracks > 0 else 0,
-                'avg_popularity': avg_popularity,
-                'top_artists': dict(track_data['artists'].most_common(10)),
-                'artist_durations': artist_durations_formatted,
-                'top_albums': dict(track_data['albums'].most_common(10)),
-                'release_years': dict(sorted(track_data['release_years'].items())),
-                'decade_distribution': get_decade_distribution(track_data['release_years'])
-            }
-            
-            status.update(label="Analysis complete!", state="complete")
-            return analytics
-            
-    except Exception as e:
-        st.error(f"Error analyzing playlist: {str(e)}")
-        return {
-            'total_tracks': 0,
-            'total_duration': "0h 0m",
-            'total_artists': 0,
-            'explicit_percentage': 0,
-            'avg_popularity': 0,
-            'top_artists': {},
-            'artist_durations': {},
-            'top_albums': {},
-            'release_years': {},
-            'decade_distribution': {}
-        }
+            def on_created(job):
+                invalidate_library()
+                remove_from_selection(sp, track_ids)
 
-def get_decade_distribution(release_years):
-    """Calculate distribution of tracks by decade."""
-    decades = Counter()
-    for year, count in release_years.items():
-        decade = (year // 10) * 10
-        decades[f"{decade}s"] += count
-    return dict(sorted(decades.items()))
+            submit_job(sp, 'create', f"Create '{playlist_name}'",
+                       lambda progress: create_playlist_from_tracks(sp, tracks_with_counts, playlist_name, progress),
+                       on_success=on_created)
+            show_notification(f"Creating '{playlist_name}' in the background", "info")
+        if st.button("Save to Liked Songs", key="save_selection_liked"):
+            track_ids = [track.id for track in tracks]
+            submit_job(sp, 'save', f"Save {len(track_ids)} tracks to Liked Songs",
+                       lambda progress: save_tracks_to_liked_songs(sp, track_ids, progress))
+            show_notification("Saving the selection to Liked Songs in the background", "info")
+
+def analyze_playlist(sp, playlist_id, index, progress):
+    """Job body: fetch every track of a playlist and summarize it."""
+    tracks = fetch_playlist_tracks(sp, playlist_id)
+    index.add_many('track', tracks)
+    return "Analysis complete!", summarize_tracks(tracks, on_progress=progress)
+
+def get_analytics_cache():
+    """This session's analytics results by ``(playlist_id, snapshot_id)``, bounded in bytes."""
+    if 'analytics_cache' not in st.session_state:
+        st.session_state.analytics_cache = BoundedCache(ANALYTICS_CACHE_BYTES)
+    return st.session_state.analytics_cache
+
+def request_playlist_analytics(sp, playlist):
+    """Show a playlist's analytics, analyzing it in a background job unless the result is cached."""
+    cache = get_analytics_cache()
+    job_id = None
+    if not (playlist.snapshot_id and (playlist.id, playlist.snapshot_id) in cache):
+        index = get_catalog_index()
+        job_id = submit_job(sp, 'analytics', f"Analyze '{playlist.name}'",
+                            lambda progress: analyze_playlist(sp, playlist.id, index, progress))
+    st.session_state.analytics_request = (playlist, job_id)
+
+@profiled
+def show_requested_analytics(sp):
+    """Render the most recently requested analytics once its job has finished."""
+    request = st.session_state.get('analytics_request')
+    if not request:
+        return
+    playlist, job_id = request
+    # Results stay valid until the playlist's snapshot changes
+    cache = get_analytics_cache()
+    key = (playlist.id, playlist.snapshot_id)
+    if job_id is None:
+        analytics = cache.get(key)
+        if analytics is None:
+            # Evicted from the byte-bounded cache since it was shown
+            request_playlist_analytics(sp, playlist)
+            show_notification("Analyzing playlist in the background...", "info")
+            return
+    else:
+        job = get_job_queue().get(job_id)
+        if job is None or job.status in ('failed', 'cancelled'):
+            show_notification(job.message if job else "The analytics job was dismissed.", "error")
+            return
+        if job.active:
+            show_notification("Analyzing playlist in the background...", "info")
+            return
+        analytics = job.result
+        if playlist.snapshot_id:
+            cache[key] = analytics
+            st.session_state.analytics_request = (playlist, None)
+    if st.button("Close Analytics", key="close_analytics"):
+        st.session_state.analytics_request = None
+        st.rerun()
+    display_playlist_analytics(analytics)
 
-def display_playlist_analytics(sp, playlist_id):
+def display_playlist_analytics(analytics):
     """Display enhanced analytics visualizations for a playlist."""
-    with st.spinner("Loading analytics..."):
-        analytics = get_playlist_analytics(sp, playlist_id)
+    import pandas as pd
     
     # Create a container for analytics
     analytics_container = st.container()
@@ -539,35 +816,12 @@ def display_playlist_analytics(sp, playlist_id):
                 })
             st.table(pd.DataFrame(year_data))
 
-def enhanced_track_search(sp, track_name, filters=None):
-    """Enhanced track search with filters."""
-    if filters is None:
-        filters = {}
-    
-    # Build search query
-    query = track_name
-    if 'year' in filters:
-        query += f" year:{filters['year']}"
-    
-    # Initial search
-    results = sp.search(q=query, limit=50, type="track")
-    tracks = results["tracks"]["items"]
-    
-    # Apply additional filters
-    if 'min_popularity' in filters:
-        tracks = [t for t in tracks if t['popularity'] >= filters['min_popularity']]
-    
-    if 'genre' in filters:
-        filtered_tracks = []
-        for track in tracks:
-            artist_id = track['artists'][0]['id']
-            artist = sp.artist(artist_id)
-            if filters['genre'].lower() in [g.lower() for g in artist['genres']]:
-                filtered_tracks.append(track)
-        tracks = filtered_tracks
-    
-    return tracks
+@st.cache_resource
+def get_artist_genre_cache():
+    """Artist id to genre set, shared so repeated filtered searches skip artist lookups."""
+    return {}
 
+@profiled
 def show_enhanced_track_search(sp):
     st.subheader("🔍 Enhanced Track Search")
     
@@ -591,100 +845,322 @@ def show_enhanced_track_search(sp):
         }
         filters = {k: v for k, v in filters.items() if v is not None}
         
+        # Render each filtered page as soon as it arrives while later pages are fetched
+        status_placeholder = st.empty()
+        found = 0
         with st.spinner("Searching for tracks..."):
-            tracks = enhanced_track_search(sp, track_name, filters)
+            for tracks in iter_filtered_track_search(sp, track_name, filters,
+                                                     genre_cache=get_artist_genre_cache()):
+                get_catalog_index().add_many('track', tracks)
+                found += len(tracks)
+                with status_placeholder:
+                    show_notification(f"Found {found} tracks matching your criteria...", "info")
+                for track in tracks:
+                    with st.container():
+                        col1, col2, col3 = st.columns([2, 1, 1])
+                        with col1:
+                            st.markdown(f"**{track.name}** - *{track.artist_names}*")
+                        with col2:
+                            st.markdown(f"Popularity: {track.popularity}")
+                        with col3:
+                            if st.button("Add", key=f"track_{track.id}"):
+                                if add_to_selection(sp, [track]):
+                                    show_notification(f"Added {track.name} to selection", "success")
         
-        if tracks:
-            show_notification(f"Found {len(tracks)} tracks matching your criteria!", "info")
-            for track in tracks:
-                with st.container():
-                    col1, col2, col3 = st.columns([2, 1, 1])
-                    with col1:
-                        st.markdown(f"**{track['name']}** - *{', '.join([artist['name'] for artist in track['artists']])}*")
-                    with col2:
-                        st.markdown(f"Popularity: {track['popularity']}")
-                    with col3:
-                        if st.button("Add", key=f"track_{track['id']}"):
-                            track_info = {
-                                'name': track['name'],
-                                'id': track['id'],
-                                'artists': ', '.join([artist['name'] for artist in track['artists']])
-                            }
-                            if track_info not in st.session_state.selected_tracks:
-                                st.session_state.selected_tracks.append(track_info)
-                                show_notification(f"Added {track['name']} to selection", "success")
-        else:
-            show_notification("No tracks found matching your criteria.", "warning")
+        with status_placeholder:
+            if found:
+                show_notification(f"Found {found} tracks matching your criteria!", "info")
+            else:
+                show_notification("No tracks found matching your criteria.", "warning")
 
 def export_playlist_to_file(sp, playlist_id, format="csv"):
-    """Export playlist tracks to a file."""
-    results = sp.playlist_tracks(playlist_id)
-    tracks = []
-    
-    for item in results['items']:
-        if item['track']:
-            track = item['track']
-            track_info = {
-                'name': track['name'],
-                'artists': ', '.join([artist['name'] for artist in track['artists']]),
-                'album': track['album']['name'],
-                'id': track['id'],
-                'duration_ms': track['duration_ms'],
-                'popularity': track.get('popularity', 0)
-            }
-            tracks.append(track_info)
-    
-    df = pd.DataFrame(tracks)
-    
-    if format == "csv":
-        return df.to_csv(index=False).encode('utf-8')
+    """Export playlist tracks to bytes for a download button, built only when the user asks to export."""
+    buffer = io.BytesIO()
+    stream_playlist_export(sp, playlist_id, buffer, format)
+    return buffer.getvalue()
+
+@profiled
+def show_bulk_export(sp, playlists):
+    """Export a selection of playlists into a single zip archive."""
+    st.sidebar.markdown("### Bulk Export")
+    names = {p.id: p.name for p in playlists}
+    export_all = st.sidebar.checkbox("Export all playlists", key="bulk_export_all")
+    if export_all:
+        selected_ids = list(names)
+    else:
+        selected_ids = st.sidebar.multiselect(
+            "Playlists to export", list(names), format_func=lambda pid: names[pid], key="bulk_export_ids"
+        )
+    export_format = st.sidebar.selectbox("Archive format", EXPORT_FORMAT_LABELS, key="bulk_export_format").lower()
+    built = False
+    if selected_ids and st.sidebar.button("Build Archive"):
+        selected = [p for p in playlists if p.id in set(selected_ids)]
+        build_export_archive(sp, selected, export_format, st.sidebar)
+        built = True
+    show_archive_download(st.sidebar, prepared=built)
+
+def build_export_archive(sp, playlists, export_format, container):
+    """Export playlists into a zip and keep it in the session for the download button.
+
+    The archive is spooled, so small ones stay in memory and large ones go to
+    an anonymous temporary file that is deleted once the session drops it.
+    """
+    progress_bar = container.progress(0)
+    discard_export_archive()
+    archive_file = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+    results = export_playlists_to_zip(
+        sp, playlists, archive_file, export_format,
+        on_progress=lambda done, total: progress_bar.progress(done / total)
+    )
+    st.session_state.bulk_export_archive = archive_file
+    errors = [message for status, message in results if status == "error"]
+    if errors:
+        show_notification(f"{len(errors)} playlist(s) failed to export", "warning")
     else:
-        return df.to_json(orient='records')
+        show_notification(f"Exported {len(results)} playlists", "success")
+
+def discard_export_archive():
+    archive_file = st.session_state.pop('bulk_export_archive', None)
+    if archive_file is not None:
+        archive_file.close()
+
+def show_archive_download(container, prepared=False):
+    """Offer the built archive for download.
+
+    Streamlit keeps download data in memory, so the archive is only read for
+    the run that builds it or after "Prepare Download", and dropped once served.
+    """
+    archive_file = st.session_state.get('bulk_export_archive')
+    if archive_file is None:
+        return
+    if not (prepared or container.button("Prepare Download", key=f"archive_prepare_{id(container)}")):
+        return
+    archive_file.seek(0)
+    container.download_button(
+        label="Download Archive",
+        data=archive_file.read(),
+        file_name=f"playlists-{datetime.now().strftime('%Y%m%d')}.zip",
+        mime="application/zip",
+        key=f"archive_download_{id(container)}",
+        on_click=discard_export_archive
+    )
 
 def import_playlist_from_file(sp, file, playlist_name=None):
-    """Import tracks from a file into a new playlist."""
+    """Read an uploaded file and import its tracks into a new playlist in a background job."""
     try:
-        if file.name.endswith('.csv'):
-            df = pd.read_csv(file)
-        else:
-            df = pd.read_json(file)
-        
-        track_ids = df['id'].tolist()
-        if not playlist_name:
-            playlist_name = f"Imported Playlist - {datetime.now().strftime('%B %d, %Y')}"
-        
-        # Create new playlist
-        user_id = sp.current_user()["id"]
-        playlist = sp.user_playlist_create(user_id, playlist_name, public=False)
-        
-        # Add tracks in batches
-        for i in range(0, len(track_ids), 100):
-            batch = track_ids[i:i+100]
-            sp.playlist_add_items(playlist["id"], batch)
-        
-        return True, f"Successfully imported {len(track_ids)} tracks to playlist '{playlist_name}'"
+        records = read_track_records(file, file.name)
     except Exception as e:
         return False, f"Error importing playlist: {str(e)}"
+    indexable = [record for record in records if record.get('id') and record.get('name') and record.get('artists')]
+    get_catalog_index().add_many('track', [Track.from_dict(record) for record in indexable])
+    if not playlist_name:
+        playlist_name = f"Imported Playlist - {datetime.now().strftime('%B %d, %Y')}"
 
-def sort_playlists(playlists, sort_by="name", reverse=False):
-    """Sort playlists by different criteria."""
-    if sort_by == "name":
-        return sorted(playlists, key=lambda x: x['name'].lower(), reverse=reverse)
-    elif sort_by == "tracks":
-        return sorted(playlists, key=lambda x: x['tracks']['total'], reverse=reverse)
-    elif sort_by == "owner":
-        return sorted(playlists, key=lambda x: x['owner']['display_name'].lower(), reverse=reverse)
-    return playlists
-
-def filter_playlists(playlists, filter_text):
-    """Filter playlists by name or owner."""
-    if not filter_text:
-        return playlists
-    filter_text = filter_text.lower()
-    return [p for p in playlists if 
-            filter_text in p['name'].lower() or 
-            filter_text in p['owner']['display_name'].lower()]
+    def run(progress):
+        playlist_id, track_count = import_playlist(sp, records, playlist_name, on_progress=progress)
+        return f"Successfully imported {track_count} tracks to playlist '{playlist_name}'", playlist_id
 
+    submit_job(sp, 'import', f"Import '{playlist_name}'", run, on_success=lambda job: invalidate_library())
+    return True, f"Importing {len(records)} tracks into '{playlist_name}' in the background"
+
+def get_playlist_catalog(playlists, user_id):
+    """Filter and sort index over the library, rebuilt only when the library list is replaced."""
+    catalog = st.session_state.get('playlist_catalog')
+    if catalog is None or catalog.playlists is not playlists or catalog.user_id != user_id:
+        catalog = st.session_state.playlist_catalog = PlaylistCatalog(playlists, user_id)
+    return catalog
+
+def paginate(items, page, page_size):
+    """Return the items on a 1-based page, the clamped page number and the page count."""
+    page_count = max(1, -(-len(items) // page_size))
+    page = min(max(page, 1), page_count)
+    start = (page - 1) * page_size
+    return items[start:start + page_size], page, page_count
+
+@profiled
+def show_playlist_table(sp, playlists, section_type):
+    """Render one page of playlists as a single table with bulk actions.
+
+    Only the visible page is sent to the browser, and the action widgets are
+    created once per section instead of once per playlist.
+    """
+    if not playlists:
+        return
+    import pandas as pd
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        page_size = st.selectbox("Rows per page", PLAYLIST_PAGE_SIZES, key=f"{section_type}_page_size")
+    page_count = max(1, -(-len(playlists) // page_size))
+    # The stored page can be past the end after a bigger page size or a bulk delete
+    if st.session_state.get(f"{section_type}_page", 1) > page_count:
+        st.session_state[f"{section_type}_page"] = page_count
+    with col2:
+        page = st.selectbox("Page", range(1, page_count + 1), key=f"{section_type}_page",
+                            format_func=lambda n: f"{n} of {page_count}")
+    page_items, page, page_count = paginate(playlists, page, page_size)
+    
+    table = pd.DataFrame({
+        'Select': [False] * len(page_items),
+        'Name': [p.name for p in page_items],
+        'Owner': [p.owner_name for p in page_items],
+        'Tracks': [p.track_count for p in page_items],
+    }, index=[p.id for p in page_items])
+    edited = st.data_editor(
+        table,
+        key=f"{section_type}_table_{page}_{page_size}",
+        hide_index=True,
+        use_container_width=True,
+        disabled=['Name', 'Owner', 'Tracks'],
+        column_config={'Select': st.column_config.CheckboxColumn("Select", default=False)}
+    )
+    selected_ids = set(edited.index[edited['Select']])
+    if not selected_ids:
+        return
+    selected = [p for p in page_items if p.id in selected_ids]
+    
+    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+    with col1:
+        analytics_id = st.selectbox("Analytics for", [p.id for p in selected], key=f"{section_type}_analytics_id",
+                                    format_func=lambda pid: next(p.name for p in selected if p.id == pid))
+        show_analytics = st.button("View Analytics", key=f"{section_type}_analytics")
+    with col2:
+        export_format = st.selectbox("Format", EXPORT_FORMAT_LABELS, key=f"{section_type}_export_format").lower()
+        if st.button("Export Selected", key=f"{section_type}_export"):
+            if len(selected) == 1:
+                st.download_button(
+                    label="Download",
+                    data=export_playlist_to_file(sp, selected[0].id, export_format),
+                    file_name=safe_export_name(selected[0].name, export_format),
+                    mime=EXPORT_FORMATS[export_format]['mime']
+                )
+            else:
+                build_export_archive(sp, selected, export_format, st)
+                show_archive_download(st, prepared=True)
+    with col3:
+        button_text = "Delete Selected" if section_type == "owned" else "Unfollow Selected"
+        if st.button(button_text, key=f"{section_type}_delete"):
+            results = delete_playlists(sp, [p.id for p in selected])
+            invalidate_library()
+            handle_spotify_operation_result(results)
+    with col4:
+        if st.button("Save to Liked Songs", key=f"{section_type}_save_liked"):
+            playlist_ids = [p.id for p in selected]
+            submit_job(sp, 'save', f"Save {len(selected)} playlists to Liked Songs",
+                       lambda progress: save_playlists_to_liked_songs(sp, playlist_ids, progress))
+            show_notification("Saving the playlists' tracks to Liked Songs in the background", "info")
+    if show_analytics:
+        request_playlist_analytics(sp, next(p for p in selected if p.id == analytics_id))
+
+def scan_library_playability(sp, playlists, market, path, progress):
+    """Job body: scan owned playlists, reusing saved results for those that haven't changed."""
+    cache = load_scan_cache(path)
+    try:
+        scanned = scan_playlists(sp, playlists, cache, market, on_progress=progress)
+    finally:
+        save_scan_cache(cache, path)
+    flagged = sum(1 for entry in cache.values() if entry['issues'])
+    failed = sum(1 for entry in cache.values() if entry.get('error'))
+    message = f"Scanned {scanned} new or changed playlists; {flagged} have unavailable tracks"
+    # The full results stay in the scan cache file; the job record only keeps counts
+    return message + (f"; {failed} couldn't be read" if failed else ""), {
+        'scanned': scanned, 'flagged': flagged, 'failed': failed}
+
+def fix_library_playability(sp, playlist_ids, replace_relinked, remove_unplayable, path, progress):
+    """Job body: rewrite the marked playlists and drop them from the saved scan results."""
+    cache = load_scan_cache(path)
+    results = fix_playlists(sp, playlist_ids, cache, replace_relinked, remove_unplayable, on_progress=progress)
+    save_scan_cache(cache, path)
+    errors = [message for status, message in results if status == "error"]
+    if errors and len(errors) == len(results):
+        raise RuntimeError(errors[0])
+    message = f"Fixed {len(results) - len(errors)} playlists"
+    return message + (f"; {len(errors)} failed: {errors[0]}" if errors else ""), {
+        'fixed': len(results) - len(errors), 'failed': len(errors)}
+
+def get_playability_results(sp):
+    """The user's saved scan results, loaded once per session and replaced when a scan or fix finishes."""
+    if 'playability' not in st.session_state:
+        st.session_state.playability = load_scan_cache(scan_cache_path(PLAYABILITY_DIR, get_current_user_id(sp)))
+        st.session_state.playability_version = 0
+    return st.session_state.playability
+
+def reload_playability_results(sp):
+    """Reread the saved scan results after a scan or fix job wrote them."""
+    st.session_state.playability = load_scan_cache(scan_cache_path(PLAYABILITY_DIR, get_current_user_id(sp)))
+    st.session_state.playability_version = st.session_state.get('playability_version', 0) + 1
+
+@profiled
+def show_playability_scan(sp, playlists, user_id):
+    """Find tracks in owned playlists that are relinked or unplayable in a market, and fix them in bulk."""
+    owned = [p for p in playlists if p.owner_id == user_id]
+    results = get_playability_results(sp)
+    path = scan_cache_path(PLAYABILITY_DIR, user_id)
+    with st.expander("🩺 Playability Scan"):
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            market = st.text_input("Market", value=DEFAULT_MARKET, key="playability_market",
+                                   help="Two-letter country code, or from_token for your account's country")
+        with col2:
+            if st.button("Scan Owned Playlists", key="playability_scan"):
+                submit_job(sp, 'scan', f"Scan {len(owned)} playlists for unavailable tracks",
+                           lambda progress: scan_library_playability(sp, owned, market, path, progress),
+                           on_success=lambda job: reload_playability_results(sp))
+                show_notification("Scanning in the background; unchanged playlists are skipped", "info")
+        if not results:
+            st.caption("No scan results yet.")
+            return
+        current = {p.id: p for p in owned}
+        changed = sum(1 for pid, entry in results.items()
+                      if pid in current and current[pid].snapshot_id != entry['snapshot_id'])
+        flagged = [(pid, entry) for pid, entry in results.items() if entry['issues'] and pid in current]
+        failed = [entry for pid, entry in results.items() if entry.get('error') and pid in current]
+        st.markdown(f"{len(flagged)} of {len(results)} scanned playlists have relinked or unplayable tracks."
+                    + (f" {changed} changed since the last scan." if changed else ""))
+        for entry in failed:
+            st.warning(f"Couldn't scan '{entry['name']}': {entry['error']}. It is scanned again next time.")
+        if not flagged:
+            return
+        import pandas as pd
+        table = pd.DataFrame({
+            'Fix': [False] * len(flagged),
+            'Playlist': [entry['name'] for _, entry in flagged],
+            'Relinked': [sum(issue['status'] == 'relinked' for issue in entry['issues']) for _, entry in flagged],
+            'Unplayable': [sum(issue['status'] == 'unplayable' for issue in entry['issues']) for _, entry in flagged],
+            'Market': [entry['market'] for _, entry in flagged],
+            'Note': [f"Can't fix: {entry['blocked']}" if entry.get('blocked') else '' for _, entry in flagged],
+        }, index=[pid for pid, _ in flagged])
+        edited = st.data_editor(
+            table,
+            key=f"playability_table_{st.session_state.playability_version}",
+            hide_index=True,
+            use_container_width=True,
+            disabled=['Playlist', 'Relinked', 'Unplayable', 'Market', 'Note'],
+            column_config={'Fix': st.column_config.CheckboxColumn("Fix", default=False)}
+        )
+        details_id = st.selectbox("Details for", [pid for pid, _ in flagged], key="playability_details",
+                                  format_func=lambda pid: results[pid]['name'])
+        st.dataframe([
+            {'#': issue['position'] + 1, 'Track': issue['name'], 'Artists': issue['artists'],
+             'Status': issue['status'], 'Replacement': issue.get('replacement_id') or issue.get('reason', '')}
+            for issue in results[details_id]['issues']
+        ], hide_index=True, use_container_width=True)
+        marked = edited.index[edited['Fix']].tolist()
+        replace_relinked = st.checkbox("Replace relinked tracks with the playable release", value=True,
+                                       key="playability_replace")
+        remove_unplayable = st.checkbox("Remove tracks that can't be played", value=True, key="playability_remove")
+        st.caption("Fixing rewrites the playlist, which resets the tracks' added dates.")
+        if marked and st.button(f"Fix {len(marked)} Marked Playlists", key="playability_fix"):
+            def on_fixed(job):
+                reload_playability_results(sp)
+                invalidate_library()
+
+            submit_job(sp, 'fix', f"Fix {len(marked)} playlists",
+                       lambda progress: fix_library_playability(sp, marked, replace_relinked, remove_unplayable,
+                                                                path, progress),
+                       on_success=on_fixed)
+            show_notification(f"Fixing {len(marked)} playlists in the background", "info")
+
+@profiled
 def show_playlist_manager(sp):
     st.title("Playlist Manager")
     
@@ -702,7 +1178,7 @@ def show_playlist_manager(sp):
     
     # Add Import Playlist section
     st.sidebar.markdown("### Import Playlist")
-    uploaded_file = st.sidebar.file_uploader("Upload playlist file", type=['csv', 'json'])
+    uploaded_file = st.sidebar.file_uploader("Upload playlist file", type=['csv', 'json', 'ndjson', 'parquet'])
     if uploaded_file:
         import_name = st.sidebar.text_input("Playlist Name (optional)")
         if st.sidebar.button("Import Playlist"):
@@ -719,78 +1195,129 @@ def show_playlist_manager(sp):
     filter_text = st.sidebar.text_input("Filter playlists", key="filter_text")
     
     with st.spinner("Loading playlists..."):
-        playlists = get_user_playlists(sp)
-        user_id = sp.current_user()["id"]
+        playlists = get_library(sp)
+        user_id = get_current_user_id(sp)
     
-    owned_playlists = [p for p in playlists if p['owner']['id'] == user_id]
-    followed_playlists = [p for p in playlists if p['owner']['id'] != user_id]
+    show_bulk_export(sp, playlists)
     
     # Apply sorting and filtering
-    owned_playlists = sort_playlists(
-        filter_playlists(owned_playlists, filter_text),
-        sort_by.lower(),
-        sort_order == "Descending"
-    )
-    followed_playlists = sort_playlists(
-        filter_playlists(followed_playlists, filter_text),
-        sort_by.lower(),
-        sort_order == "Descending"
-    )
+    catalog = get_playlist_catalog(playlists, user_id)
+    owned_playlists = catalog.view("owned", sort_by.lower(), sort_order == "Descending", filter_text)
+    followed_playlists = catalog.view("followed", sort_by.lower(), sort_order == "Descending", filter_text)
     
     # Display playlist counts
     st.markdown(f"### Your Playlists ({len(owned_playlists)})")
-    if owned_playlists:
-        for playlist in owned_playlists:
-            playlist_container = st.container()
-            with playlist_container:
-                st.markdown(f"📝 **{playlist['name']}** ({playlist['tracks']['total']} tracks)")
-                col1, col2, col3 = st.columns([2, 1, 1])
-                with col1:
-                    if st.button("View Analytics", key=f"analytics_{playlist['id']}"):
-                        display_playlist_analytics(sp, playlist['id'])
-                with col2:
-                    export_format = st.selectbox("Format", ["CSV", "JSON"], key=f"format_{playlist['id']}")
-                    if st.button("Export", key=f"export_{playlist['id']}"):
-                        file_data = export_playlist_to_file(sp, playlist['id'], export_format.lower())
-                        st.download_button(
-                            label="Download",
-                            data=file_data,
-                            file_name=f"{playlist['name']}.{export_format.lower()}",
-                            mime="text/csv" if export_format == "CSV" else "application/json"
-                        )
-                with col3:
-                    if st.button("Delete", key=f"delete_{playlist['id']}"):
-                        results = delete_playlists(sp, [playlist['id']])
-                        handle_spotify_operation_result(results)
-                st.markdown("---")  # Add a separator between playlists
+    show_playlist_table(sp, owned_playlists, "owned")
     
     st.markdown(f"### Followed Playlists ({len(followed_playlists)})")
-    if followed_playlists:
-        for playlist in followed_playlists:
-            playlist_container = st.container()
-            with playlist_container:
-                st.markdown(f"👥 **{playlist['name']}** ({playlist['tracks']['total']} tracks)")
-                col1, col2, col3 = st.columns([2, 1, 1])
-                with col1:
-                    if st.button("View Analytics", key=f"analytics_followed_{playlist['id']}"):
-                        display_playlist_analytics(sp, playlist['id'])
-                with col2:
-                    export_format = st.selectbox("Format", ["CSV", "JSON"], key=f"format_followed_{playlist['id']}")
-                    if st.button("Export", key=f"export_followed_{playlist['id']}"):
-                        file_data = export_playlist_to_file(sp, playlist['id'], export_format.lower())
-                        st.download_button(
-                            label="Download",
-                            data=file_data,
-                            file_name=f"{playlist['name']}.{export_format.lower()}",
-                            mime="text/csv" if export_format == "CSV" else "application/json"
-                        )
-                with col3:
-                    if st.button("Unfollow", key=f"unfollow_{playlist['id']}"):
-                        results = delete_playlists(sp, [playlist['id']])
-                        handle_spotify_operation_result(results)
-                st.markdown("---")  # Add a separator between playlists
+    show_playlist_table(sp, followed_playlists, "followed")
+    
+    show_playability_scan(sp, playlists, user_id)
+    show_requested_analytics(sp)
+
+@profiled
+def show_developer_panel(sp, since):
+    """Sidebar breakdown of the API calls made during this rerun, plus process totals."""
+    calls = [call for call in list(sp.recent_calls) if call['seq'] > since]
+    st.sidebar.markdown("### API Calls This Rerun")
+    st.sidebar.caption("Includes background prefetches that finished during the rerun.")
+    col1, col2 = st.sidebar.columns(2)
+    col1.metric("Calls", len(calls))
+    col2.metric("API time", f"{sum(call['ms'] for call in calls):.0f} ms")
+    if calls:
+        st.sidebar.table([{k: call[k] for k in ('endpoint', 'status', 'ms', 'bytes')} for call in calls])
+    summary = get_api_metrics().summary()
+    with st.sidebar.expander("Process Totals"):
+        st.table([
+            {k: endpoint[k] for k in ('endpoint', 'calls', 'p50_ms', 'p95_ms', 'errors', 'retries')}
+            for endpoint in summary['endpoints'][:15]
+        ])
+        for name, cache in summary['caches'].items():
+            st.markdown(f"**{name} cache**: {cache['hit_rate']:.0%} hits ({cache['hit']} of {cache['hit'] + cache['miss']})")
+    show_memory_report()
+
+def show_memory_report():
+    """Sidebar summary of the largest memory consumers across all sessions of this process."""
+    report = get_memory_ledger().report()
+    with st.sidebar.expander("Memory"):
+        st.markdown(f"**Total**: {report['total_bytes'] / 2**20:.1f} MB")
+        for name, (size, max_bytes, entries, evictions) in report['shared'].items():
+            st.markdown(f"**{name}**: {size / 2**20:.1f} of {max_bytes / 2**20:.0f} MB, "
+                        f"{entries} entries, {evictions} evicted")
+        st.markdown(f"**Session state**: {report['session_bytes'] / 2**20:.1f} MB over {report['sessions']} sessions "
+                    f"(sampled every {MEMORY_SAMPLE_SECONDS}s)")
+        st.table([{'key': key, 'MB': round(total / 2**20, 2), 'sessions': count}
+                  for key, total, count in report['largest_keys']])
+        st.table([{'session': session_id[:8], 'MB': round(total / 2**20, 2)}
+                  for session_id, total in report['largest_sessions']])
+        allocations = top_allocations()
+        if allocations:
+            st.markdown("**Biggest allocation sites**")
+            st.table([{'location': location, 'MB': round(size / 2**20, 2)} for location, size in allocations])
+        else:
+            st.caption("Set MEMORY_TRACE=1 to list the biggest allocation sites.")
+
+def count_widgets():
+    """Widgets registered so far in this script run, as Streamlit's run context tracks them."""
+    ctx = get_script_run_ctx()
+    return len(ctx.widget_ids_this_run) if ctx is not None else 0
+
+def record_rerun_profile(profiler):
+    """Save the finished rerun's profile to this session's file and show it."""
+    record = profiler.record(st.session_state, exclude=shared_objects())
+    if 'profile_path' not in st.session_state:
+        st.session_state.profile_path = os.path.join(
+            PROFILE_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{secrets.token_hex(3)}.ndjson"
+        )
+    save_profile(record, st.session_state.profile_path)
+    history = st.session_state.setdefault('rerun_profiles', [])
+    history.append({k: v for k, v in record.items() if k not in ('sections', 'state_keys')})
+    del history[:-PROFILE_HISTORY]
+    show_rerun_profile(record, history)
+
+def show_rerun_profile(record, history):
+    import altair as alt
+
+    with st.expander("⏱️ Rerun Profile", expanded=True):
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("Rerun", f"{record['total_ms']:.0f} ms")
+        col2.metric("Render", f"{record['render_ms']:.0f} ms")
+        col3.metric("API", f"{record['api_ms']:.0f} ms", f"{record['api_calls']} calls", delta_color="off")
+        col4.metric("Widgets", record['widgets'])
+        col5.metric("Session state", f"{record['state_bytes'] / 1024:.0f} KB")
+        rows = [
+            dict(section, label=f"{i:02d} {'· ' * section['depth']}{section['name']}",
+                 end_ms=section['start_ms'] + section['ms'])
+            for i, section in enumerate(record['sections'])
+        ]
+        if rows:
+            waterfall = alt.Chart(alt.Data(values=rows)).mark_bar().encode(
+                x=alt.X('start_ms:Q', title="ms since rerun start"),
+                x2='end_ms:Q',
+                y=alt.Y('label:N', sort=None, title=None),
+                color=alt.Color('api_ms:Q', title="API ms", scale=alt.Scale(scheme='oranges')),
+                tooltip=['name:N', 'ms:Q', 'api_ms:Q', 'api_calls:Q', 'widgets:Q']
+            )
+            st.altair_chart(waterfall, use_container_width=True)
+        st.markdown("**Largest session state keys**")
+        st.table([{'key': key, 'KB': round(size / 1024, 1)} for key, size in record['state_keys'].items()])
+        st.markdown("**Recent reruns**")
+        st.table(history[::-1])
+        st.caption(f"Saved to `{st.session_state.profile_path}`; compare runs with `python profiler.py A B`.")
 
 def main():
+    profiler = RerunProfiler(count_widgets).start() if st.session_state.get('profile_reruns') else None
+    try:
+        run_app()
+    finally:
+        if profiler is not None:
+            profiler.stop()
+    # Reruns cut short by st.rerun or st.stop never get here and are not recorded
+    if profiler is not None:
+        record_rerun_profile(profiler)
+    account_session_memory()
+
+def run_app():
     st.set_page_config(
         page_title="Spotify Playlist Manager",
         page_icon="🎵",
@@ -819,15 +1346,22 @@ def main():
         - `Ctrl/⌘ + D`: Delete selected
         - `Ctrl/⌘ + E`: Export playlist
         """)
-    
-    # Auto-refresh for real-time updates
-    st_autorefresh(interval=5 * 60 * 1000)  # Refresh every 5 minutes
+    developer_tools = st.sidebar.checkbox("Developer Tools", key="developer_tools")
+    if developer_tools:
+        st.sidebar.checkbox("Profile Reruns", key="profile_reruns",
+                            help="Time each page function and save the profiles under .profiles/")
     
     try:
         sp = get_spotify_client()
     except Exception as e:
         st.error(f"Error connecting to Spotify: {str(e)}")
         return
+    if sp is None:
+        return
+    rerun_start = sp.call_count
+    restore_selection(sp)
+    # Filled in last, so jobs submitted while the page renders start polling in this same run
+    jobs_panel = st.container()
     
     # Sidebar navigation with icons
     st.sidebar.title("Navigation")
@@ -846,15 +1380,23 @@ def main():
             show_album_search(sp)
         else:
             show_track_search(sp)
-        show_album_tracks(sp)
-        show_playlist_creation(sp)
+        if search_type != "Track":
+            st.session_state.track_results = []
+        show_selection_panel(sp)
     
     elif "Enhanced Search" in page:
         st.title("Enhanced Search")
         show_enhanced_track_search(sp)
     
     else:
+        watch_library(sp)
         show_playlist_manager(sp)
+    
+    flush_selection(sp)
+    with jobs_panel:
+        show_jobs(sp)
+    if developer_tools:
+        show_developer_panel(sp, rerun_start)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
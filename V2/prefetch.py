@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future
+
+from memory import deep_size
+
+class FetchCache:
+    """Thread-safe TTL cache of futures, so a value can be fetched in the background.
+
+    ``prefetch`` starts a fetch without waiting for it; ``get`` returns the cached
+    value, waits for an in-flight fetch of the same key, or fetches synchronously.
+    Concurrent requests for one key share a single API call. With ``max_bytes``
+    the estimated size of finished values is tracked too, and least recently
+    used entries are evicted to stay within it.
+    """
+
+    def __init__(self, executor, ttl=300, max_entries=512, metrics=None, name="fetch", max_bytes=None):
+        self.executor = executor
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.metrics = metrics
+        self.name = name
+        self.bytes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        # Reentrant because a future that is already done runs its size callback immediately
+        self._lock = threading.RLock()
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        created, future = entry
+        failed = future.done() and (future.cancelled() or future.exception() is not None)
+        if failed or time.monotonic() - created > self.ttl:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return future
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        self.bytes -= self._sizes.pop(key, 0)
+
+    def _store(self, key, future):
+        self._remove(key)
+        self._entries[key] = (time.monotonic(), future)
+        self._evict()
+        if self.max_bytes:
+            future.add_done_callback(lambda done: self._account(key, done))
+
+    def _account(self, key, future):
+        """Record the size of a finished value, then evict down to the byte budget."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        size = deep_size(future.result())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] is not future:
+                return
+            self.bytes += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes and self.bytes > self.max_bytes and len(self._entries) > 1
+        ):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def peek(self, key):
+        """Return ``(True, value)`` if a completed value is cached, else ``(False, None)``."""
+        with self._lock:
+            future = self._lookup(key)
+        if future is not None and future.done():
+            # Misses are counted by the get that follows
+            if self.metrics:
+                self.metrics.record_cache(self.name, True)
+            return True, future.result()
+        return False, None
+
+    def prefetch(self, key, fetch):
+        """Start fetching ``key`` in the background unless it is cached or in flight."""
+        with self._lock:
+            future = self._lookup(key)
+            if future is None:
+                future = self.executor.submit(fetch)
+                self._store(key, future)
+        return future
+
+    def get(self, key, fetch):
+        """Return the value for ``key``, reusing cached or in-flight results."""
+        with self._lock:
+            future = self._lookup(key)
+            if future is None:
+                future = Future()
+                self._store(key, future)
+                owner = True
+            else:
+                owner = False
+        if self.metrics:
+            self.metrics.record_cache(self.name, not owner)
+        if owner:
+            try:
+                future.set_result(fetch())
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+        return future.result()
+
+    def invalidate(self, key):
+        """Drop ``key`` so the next ``get`` fetches it again."""
+        with self._lock:
+            self._remove(key)
+
+class LatestSearch:
+    """Latest-wins search runner for one input box.
+
+    Each ``submit`` supersedes any earlier request, which is cancelled if it is
+    still queued or skipped if a worker only picks it up afterwards. Text inputs
+    only commit on Enter or blur, so there are no keystrokes to wait out.
+    """
+
+    def __init__(self, executor):
+        self.executor = executor
+        self._generation = 0
+        self._future = None
+        self._lock = threading.Lock()
+
+    def submit(self, search):
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            if self._future is not None and not self._future.done():
+                self._future.cancel()
+
+            def run():
+                if generation != self._generation:
+                    raise CancelledError()
+                return search()
+
+            self._future = self.executor.submit(run)
+            return self._future
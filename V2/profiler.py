@@ -0,0 +1,158 @@
+"""Per-rerun profiles of the Streamlit page functions.
+
+Render functions decorated with ``profiled`` are timed while a
+``RerunProfiler`` is active on the calling thread; Streamlit runs each
+session's script on its own thread, so sessions never record into each
+other's profile. Profiles are appended to a JSON lines file, one rerun per
+line. Compare two recordings offline with:
+
+    python profiler.py .profiles/before.ndjson .profiles/after.ndjson
+"""
+import functools
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from memory import state_sizes
+from metrics import thread_call_totals
+
+# Session state keys listed individually in a profile; the rest only count towards the total
+STATE_TOP_KEYS = 10
+
+_current = threading.local()
+
+def profiled(fn):
+    """Record calls of ``fn`` as a section of the active rerun profile, if any."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        profiler = getattr(_current, 'profiler', None)
+        if profiler is None:
+            return fn(*args, **kwargs)
+        with profiler.section(fn.__name__):
+            return fn(*args, **kwargs)
+    return wrapper
+
+class RerunProfiler:
+    """Timings of one rerun, split into sections by render function.
+
+    Each section records its offset from the start of the rerun, its wall time,
+    the time spent in Spotify API calls made from the script thread (background
+    prefetches are not included) and, with ``count_widgets``, how many widgets
+    it created. Sections nest, so a parent's time includes its children's.
+    """
+
+    def __init__(self, count_widgets=None):
+        self.count_widgets = count_widgets
+        self.sections = []
+        self.total_seconds = None
+        self._depth = 0
+
+    def _widgets(self):
+        return self.count_widgets() if self.count_widgets else 0
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._api_start = thread_call_totals()
+        self._widgets_start = self._widgets()
+        _current.profiler = self
+        return self
+
+    def stop(self):
+        self.total_seconds = time.perf_counter() - self._start
+        calls, api_seconds = thread_call_totals()
+        self.api_calls = calls - self._api_start[0]
+        self.api_seconds = api_seconds - self._api_start[1]
+        self.widgets = self._widgets() - self._widgets_start
+        _current.profiler = None
+
+    @contextmanager
+    def section(self, name):
+        start = time.perf_counter()
+        calls, api_seconds = thread_call_totals()
+        widgets = self._widgets()
+        # Appended before running so nested sections follow their parent
+        entry = {'name': name, 'depth': self._depth}
+        self.sections.append(entry)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            end_calls, end_api_seconds = thread_call_totals()
+            entry.update(
+                start_ms=round((start - self._start) * 1000, 2),
+                ms=round((time.perf_counter() - start) * 1000, 2),
+                api_ms=round((end_api_seconds - api_seconds) * 1000, 2),
+                api_calls=end_calls - calls,
+                widgets=self._widgets() - widgets,
+            )
+
+    def record(self, state=None, exclude=()):
+        """The stopped rerun as a JSON-serializable dict, with session state sizes if ``state`` is given."""
+        total_ms = self.total_seconds * 1000
+        api_ms = self.api_seconds * 1000
+        record = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'total_ms': round(total_ms, 2),
+            'api_ms': round(api_ms, 2),
+            'render_ms': round(total_ms - api_ms, 2),
+            'api_calls': self.api_calls,
+            'widgets': self.widgets,
+            'sections': [section for section in self.sections if 'ms' in section],
+        }
+        if state is not None:
+            sizes = state_sizes(state, exclude)
+            record['state_bytes'] = sum(size for _, size in sizes)
+            record['state_keys'] = {str(key): size for key, size in sizes[:STATE_TOP_KEYS]}
+        return record
+
+def save_profile(record, path):
+    """Append one rerun record to a JSON lines file."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+
+def load_profiles(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def summarize_profiles(records):
+    """Median ``ms``, ``api_ms`` and ``widgets`` per section over many reruns.
+
+    A section called several times in one rerun is summed for that rerun. The
+    whole rerun appears as ``(rerun)``.
+    """
+    samples = {}
+    for record in records:
+        per_rerun = {'(rerun)': {'ms': record['total_ms'], 'api_ms': record['api_ms'], 'widgets': record['widgets']}}
+        for section in record['sections']:
+            totals = per_rerun.setdefault(section['name'], {'ms': 0, 'api_ms': 0, 'widgets': 0})
+            for key in totals:
+                totals[key] += section[key]
+        for name, totals in per_rerun.items():
+            samples.setdefault(name, []).append(totals)
+    return {
+        name: dict({key: round(statistics.median(t[key] for t in runs), 2) for key in runs[0]}, reruns=len(runs))
+        for name, runs in samples.items()
+    }
+
+def main():
+    if not 2 <= len(sys.argv) <= 3:
+        sys.exit("usage: python profiler.py PROFILE.ndjson [OTHER.ndjson]")
+    summaries = [summarize_profiles(load_profiles(path)) for path in sys.argv[1:]]
+    names = sorted(set().union(*summaries), key=lambda name: -summaries[0].get(name, {}).get('ms', 0))
+    for name in names:
+        rows = [summary.get(name) for summary in summaries]
+        columns = [f"{row['ms']:>9.1f}ms {row['api_ms']:>8.1f}ms api {row['widgets']:>5.0f} widgets"
+                   if row else f"{'-':>38}" for row in rows]
+        if len(rows) == 2 and all(rows) and rows[0]['ms']:
+            columns.append(f"{rows[1]['ms'] / rows[0]['ms'] - 1:+.0%}")
+        print(f"{name:<32} " + "  |  ".join(columns))
+
+if __name__ == "__main__":
+    main()
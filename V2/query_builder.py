@@ -0,0 +1,109 @@
+import difflib
+import re
+
+from models import Track
+
+FIELD_PATTERN = re.compile(r'\b(track|artist|album|year):("([^"]*)"|\S+)', re.IGNORECASE)
+BY_PATTERN = re.compile(r'\s+(?:by|By|BY)\s+([^-]+)')
+ALBUM_PATTERN = re.compile(r'\s*Album-\s*(.*)')
+YEAR_PATTERN = re.compile(r'[\(\[]((?:19|20)\d{2})[\)\]]')
+
+def parse_search_input(text):
+    """Split free-form user input into track, artist, album and year parts.
+
+    Understands explicit Spotify style filters (``artist:Queen``) as well as the
+    "<song> by <artist>" and "Album-<name>" conventions used elsewhere in the app.
+    """
+    parsed = {'track': '', 'artist': '', 'album': '', 'year': ''}
+    remaining = text or ''
+    for match in FIELD_PATTERN.finditer(remaining):
+        parsed[match.group(1).lower()] = (match.group(3) if match.group(3) is not None else match.group(2)).strip()
+    remaining = FIELD_PATTERN.sub('', remaining)
+
+    album_match = ALBUM_PATTERN.search(remaining)
+    if album_match:
+        parsed['album'] = parsed['album'] or album_match.group(1).strip()
+        remaining = remaining[:album_match.start()]
+    year_match = YEAR_PATTERN.search(remaining)
+    if year_match:
+        parsed['year'] = parsed['year'] or year_match.group(1)
+        remaining = remaining[:year_match.start()] + remaining[year_match.end():]
+    by_match = BY_PATTERN.search(remaining)
+    if by_match:
+        parsed['artist'] = parsed['artist'] or by_match.group(1).strip()
+        remaining = remaining[:by_match.start()]
+    parsed['track'] = parsed['track'] or ' '.join(remaining.split())
+    return parsed
+
+def _field(name, value):
+    value = value.replace('"', '')
+    return f'{name}:"{value}"' if ' ' in value else f'{name}:{value}'
+
+def compile_query_stages(parsed):
+    """Build Spotify queries from the most to the least specific.
+
+    The first stage uses every known field filter; later stages drop the album
+    and year, then the field qualifiers, so a miss widens the search gradually.
+    """
+    stages = []
+    track, artist, album, year = parsed['track'], parsed['artist'], parsed['album'], parsed['year']
+    strict = [_field('track', track)] if track else []
+    if artist:
+        strict.append(_field('artist', artist))
+    if album:
+        strict.append(_field('album', album))
+    if year:
+        strict.append(f'year:{year}')
+    if strict:
+        stages.append(' '.join(strict))
+    if track and artist and (album or year):
+        stages.append(f"{_field('track', track)} {_field('artist', artist)}")
+    free_text = ' '.join(part for part in (track, artist) if part)
+    if free_text:
+        stages.append(free_text)
+    if track and artist:
+        stages.append(track)
+    # Preserve order while dropping stages that compiled to the same query
+    return list(dict.fromkeys(stages))
+
+def _similarity(a, b):
+    return difflib.SequenceMatcher(None, a.lower(), b.lower()).ratio()
+
+def score_track_match(parsed, track):
+    """Score a track against the parsed input, between 0 and 1."""
+    score = _similarity(parsed['track'], track.name) if parsed['track'] else 0.5
+    if parsed['artist']:
+        artist_score = max((_similarity(parsed['artist'], name) for name in track.artists), default=0)
+        score = 0.6 * score + 0.4 * artist_score
+    if parsed['album'] and track.album:
+        score = 0.85 * score + 0.15 * _similarity(parsed['album'], track.album)
+    return score
+
+def staged_track_search(sp, text, limit=10, confident_score=0.85):
+    """Search tracks stage by stage, stopping at the first confident match.
+
+    Returns ``(tracks, best_match, stats)`` where ``tracks`` are ``Track`` models ranked by match
+    score and ``stats`` records how many requests and results were used.
+    """
+    parsed = parse_search_input(text)
+    stats = {'requests': 0, 'results': 0, 'queries': []}
+    seen = {}
+    best_match, best_score = None, 0
+    for query in compile_query_stages(parsed):
+        results = sp.search(q=query, limit=limit, type="track")
+        items = [Track.from_api(item) for item in results['tracks']['items'] if item]
+        stats['requests'] += 1
+        stats['results'] += len(items)
+        stats['queries'].append(query)
+        for track in items:
+            if track.id in seen:
+                continue
+            score = score_track_match(parsed, track)
+            seen[track.id] = (score, track)
+            if score > best_score:
+                best_match, best_score = track, score
+        if best_score >= confident_score:
+            break
+    ranked = [track for _, track in sorted(seen.values(), key=lambda pair: pair[0], reverse=True)]
+    stats['best_score'] = best_score
+    return ranked, best_match, stats
@@ -0,0 +1,101 @@
+import json
+import os
+import re
+import tempfile
+from collections import OrderedDict
+
+from models import Track
+
+class TrackSelection:
+    """Ordered, id-keyed set of selected tracks with a repeat count per track.
+
+    Tracks are stored as ``Track`` models.
+    Membership, add, remove and count updates are O(1) regardless of size.
+    """
+
+    def __init__(self, tracks=None, counts=None):
+        self._tracks = OrderedDict()
+        self._counts = {}
+        for track in tracks or []:
+            self.add(track, (counts or {}).get(track.id, 1))
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def __bool__(self):
+        return bool(self._tracks)
+
+    def __iter__(self):
+        return iter(list(self._tracks.values()))
+
+    def __contains__(self, track):
+        track_id = track.id if isinstance(track, Track) else track
+        return track_id in self._tracks
+
+    def add(self, track, count=1):
+        """Add a track; returns False if it was already selected."""
+        if not track.id or track.id in self._tracks:
+            return False
+        self._tracks[track.id] = track
+        self._counts[track.id] = count
+        return True
+
+    def add_many(self, tracks):
+        """Add several tracks, keeping their order. Returns how many were new."""
+        return sum(1 for track in tracks if self.add(track))
+
+    def remove(self, track):
+        track_id = track.id if isinstance(track, Track) else track
+        self._counts.pop(track_id, None)
+        return self._tracks.pop(track_id, None) is not None
+
+    def remove_many(self, track_ids):
+        return sum(1 for track_id in track_ids if self.remove(track_id))
+
+    def clear(self):
+        self._tracks.clear()
+        self._counts.clear()
+
+    def count(self, track_id):
+        return self._counts.get(track_id, 0)
+
+    def set_count(self, track_id, count):
+        if track_id in self._tracks:
+            self._counts[track_id] = max(1, int(count))
+
+    def tracks_with_counts(self):
+        """Return ``[{'id': ..., 'count': ...}]`` in selection order, as create_playlist_from_tracks expects."""
+        return [{'id': track_id, 'count': self._counts[track_id]} for track_id in self._tracks]
+
+    def to_dict(self):
+        return {
+            'tracks': [track.to_dict() for track in self._tracks.values()],
+            'counts': dict(self._counts),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        counts = {track_id: max(1, int(count)) for track_id, count in data.get('counts', {}).items()}
+        return cls([Track.from_dict(track) for track in data.get('tracks', [])], counts)
+
+def selection_path(directory, user_id):
+    """Path of the saved selection for a Spotify user."""
+    safe_id = re.sub(r'[^\w.-]', '_', user_id)
+    return os.path.join(directory, f"{safe_id}.json")
+
+def save_selection(selection, path):
+    """Write a selection atomically so a crash never leaves a half-written file."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(selection.to_dict(), f)
+    os.replace(tmp_path, path)
+
+def load_selection(path):
+    """Load a saved selection, or an empty one if none exists, it is unreadable or malformed."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return TrackSelection.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return TrackSelection()
@@ -0,0 +1,55 @@
+from catalog_index import CatalogIndex, normalize_text, text_ngrams
+from models import Track
+
+def _track(track_id, name, artist="Artist", popularity=0):
+    return Track(track_id, name, (artist,), (artist.lower(),), "Album", 2020, 200000, popularity, False)
+
+def test_normalize_text_ignores_case_accents_and_punctuation():
+    assert normalize_text("  Beyoncé -  Déjà Vu! ") == "beyonce deja vu"
+    assert normalize_text(None) == ""
+
+def test_short_words_still_produce_ngrams():
+    assert text_ngrams("a") == {" a "}
+    assert text_ngrams("abba") == {" ab", "abb", "bba", "ba "}
+
+def test_adding_twice_is_a_no_op():
+    index = CatalogIndex()
+    assert index.add('artist', "a1", "Queen")
+    assert not index.add('artist', "a1", "Queen")
+    assert not index.add('artist', "a2", "")
+    assert len(index) == 1
+
+def test_search_ranks_prefix_matches_then_popularity():
+    index = CatalogIndex()
+    index.add_many('track', [_track("t1", "Yesterday", popularity=50), _track("t2", "Yesterday", popularity=90),
+                             _track("t3", "All My Yesterdays", popularity=99)])
+    assert [entity['id'] for entity in index.search("yesterday", kind='track')] == ["t2", "t1", "t3"]
+
+def test_search_filters_by_kind_and_tolerates_typos():
+    index = CatalogIndex()
+    index.add_track(_track("t1", "Bohemian Rhapsody", artist="Queen"))
+    assert [entity['kind'] for entity in index.search("queen")] == ['artist', 'track']
+    assert [entity['id'] for entity in index.search("queen", kind='artist')] == ["queen"]
+    assert [entity['id'] for entity in index.search("bohemain rhapsody")] == ["t1"]
+
+def test_short_queries_fall_back_to_prefixes():
+    index = CatalogIndex()
+    index.add('artist', "a1", "Metallica")
+    assert [entity['id'] for entity in index.search("me")] == ["a1"]
+    assert index.search("") == []
+
+def test_eviction_drops_oldest_entities_and_their_postings():
+    index = CatalogIndex(max_entities=2)
+    for i, name in enumerate(["Alpha", "Bravo", "Charlie"]):
+        index.add('artist', f"a{i}", name)
+    assert len(index) == 2 and index.evictions == 1
+    assert index.search("alpha") == []
+    assert not any(('artist', "a0") in keys for keys in index._ngrams.values())
+
+def test_byte_budget_bounds_the_index():
+    index = CatalogIndex(max_bytes=20000)
+    for i in range(500):
+        index.add('artist', f"a{i}", f"Artist number {i}")
+    assert 0 < index.bytes <= 20000
+    assert 0 < len(index) < 500
+    assert index.search("artist number 499")[0]['id'] == "a499"
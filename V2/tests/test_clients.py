@@ -0,0 +1,28 @@
+from urllib.parse import parse_qs, urlparse
+
+from clients import SpotifyClientPool
+
+def _pool(**kwargs):
+    pool = SpotifyClientPool("client-id", "client-secret", "http://127.0.0.1:8501/", "user-library-read", **kwargs)
+    pool.authorized = []
+    pool.authorize = lambda session_key, code: pool.authorized.append((session_key, code))
+    return pool
+
+def _state(url):
+    return parse_qs(urlparse(url).query)['state'][0]
+
+def test_login_state_is_single_use_and_returns_the_starting_session():
+    pool = _pool()
+    state = _state(pool.login_url("session-a"))
+    assert state != _state(pool.login_url("session-a"))
+    assert pool.complete_login("code", state) == "session-a"
+    assert pool.complete_login("code", state) is None
+    assert pool.authorized == [("session-a", "code")]
+
+def test_unknown_missing_or_expired_state_is_rejected():
+    pool = _pool(login_timeout=-1)
+    state = _state(pool.login_url("session-a"))
+    assert pool.complete_login("code", None) is None
+    assert pool.complete_login("code", "forged") is None
+    assert pool.complete_login("code", state) is None
+    assert pool.authorized == []
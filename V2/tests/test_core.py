@@ -0,0 +1,87 @@
+import io
+import json
+
+from catalog_index import CatalogIndex
+from core import read_track_records, resolve_tracks, save_playlists_to_library
+from exporter import _WRITERS
+from models import Track
+
+ROWS = [
+    {'name': "Song A", 'artists': "Artist", 'album': "Album", 'id': "a" * 22, 'duration_ms': 200000, 'popularity': 80},
+    {'name': "Song B", 'artists': "Artist", 'album': "Album", 'id': "b" * 22, 'duration_ms': 180000, 'popularity': 70},
+]
+
+def _export(format):
+    buffer = io.BytesIO()
+    _WRITERS[format]([ROWS], buffer)
+    buffer.seek(0)
+    return buffer
+
+def test_csv_round_trip_keeps_numbers():
+    records = read_track_records(_export('csv'), "playlist.csv")
+    assert records == ROWS
+
+def test_ndjson_and_json_round_trip():
+    assert read_track_records(_export('ndjson'), "playlist.ndjson") == ROWS
+    assert read_track_records(_export('json'), "playlist.json") == ROWS
+
+def test_dataframe_column_layout_is_read_as_rows():
+    columns = {field: {str(i): row[field] for i, row in enumerate(ROWS)} for field in ROWS[0]}
+    records = read_track_records(io.BytesIO(json.dumps(columns).encode()), "playlist.json")
+    assert records == ROWS
+
+def test_csv_bad_numbers_become_zero():
+    data = b"name,artists,album,id,duration_ms,popularity\nSong,Artist,Album,cccccccccccccccccccccc,,high\n"
+    record, = read_track_records(io.BytesIO(data), "playlist.csv")
+    assert record['duration_ms'] == 0 and record['popularity'] == 0
+
+def test_imported_tracks_keep_index_search_sortable():
+    index = CatalogIndex()
+    index.add_track(Track.from_dict({'id': "x" * 22, 'name': "Same Song", 'artists': "Artist", 'popularity': "80"}))
+    for record in read_track_records(_export('csv'), "playlist.csv"):
+        index.add_track(Track.from_dict(dict(record, name="Same Song")))
+    results = index.search("same song", kind='track')
+    assert [entity['popularity'] for entity in results] == [80, 80, 70]
+
+class _FlakySpotify:
+    """Answers track lookups by URI; ids starting with 'e' fail like a rate limit would."""
+
+    def track(self, track_id):
+        if track_id.startswith('e'):
+            raise RuntimeError("429 Too Many Requests")
+        return {'id': track_id, 'name': "Song", 'artists': [{'id': "r" * 22, 'name': "Artist"}]}
+
+def test_resolve_tracks_reports_errors_apart_from_results():
+    lines = [f"spotify:track:{'a' * 22}", f"spotify:track:{'e' * 22}", "  "]
+    resolved = resolve_tracks(_FlakySpotify(), lines)
+    assert [(line, track.id if track else None, error) for line, track, error in resolved] == [
+        (lines[0], "a" * 22, None),
+        (lines[1], None, "429 Too Many Requests"),
+    ]
+
+class _LibrarySpotify:
+    def __init__(self, playlists, saved):
+        self.playlists = playlists
+        self.saved = set(saved)
+
+    def playlist_tracks(self, playlist_id):
+        tracks = self.playlists[playlist_id]
+        return {'items': [{'track': {'id': track_id, 'name': track_id, 'artists': [], 'album': {}}}
+                          for track_id in tracks], 'next': None, 'total': len(tracks)}
+
+    def current_user_saved_tracks_contains(self, tracks):
+        return [track_id in self.saved for track_id in tracks]
+
+    def current_user_saved_tracks_add(self, tracks):
+        self.saved.update(tracks)
+
+def test_library_save_progress_only_moves_forward():
+    playlists = {f"p{i}": [f"t{i}_{j}" for j in range(120)] for i in range(3)}
+    sp = _LibrarySpotify(playlists, saved=[f"t0_{j}" for j in range(120)])
+    reports = []
+    saved, already_saved = save_playlists_to_library(sp, list(playlists), max_workers=1,
+                                                     on_progress=lambda done, total: reports.append((done, total)))
+    assert (saved, already_saved) == (240, 120)
+    assert len({total for _, total in reports}) == 1
+    fractions = [done / total for done, total in reports]
+    assert fractions == sorted(fractions) and fractions[-1] == 1
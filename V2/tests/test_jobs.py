@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+
+from jobs import JobCancelled, JobQueue
+
+def _wait(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while queue.get(job_id).active and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return queue.get(job_id)
+
+def test_job_result_and_progress(tmp_path):
+    queue = JobQueue(str(tmp_path), max_workers=1)
+
+    def work(progress):
+        progress(1, 2)
+        progress(2, 2)
+        return "Done", {'count': 2}
+
+    job = _wait(queue, queue.submit('test', "Test job", work, owner="user"))
+    assert (job.status, job.message, job.result, job.fraction) == ('succeeded', "Done", {'count': 2}, 1.0)
+    assert [j.id for j in queue.list(owner="user")] == [job.id]
+    assert queue.list(owner="someone else") == []
+
+def test_failed_job_keeps_error(tmp_path):
+    queue = JobQueue(str(tmp_path), max_workers=1)
+
+    def work(progress):
+        raise RuntimeError("boom")
+
+    job = _wait(queue, queue.submit('test', "Failing job", work))
+    assert job.status == 'failed' and "boom" in job.message
+
+def test_cancel_unknown_or_finished_job(tmp_path):
+    queue = JobQueue(str(tmp_path), max_workers=1)
+    assert queue.cancel("missing") is False
+    job_id = queue.submit('test', "Quick job", lambda progress: ("Done", None))
+    _wait(queue, job_id)
+    assert queue.cancel(job_id) is False
+
+def test_cancel_stops_running_job_at_next_progress(tmp_path):
+    queue = JobQueue(str(tmp_path), max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    reports = []
+
+    def work(progress):
+        started.set()
+        release.wait(5)
+        for done in range(1, 4):
+            progress(done, 3)
+            reports.append(done)
+        return "Done", None
+
+    job_id = queue.submit('test', "Slow job", work)
+    started.wait(5)
+    queued_id = queue.submit('test', "Queued job", lambda progress: ("Done", None))
+    assert queue.cancel(queued_id) is True
+    assert queue.get(queued_id).status == 'cancelled'
+    assert queue.cancel(job_id) is True
+    release.set()
+    assert _wait(queue, job_id).status == 'cancelled'
+    assert reports == []
+
+def test_restart_marks_running_jobs_interrupted(tmp_path):
+    job_file = tmp_path / "abc.json"
+    job_file.write_text(json.dumps({'id': "abc", 'kind': 'test', 'label': "Old job", 'status': 'running',
+                                    'created_at': 1.0}), encoding="utf-8")
+    (tmp_path / "broken.json").write_text("{", encoding="utf-8")
+    job = JobQueue(str(tmp_path)).get("abc")
+    assert job.status == 'failed' and "restart" in job.message
+    assert json.loads(job_file.read_text(encoding="utf-8"))['status'] == 'failed'
+
+def test_remove_deletes_result_file(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs"), max_workers=1)
+    result_path = tmp_path / "export.zip"
+    result_path.write_bytes(b"zip")
+    job_id = _wait(queue, queue.submit('export', "Export", lambda progress: ("Done", {'path': str(result_path)}))).id
+    queue.remove(job_id)
+    assert queue.get(job_id) is None
+    assert not result_path.exists()
+    assert not (tmp_path / "jobs" / f"{job_id}.json").exists()
+
+def test_progress_raises_once_cancelled(tmp_path):
+    queue = JobQueue(str(tmp_path), max_workers=1)
+    raised = []
+    started, release = threading.Event(), threading.Event()
+
+    def work(progress):
+        started.set()
+        release.wait(5)
+        try:
+            progress(1, 1)
+        except JobCancelled:
+            raised.append(True)
+            raise
+        return "Done", None
+
+    job_id = queue.submit('test', "Job", work)
+    started.wait(5)
+    queue.cancel(job_id)
+    release.set()
+    _wait(queue, job_id)
+    assert raised == [True]
@@ -0,0 +1,61 @@
+import threading
+
+from models import Track
+from paged_search import apply_track_filters, build_filtered_query, iter_filtered_track_search
+
+def _track(i, popularity=50, artist="artist0"):
+    return {'id': f"t{i}", 'name': f"Song {i}", 'popularity': popularity,
+            'artists': [{'id': artist, 'name': "Artist"}], 'album': {'name': "Album"}}
+
+class FakeSearch:
+    """``sp.search`` over a fixed result list, recording the requested offsets."""
+
+    def __init__(self, tracks, genres=None):
+        self.tracks = tracks
+        self.genres = genres or {}
+        self.offsets = []
+        self.artist_calls = 0
+        self._lock = threading.Lock()
+
+    def search(self, q, limit, offset, type):
+        with self._lock:
+            self.offsets.append(offset)
+        items = self.tracks[offset:offset + limit]
+        return {'tracks': {'items': items, 'next': "more" if offset + limit < len(self.tracks) else None}}
+
+    def artists(self, artist_ids):
+        self.artist_calls += 1
+        return {'artists': [{'id': a, 'genres': self.genres.get(a, [])} for a in artist_ids]}
+
+def _collect(sp, **kwargs):
+    return [track.id for batch in iter_filtered_track_search(sp, "song", **kwargs) for track in batch]
+
+def test_query_carries_year_and_genre():
+    assert build_filtered_query("song", {'year': "1990-1999", 'genre': "indie pop"}) == \
+        'song year:1990-1999 genre:"indie pop"'
+
+def test_requests_only_the_pages_the_target_needs():
+    sp = FakeSearch([_track(i) for i in range(500)])
+    assert _collect(sp, target=20, page_size=50) == [f"t{i}" for i in range(20)]
+    assert sp.offsets == [0]
+    sp = FakeSearch([_track(i) for i in range(500)])
+    assert len(_collect(sp, target=120, page_size=50)) == 120
+    assert sorted(sp.offsets) == [0, 50, 100]
+
+def test_keeps_paging_until_filtered_target_is_met():
+    tracks = [_track(i, popularity=90 if i % 10 == 0 else 10) for i in range(500)]
+    sp = FakeSearch(tracks)
+    found = _collect(sp, filters={'min_popularity': 80}, target=12, page_size=50)
+    assert found == [f"t{i}" for i in range(0, 120, 10)]
+
+def test_stops_when_results_run_out():
+    sp = FakeSearch([_track(i) for i in range(30)])
+    assert len(_collect(sp, target=100, page_size=20)) == 30
+
+def test_genre_filter_uses_cached_artist_genres():
+    sp = FakeSearch([], genres={'a1': ["Indie Pop"], 'a2': ["metal"]})
+    tracks = [Track.from_api(_track(1, artist='a1')), Track.from_api(_track(2, artist='a2'))]
+    cache = {}
+    assert [t.id for t in apply_track_filters(sp, tracks, {'genre': "indie pop"}, cache)] == ["t1"]
+    apply_track_filters(sp, tracks, {'genre': "metal"}, cache)
+    assert sp.artist_calls == 1
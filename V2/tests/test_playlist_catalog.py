@@ -0,0 +1,52 @@
+import random
+
+from models import Playlist
+from playlist_catalog import MAX_CACHED_VIEWS, SORT_KEYS, PlaylistCatalog
+
+def _playlist(i, name, owner_id="me", owner_name="Me", track_count=0):
+    return Playlist(f"p{i}", name, owner_id, owner_name, track_count, "snap", None)
+
+def _library(n=300, seed=1):
+    rng = random.Random(seed)
+    words = ["Rock", "chill", "Road Trip", "Workout", "jazz", "Café", "mix", "Focus"]
+    owners = [("me", "Me"), ("u1", "Spotify"), ("u2", "Jazz Fan")]
+    playlists = []
+    for i in range(n):
+        owner_id, owner_name = rng.choice(owners)
+        name = f"{rng.choice(words)} {rng.choice(words)} {i}"
+        playlists.append(_playlist(i, name, owner_id, owner_name, rng.randrange(500)))
+    return playlists
+
+def _reference(playlists, section, sort_by, reverse, filter_text):
+    """What the manager computed before the catalog: filter, then sort, from scratch."""
+    in_section = [p for p in playlists if (p.owner_id == "me") == (section == 'owned')]
+    query = filter_text.lower()
+    matching = [p for p in in_section if query in p.name.lower() or query in p.owner_name.lower()]
+    return sorted(matching, key=SORT_KEYS[sort_by], reverse=reverse)
+
+def test_views_match_filtering_and_sorting_from_scratch():
+    playlists = _library()
+    catalog = PlaylistCatalog(playlists, "me")
+    for section in ('owned', 'followed'):
+        for sort_by in SORT_KEYS:
+            for reverse in (False, True):
+                for filter_text in ("", "r", "ro", "ROAD", "jazz", "fé", "p tr", "12", "zzz"):
+                    assert catalog.view(section, sort_by, reverse, filter_text) == \
+                        _reference(playlists, section, sort_by, reverse, filter_text), \
+                        (section, sort_by, reverse, filter_text)
+
+def test_filter_matches_owner_but_not_across_name_and_owner():
+    catalog = PlaylistCatalog([_playlist(0, "Evening", "u1", "Jazz Fan"), _playlist(1, "Jazz", "u1", "Bob")], "me")
+    assert [p.id for p in catalog.view('followed', filter_text="jazz")] == ["p0", "p1"]
+    assert catalog.view('followed', filter_text="eveningjazz") == []
+
+def test_unknown_sort_key_keeps_library_order():
+    playlists = [_playlist(i, name) for i, name in enumerate(["b", "a", "c"])]
+    assert [p.name for p in PlaylistCatalog(playlists, "me").view('owned', sort_by="added")] == ["b", "a", "c"]
+
+def test_cached_views_are_reused_and_bounded():
+    catalog = PlaylistCatalog(_library(50), "me")
+    assert catalog.view('owned', filter_text="mix") is catalog.view('owned', filter_text="mix")
+    for i in range(MAX_CACHED_VIEWS + 10):
+        catalog.view('owned', filter_text=str(i))
+    assert len(catalog._views) == MAX_CACHED_VIEWS
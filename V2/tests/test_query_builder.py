@@ -0,0 +1,62 @@
+from models import Track
+from query_builder import compile_query_stages, parse_search_input, score_track_match, staged_track_search
+
+def _item(track_id, name, artist, album="Album"):
+    return {'id': track_id, 'name': name, 'artists': [{'id': artist.lower(), 'name': artist}],
+            'album': {'name': album}}
+
+class FakeSearch:
+    """``sp.search`` answering each query from a fixed mapping, recording the queries."""
+
+    def __init__(self, results):
+        self.results = results
+        self.queries = []
+
+    def search(self, q, limit, type):
+        self.queries.append(q)
+        return {'tracks': {'items': self.results.get(q, [])}}
+
+def test_parses_by_and_album_conventions():
+    assert parse_search_input("Bohemian Rhapsody by Queen Album-A Night at the Opera") == {
+        'track': "Bohemian Rhapsody", 'artist': "Queen", 'album': "A Night at the Opera", 'year': ''}
+
+def test_explicit_fields_and_year_win():
+    assert parse_search_input('artist:"Daft Punk" One More Time (2000) by Someone') == {
+        'track': "One More Time", 'artist': "Daft Punk", 'album': '', 'year': "2000"}
+
+def test_empty_input():
+    assert parse_search_input(None) == {'track': '', 'artist': '', 'album': '', 'year': ''}
+    assert compile_query_stages(parse_search_input("")) == []
+
+def test_stages_widen_from_strict_to_free_text():
+    assert compile_query_stages(parse_search_input("Bohemian Rhapsody by Queen (1975)")) == [
+        'track:"Bohemian Rhapsody" artist:Queen year:1975',
+        'track:"Bohemian Rhapsody" artist:Queen',
+        "Bohemian Rhapsody Queen",
+        "Bohemian Rhapsody",
+    ]
+
+def test_stages_without_artist_are_not_repeated():
+    assert compile_query_stages(parse_search_input("Yesterday")) == ["track:Yesterday", "Yesterday"]
+
+def test_score_prefers_matching_artist():
+    parsed = parse_search_input("Yesterday by The Beatles")
+    original = Track.from_api(_item("a", "Yesterday", "The Beatles"))
+    cover = Track.from_api(_item("b", "Yesterday", "Cover Band"))
+    assert score_track_match(parsed, original) > score_track_match(parsed, cover)
+    assert score_track_match(parsed, original) == 1.0
+
+def test_staged_search_stops_at_a_confident_match():
+    sp = FakeSearch({'track:Yesterday artist:"The Beatles"': [_item("a", "Yesterday", "The Beatles")]})
+    ranked, best, stats = staged_track_search(sp, "Yesterday by The Beatles")
+    assert best.id == "a" and [track.id for track in ranked] == ["a"]
+    assert stats['requests'] == 1 and sp.queries == ['track:Yesterday artist:"The Beatles"']
+
+def test_staged_search_widens_and_ranks_unique_results():
+    sp = FakeSearch({
+        "Yesterday The Beatles": [_item("b", "Yesterday Once More", "Carpenters"), _item("c", "Yesterday", "Beatles Tribute")],
+        "Yesterday": [_item("c", "Yesterday", "Beatles Tribute"), _item("a", "Yesterday", "The Beatles")],
+    })
+    ranked, best, stats = staged_track_search(sp, "Yesterday by The Beatles")
+    assert stats['requests'] == 3 and stats['results'] == 4
+    assert best.id == "a" and [track.id for track in ranked] == ["a", "c", "b"]
@@ -0,0 +1,41 @@
+import json
+
+from models import Track
+from selection import TrackSelection, load_selection, save_selection, selection_path
+
+def _track(track_id, name="Song"):
+    return Track(track_id, name, ("Artist",), ("artist1",), "Album", 2020, 200000, 50, False)
+
+def test_add_remove_and_counts_keep_order():
+    selection = TrackSelection()
+    assert selection.add_many([_track("a"), _track("b"), _track("a")]) == 2
+    selection.set_count("b", 3)
+    assert selection.tracks_with_counts() == [{'id': "a", 'count': 1}, {'id': "b", 'count': 3}]
+    assert selection.remove("a") and not selection.remove("a")
+    assert "b" in selection and len(selection) == 1
+
+def test_save_and_load_round_trip(tmp_path):
+    selection = TrackSelection([_track("a"), _track("b")], {"b": 2})
+    path = selection_path(str(tmp_path), "user/with:odd chars")
+    save_selection(selection, path)
+    loaded = load_selection(path)
+    assert [track.id for track in loaded] == ["a", "b"]
+    assert loaded.count("b") == 2
+    assert list(tmp_path.iterdir()) == [tmp_path / "user_with_odd_chars.json"]
+
+def test_missing_file_loads_empty(tmp_path):
+    assert not load_selection(str(tmp_path / "missing.json"))
+
+def test_malformed_files_load_empty(tmp_path):
+    path = tmp_path / "selection.json"
+    for content in ["not json", "[]", '{"tracks": [{"name": "no id"}]}',
+                    '{"tracks": [], "counts": {"a": "many"}}', '{"tracks": 5}']:
+        path.write_text(content, encoding="utf-8")
+        assert not load_selection(str(path)), content
+
+def test_saved_counts_are_restored_as_ints(tmp_path):
+    path = tmp_path / "selection.json"
+    data = TrackSelection([_track("a")]).to_dict()
+    data['counts'] = {"a": "4"}
+    path.write_text(json.dumps(data), encoding="utf-8")
+    assert load_selection(str(path)).count("a") == 4
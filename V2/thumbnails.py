@@ -0,0 +1,125 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import wait
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+class ThumbnailCache:
+    """Downloads cover images once, downscales them and keeps them on local disk.
+
+    ``get_many`` starts all missing downloads concurrently and returns a local
+    path for every image that is ready within ``timeout``, falling back to the
+    remote URL for the rest. Streamlit serves local files under a content-hashed
+    media URL, so repeated reruns reuse the browser's cached copy. The files
+    are kept within ``max_bytes`` by deleting the least recently used ones.
+    """
+
+    def __init__(self, cache_dir, executor, http=None, quality=85, max_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.executor = executor
+        self.http = http or requests.Session()
+        self.quality = quality
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._pending = {}
+        self._files = OrderedDict()
+        # Reentrant because a future that is already done runs its callback immediately
+        self._lock = threading.RLock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        """Pick up the files of earlier runs, oldest first."""
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.jpg'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+        for _, path, size in sorted(files):
+            self._files[path] = size
+            self.bytes += size
+        self._evict()
+
+    def _add(self, path):
+        with self._lock:
+            size = os.path.getsize(path)
+            self.bytes += size - self._files.pop(path, 0)
+            self._files[path] = size
+            self._evict()
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and len(self._files) > 1:
+            path, size = self._files.popitem(last=False)
+            self.bytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _touch(self, path):
+        with self._lock:
+            if path in self._files:
+                self._files.move_to_end(path)
+
+    def path_for(self, url, width):
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}-{width}.jpg")
+
+    def _download(self, url, width, path):
+        response = self.http.get(url, timeout=10)
+        response.raise_for_status()
+        data = response.content
+        try:
+            from PIL import Image
+        except ImportError:
+            Image = None
+        if Image is not None:
+            image = Image.open(io.BytesIO(data))
+            if image.width > width:
+                image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.convert('RGB').save(buffer, format='JPEG', quality=self.quality, optimize=True)
+            data = buffer.getvalue()
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._add(path)
+        return path
+
+    def _submit(self, url, width, path):
+        with self._lock:
+            future = self._pending.get(path)
+            if future is None:
+                future = self.executor.submit(self._download, url, width, path)
+                self._pending[path] = future
+                future.add_done_callback(lambda _: self._forget(path))
+            return future
+
+    def _forget(self, path):
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def get_many(self, urls, width, timeout=1.5):
+        """Return a local path or, if not ready in time, the original URL for each image."""
+        paths = [self.path_for(url, width) if url else None for url in urls]
+        futures = []
+        for url, path in zip(urls, paths):
+            if path and not os.path.exists(path):
+                futures.append(self._submit(url, width, path))
+        if futures:
+            wait(futures, timeout=timeout)
+        results = []
+        for url, path in zip(urls, paths):
+            if path and os.path.exists(path):
+                self._touch(path)
+                results.append(path)
+            else:
+                results.append(url)
+        return results
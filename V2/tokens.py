@@ -0,0 +1,134 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from spotipy.cache_handler import CacheHandler
+from spotipy.oauth2 import SpotifyOAuth
+
+logger = logging.getLogger(__name__)
+
+class TokenCache(CacheHandler):
+    """Token cache that reads its file once and writes it only when the token changes.
+
+    spotipy's ``CacheFileHandler`` re-reads the JSON file for every API call;
+    this keeps the token in memory instead. Without a ``path`` it is purely in
+    memory, which is what per-session clients use.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._token_info = None
+        self._loaded = path is None
+        self._lock = threading.Lock()
+
+    def get_cached_token(self):
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                try:
+                    with open(self.path, encoding='utf-8') as f:
+                        self._token_info = json.load(f)
+                except (OSError, ValueError):
+                    self._token_info = None
+            return self._token_info
+
+    def save_token_to_cache(self, token_info):
+        with self._lock:
+            if token_info == self._token_info:
+                return
+            self._token_info = token_info
+            self._loaded = True
+            if self.path:
+                self._write(token_info)
+
+    def _write(self, token_info):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(token_info, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Couldn't write token cache {self.path}: {e}")
+
+class ManagedSpotifyOAuth(SpotifyOAuth):
+    """SpotifyOAuth that serves tokens from memory and refreshes them before they expire.
+
+    A background timer refreshes the token ``refresh_margin`` seconds ahead of
+    expiry, so API calls never pay for a refresh. Refreshes are serialized by a
+    lock, so concurrent callers that do find an expired token trigger only one.
+    Once no token was asked for in ``idle_timeout`` seconds the timer stops
+    re-arming; the next call refreshes synchronously and starts it again.
+    """
+
+    def __init__(self, *args, refresh_margin=300, idle_timeout=3600, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.refresh_margin = refresh_margin
+        self.idle_timeout = idle_timeout
+        self._refresh_lock = threading.Lock()
+        self._timer_lock = threading.Lock()
+        self._timer = None
+        self._closed = False
+        self._last_used = time.monotonic()
+
+    def _fresh_token(self):
+        token_info = self.cache_handler.get_cached_token()
+        if token_info and 'expires_at' in token_info and not self.is_token_expired(token_info):
+            if self._is_scope_subset(self.scope, token_info.get('scope')):
+                return token_info
+        return None
+
+    def get_access_token(self, code=None, as_dict=False, check_cache=True):
+        self._last_used = time.monotonic()
+        if code is None and check_cache:
+            token_info = self._fresh_token()
+            if token_info is None:
+                with self._refresh_lock:
+                    # Another caller may have refreshed while we waited
+                    token_info = self._fresh_token()
+                    if token_info is None:
+                        token_info = super().get_access_token(as_dict=True, check_cache=True)
+        else:
+            with self._refresh_lock:
+                token_info = super().get_access_token(code, as_dict=True, check_cache=check_cache)
+        self._schedule_refresh(token_info)
+        return token_info if as_dict else token_info['access_token']
+
+    def _schedule_refresh(self, token_info):
+        if not token_info or not token_info.get('refresh_token'):
+            return
+        with self._timer_lock:
+            if self._closed or self._timer is not None:
+                return
+            delay = max(token_info['expires_at'] - self.refresh_margin - time.time(), 0)
+            self._timer = threading.Timer(delay, self._refresh_in_background)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _refresh_in_background(self):
+        try:
+            if time.monotonic() - self._last_used > self.idle_timeout:
+                return
+            with self._refresh_lock:
+                token_info = self.cache_handler.get_cached_token()
+                if token_info and token_info['expires_at'] - time.time() <= self.refresh_margin:
+                    token_info = self.refresh_access_token(token_info['refresh_token'])
+        except Exception as e:
+            # The next API call falls back to refreshing synchronously
+            logger.warning(f"Background token refresh failed: {e}")
+            return
+        finally:
+            with self._timer_lock:
+                self._timer = None
+        self._schedule_refresh(token_info)
+
+    def close(self):
+        """Stop refreshing, e.g. when the owning session is dropped."""
+        with self._timer_lock:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None